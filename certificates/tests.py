@@ -1,3 +1,18 @@
+import fitz
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from .utils import generate_certificate_pdf
+
+
+class CertificatePdfTests(TestCase):
+    def test_certificate_contains_level_layout_and_fields(self):
+        user = User.objects.create_user(email="gold@example.com", first_name="Aigerim", last_name="K",
+                                         password="pass12345")
+        file = generate_certificate_pdf(user, 'gold')
+
+        self.assertEqual(file.name, f"{user.id}_gold_certificate.pdf")
+        with fitz.open(stream=file.read(), filetype='pdf') as pdf:
+            text = pdf[0].get_text()
+        for line in ("Gold Certificate", "Awarded to: Aigerim K", "Email: gold@example.com", "DEMEU Team"):
+            self.assertIn(line, text)
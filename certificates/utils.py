@@ -1,40 +1,46 @@
-import os
-from io import BytesIO
-from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
-from django.core.files.base import ContentFile
+from demeu.pdf import render_file
 from django.conf import settings
 from django.core.mail import EmailMessage
 
-def generate_certificate_pdf(user, level):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
+# Цветовая схема по уровню
+CERTIFICATE_COLORS = {
+    'gold': (212/255, 175/255, 55/255),  # золотой
+    'silver': (192/255, 192/255, 192/255),  # серебряный
+    'bronze': (205/255, 127/255, 50/255),  # бронзовый
+}
 
-    width, height = A4
 
-    # Цветовая схема
-    if level == 'gold':
-        color = (212/255, 175/255, 55/255)  # золотой
-    elif level == 'silver':
-        color = (192/255, 192/255, 192/255)  # серебряный
-    else:
-        color = (205/255, 127/255, 50/255)  # бронзовый
+def draw_certificate_static(p, level):
+    width, height = A4
 
-    p.setFillColorRGB(*color)
+    p.setFillColorRGB(*CERTIFICATE_COLORS.get(level, CERTIFICATE_COLORS['bronze']))
     p.setFont("Helvetica-Bold", 30)
     p.drawCentredString(width / 2, height - 100, f"{level.capitalize()} Certificate")
 
     p.setFillColorRGB(0, 0, 0)
     p.setFont("Helvetica", 16)
-    p.drawCentredString(width / 2, height - 160, f"Awarded to: {user.first_name} {user.last_name}")
     p.drawCentredString(width / 2, height - 190, f"For contribution to DEMEU platform")
-    p.drawCentredString(width / 2, height - 240, f"Email: {user.email}")
     p.drawCentredString(width / 2, height - 290, "DEMEU Team")
 
-    p.save()
 
-    buffer.seek(0)
-    return ContentFile(buffer.read(), name=f"{user.id}_{level}_certificate.pdf")
+def draw_certificate_fields(p, user):
+    width, height = A4
+
+    p.setFillColorRGB(0, 0, 0)
+    p.setFont("Helvetica", 16)
+    p.drawCentredString(width / 2, height - 160, f"Awarded to: {user.first_name} {user.last_name}")
+    p.drawCentredString(width / 2, height - 240, f"Email: {user.email}")
+
+
+def draw_certificate(p, user, level):
+    draw_certificate_static(p, level)
+    draw_certificate_fields(p, user)
+
+
+def generate_certificate_pdf(user, level):
+    level = str(level)
+    return render_file(f"{user.id}_{level}_certificate.pdf", A4, draw_certificate, user, level)
 
 
 def send_certificate_email(user, certificate):
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Comment
 from publications.models import Publication
 from profiles.models import Profile
+from profiles.avatars import avatar_url
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -22,11 +23,7 @@ class CommentSerializer(serializers.ModelSerializer):
         return comment
 
     def get_avatar(self, obj):
-        if obj.author.profile.avatar:
-            request = self.context.get('request')
-            avatar_url = obj.author.profile.avatar.url
-            return request.build_absolute_uri(avatar_url) if request else avatar_url
-        return None
+        return avatar_url(obj.author.profile, 48, self.context.get('request'))
 
     def get_author_id(self, obj):
         return obj.author.id if obj.author else None
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'demeu.settings')
 
@@ -7,4 +8,13 @@ app = Celery('demeu')
 
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def preload_ner_models(**kwargs):
+    # NER-модели нужны только воркерам: грузим их один раз на процесс до первой задачи
+    from django.conf import settings
+    if getattr(settings, 'NER_PRELOAD', True):
+        from verification.services.ner import preload
+        preload()
@@ -0,0 +1,117 @@
+import math
+import os
+from io import BytesIO
+
+from PIL import Image, UnidentifiedImageError
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+# Варианты изображения по наибольшей стороне, px. Увеличения нет: вариант, совпавший по размеру
+# с большим, ссылается на его файл
+IMAGE_VARIANTS = {'large': 1920, 'medium': 960, 'thumbnail': 320}
+IMAGE_VARIANT_QUALITY = 80
+
+
+def variant_name(name, pk, variant):
+    # Рядом с оригиналом: publications/images/photo.jpg -> publications/images/photo_42_medium.webp.
+    # pk строки делает имя уникальным: photo.jpg и photo.png (или две строки с одним файлом)
+    # не делят и не удаляют варианты друг друга
+    return f"{os.path.splitext(name)[0]}_{pk}_{variant}.webp"
+
+
+def render_variants(file):
+    """
+    Декодирует изображение один раз и уменьшает последовательно large -> medium -> thumbnail.
+    Возвращает {variant: (bytes или None, width, height)}; None — тот же файл, что у предыдущего варианта.
+    """
+    image = Image.open(file)
+    # Для JPEG декодер сразу уменьшает в 2-8 раз: фото на 50 МБ не разворачиваются целиком.
+    # Размер для draft — с пропорциями оригинала, иначе для 4:3 уменьшение не срабатывает
+    scale = min(1, max(IMAGE_VARIANTS.values()) / max(image.size))
+    image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'P', 'LA') else 'RGB')
+
+    rendered, previous = {}, None
+    for variant, side in sorted(IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+        image.thumbnail((side, side), Image.LANCZOS)
+        if image.size == previous:
+            rendered[variant] = (None, *image.size)
+            continue
+        buffer = BytesIO()
+        image.save(buffer, format='WEBP', quality=IMAGE_VARIANT_QUALITY)
+        rendered[variant] = (buffer.getvalue(), *image.size)
+        previous = image.size
+    return rendered
+
+
+def build_variants(instance, field='image'):
+    """
+    Строит варианты для instance.<field> и сохраняет карту в instance.variants:
+    {variant: {'name', 'width', 'height'}} или {'error': ...}, если файл не читается как изображение.
+    Карта пишется UPDATE с условием на имя файла: заменённый за это время оригинал не перезаписывается.
+    """
+    file = getattr(instance, field)
+    if not file:
+        return {}
+    storage = file.storage
+    try:
+        with file.open('rb'):
+            rendered = render_variants(file)
+    except (UnidentifiedImageError, OSError) as e:
+        variants = {'error': str(e)}
+    else:
+        variants, previous = {}, None
+        for variant, (content, width, height) in rendered.items():
+            if content is None:
+                name = previous
+            else:
+                target = variant_name(file.name, instance.pk, variant)
+                storage.delete(target)  # файл этой же строки: повторная обработка перезаписывает его
+                name = previous = storage.save(target, ContentFile(content))
+            variants[variant] = {'name': name, 'width': width, 'height': height}
+
+    type(instance).objects.filter(pk=instance.pk, **{field: file.name}).update(variants=variants)
+    instance.variants = variants
+    return variants
+
+
+def delete_variants(instance, field='image'):
+    storage = getattr(instance, field).storage
+    for name in {item['name'] for key, item in (instance.variants or {}).items() if key in IMAGE_VARIANTS}:
+        storage.delete(name)
+
+
+def variant_url(instance, variant, request=None, field='image'):
+    """
+    URL варианта; пока варианты не построены (или не построились) — оригинал.
+    """
+    file = getattr(instance, field)
+    if not file:
+        return None
+    item = (instance.variants or {}).get(variant)
+    url = file.storage.url(item['name']) if item else file.url
+    return request.build_absolute_uri(url) if request else url
+
+
+def srcset(instance, request=None, field='image'):
+    """
+    Карта в стиле srcset: {"320w": url, "960w": url, ...} по фактической ширине вариантов.
+    """
+    file = getattr(instance, field)
+    result = {}
+    for variant in IMAGE_VARIANTS:
+        item = (instance.variants or {}).get(variant)
+        if item:
+            url = file.storage.url(item['name'])
+            result[f"{item['width']}w"] = request.build_absolute_uri(url) if request else url
+    return result
+
+
+def schedule_variants(task, pk):
+    if not getattr(settings, 'IMAGE_VARIANTS_AUTOSCHEDULE', True):
+        return
+    try:
+        task.delay(pk)
+    except Exception as e:
+        # Изображение останется с пустой картой и будет обработано build_image_variants
+        print("⚠️ Не удалось поставить построение вариантов изображения в очередь:", e)
@@ -0,0 +1,29 @@
+import tempfile
+
+from django.core.files import File
+from reportlab.pdfgen import canvas
+
+# До этого размера документ держится в памяти, дальше SpooledTemporaryFile уходит на диск
+SPOOL_MAX_SIZE = 512 * 1024
+
+
+def render_pdf(fileobj, pagesize, draw, *args):
+    """
+    Одностраничный PDF: draw(canvas, *args) рисует страницу, результат пишется в fileobj.
+    """
+    pdf = canvas.Canvas(fileobj, pagesize=pagesize)
+    draw(pdf, *args)
+    pdf.showPage()
+    pdf.save()
+    return fileobj
+
+
+def render_file(name, pagesize, draw, *args):
+    """
+    Рендерит в SpooledTemporaryFile и возвращает django File, готовый для FieldFile.save():
+    хранилище читает его по частям, весь документ в BytesIO не собирается.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    render_pdf(spool, pagesize, draw, *args)
+    spool.seek(0)
+    return File(spool, name=name)
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 from datetime import timedelta
 from celery.schedules import crontab
 
@@ -64,6 +64,7 @@ INSTALLED_APPS = [
     'verification',
     'notifications',
     'certificates',
+    'mailer',
 ]
 
 MIDDLEWARE = [
@@ -130,7 +131,10 @@ SOCIALACCOUNT_PROVIDERS = {
 }
 REST_USE_JWT = True
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Все письма сначала попадают в очередь mailer.OutboxMessage; задача send_queued_mail
+# отправляет их пачками через одно соединение MAILER_DELIVERY_BACKEND
+EMAIL_BACKEND = 'mailer.backends.OutboxBackend'
+MAILER_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -160,12 +164,67 @@ TEMPLATES = [
 WSGI_APPLICATION = 'demeu.wsgi.application'
 ASGI_APPLICATION = 'demeu.asgi.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
-    },
+# Общий слой каналов: уведомления из Celery и любого ASGI-процесса доходят до сокетов в других
+# процессах. Несколько адресов через запятую — группы шардируются между серверами Redis.
+# По умолчанию — InMemoryChannelLayer (только один процесс, для локальной разработки и CI);
+# в docker-compose и на сервере адрес задаётся переменной окружения.
+CHANNEL_REDIS_HOSTS = config('CHANNEL_REDIS_HOSTS', default='', cast=Csv())
+
+if CHANNEL_REDIS_HOSTS:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {
+                "hosts": CHANNEL_REDIS_HOSTS,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+
+# Общий кэш (Redis) для всех процессов; без него — локальный кэш процесса.
+# В docker-compose задан; от него по умолчанию включаются VIEW_BUFFER_ENABLED, RESPONSE_CACHE_ENABLED
+# и NOTIFICATIONS_TRACK_PRESENCE
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        },
+    }
+
+# Не публиковать уведомления пользователям без открытых сокетов (notifications/presence.py).
+# Имеет смысл только с общим кэшем: локальный кэш воркера Celery не видит сокетов daphne.
+NOTIFICATIONS_TRACK_PRESENCE = config('NOTIFICATIONS_TRACK_PRESENCE', default=bool(CACHE_REDIS_URL), cast=bool)
+
+# Просмотры публикаций и профилей копятся в общем кэше и пишутся в БД задачами flush_*_views
+# (demeu/view_buffer.py); без общего кэша просмотр записывается сразу на запросе
+VIEW_BUFFER_ENABLED = config('VIEW_BUFFER_ENABLED', default=bool(CACHE_REDIS_URL), cast=bool)
+
+# Кэш анонимных ответов публикаций с ETag/304 (publications/response_cache.py); версии хранятся
+# в кэше, поэтому без общего кэша процессы не видели бы сбросов друг друга
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=bool(CACHE_REDIS_URL), cast=bool)
+
+# Срок хранения прочитанных уведомлений по verb (notifications/retention.py); 'default' — для остальных
+NOTIFICATION_RETENTION = {
+    'default': timedelta(days=90),
+    "💰 Кто-то пожертвовал на вашу публикацию": timedelta(days=30),
+    "⏰ Ваша публикация скоро истекает": timedelta(days=7),
+    "❗ Сегодня заканчивается срок вашей публикации": timedelta(days=7),
 }
 
+# Повторяющиеся уведомления этих типов (один получатель и ссылка) сворачиваются в одну строку с count
+NOTIFICATION_COMPACT_VERBS = [
+    "💰 Кто-то пожертвовал на вашу публикацию",
+    "💬 Новый комментарий к вашей публикации",
+]
+
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
@@ -193,11 +252,56 @@ CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 
+# OCR документов: число страниц PDF, распознаваемых одновременно (verification/services/ocr.py)
+OCR_MAX_WORKERS = config('OCR_MAX_WORKERS', default=4, cast=int)
+# Распознаются только первые OCR_MAX_PAGES страниц PDF
+OCR_MAX_PAGES = config('OCR_MAX_PAGES', default=20, cast=int)
+
+# Кэш результатов OCR по SHA-256 файла (verification/services/cache.py);
+# для общего кэша между воркерами — 'verification.services.cache.DjangoOCRCache'
+OCR_CACHE_BACKEND = 'verification.services.cache.DiskOCRCache'
+OCR_CACHE_OPTIONS = {
+    'directory': os.path.join(BASE_DIR, 'cache', 'ocr'),
+    'max_bytes': 256 * 1024 * 1024,
+}
+
 CELERY_BEAT_SCHEDULE = {
     'check-publication-status-daily': {
         'task': 'publications.tasks.check_publication_status',
         'schedule': crontab(hour=0, minute=0),  # каждый день в полночь
     },
+    'refresh-trending-publications': {
+        'task': 'publications.tasks.refresh_trending_publications',
+        'schedule': crontab(minute='*/10'),  # каждые 10 минут
+    },
+    'send-queued-mail': {
+        'task': 'mailer.tasks.send_queued_mail',
+        'schedule': crontab(),  # каждую минуту; ретраи и подстраховка к постановке из OutboxBackend
+    },
+    'flush-publication-views': {
+        'task': 'publications.tasks.flush_publication_views',
+        'schedule': crontab(),  # каждую минуту
+    },
+    'flush-profile-views': {
+        'task': 'profiles.tasks.flush_profile_views',
+        'schedule': crontab(),  # каждую минуту
+    },
+    'process-pending-avatars': {
+        'task': 'profiles.tasks.process_pending_avatars',
+        'schedule': crontab(minute='*/5'),  # каждые 5 минут; обычно обработку ставит Profile.save()
+    },
+    'purge-notifications-daily': {
+        'task': 'notifications.tasks.purge_notifications',
+        'schedule': crontab(hour=3, minute=30),  # каждый день в 3:30, после ночного цикла публикаций
+    },
+    'purge-sent-mail-daily': {
+        'task': 'mailer.tasks.purge_sent_mail',
+        'schedule': crontab(hour=3, minute=45),  # каждый день в 3:45; сроки хранения — mailer/utils.py
+    },
+    'process-stripe-events': {
+        'task': 'donations.tasks.process_stripe_events',
+        'schedule': crontab(),  # каждую минуту; обычно задачу ставит сам вебхук
+    },
 }
 
 # Password validation
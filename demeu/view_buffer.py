@@ -0,0 +1,116 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Просмотры пишутся в корзины по BUCKET_SECONDS; сбрасываются только закрытые корзины,
+# в которые уже никто не пишет
+BUCKET_SECONDS = 10
+# Несброшенные просмотры живут в кэше столько; если воркер не работал дольше, они теряются
+BUFFER_TTL = 60 * 60
+# Повторный просмотр той же пары (объект, зритель) в течение суток в буфер не попадает
+DEDUP_TTL = 24 * 60 * 60
+FLUSH_LOCK_TTL = 5 * 60
+
+
+class ViewBuffer:
+    """
+    Буфер просмотров в кэше (Redis при CACHE_REDIS_URL). record() на запросе не трогает БД:
+    пара (объект, зритель) дедуплицируется через cache.add и кладётся в слот корзины.
+    flush() из периодической задачи забирает закрытые корзины, вставляет просмотры одним
+    bulk_create(ignore_conflicts=True) поверх уникального ограничения модели и вызывает
+    on_flush(target_ids) для пересчёта денормализованных счётчиков.
+
+    Без общего кэша (VIEW_BUFFER_ENABLED=False) воркер не видит буфер веб-процессов,
+    поэтому просмотр записывается сразу через write_through().
+    """
+
+    def __init__(self, name, model, target_field, on_flush=None):
+        self.name = name
+        self.model = model
+        self.target_field = target_field
+        self.on_flush = on_flush
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'VIEW_BUFFER_ENABLED', False)
+
+    def _key(self, *parts):
+        return ':'.join(('views', self.name) + tuple(str(part) for part in parts))
+
+    def record(self, target_id, viewer_id):
+        """
+        Отмечает просмотр. Возвращает False, если пара уже встречалась за DEDUP_TTL.
+        """
+        if not cache.add(self._key('seen', target_id, viewer_id), 1, DEDUP_TTL):
+            return False
+        if not self.enabled:
+            self.write_through(target_id, viewer_id)
+            return True
+
+        bucket = int(time.time() // BUCKET_SECONDS)
+        counter = self._key(bucket, 'n')
+        cache.add(counter, 0, BUFFER_TTL)
+        slot = cache.incr(counter)
+        cache.set(self._key(bucket, slot), (target_id, viewer_id), BUFFER_TTL)
+        return True
+
+    def write_through(self, target_id, viewer_id):
+        _, created = self.model.objects.get_or_create(**{f"{self.target_field}_id": target_id,
+                                                         'viewer_id': viewer_id})
+        if created and self.on_flush:
+            self.on_flush({target_id})
+
+    def save(self, pairs, batch_size=1000):
+        """
+        Вставляет пары (target_id, viewer_id); пары с удалёнными объектами или зрителями
+        отбрасываются. Возвращает число переданных в INSERT пар.
+        """
+        if not pairs:
+            return 0
+        target_model = self.model._meta.get_field(self.target_field).related_model
+        viewer_model = self.model._meta.get_field('viewer').related_model
+        targets = set(target_model.objects.filter(pk__in={t for t, _ in pairs}).values_list('pk', flat=True))
+        viewers = set(viewer_model.objects.filter(pk__in={v for _, v in pairs}).values_list('pk', flat=True))
+        pairs = [(t, v) for t, v in pairs if t in targets and v in viewers]
+
+        self.model.objects.bulk_create([
+            self.model(**{f"{self.target_field}_id": t, 'viewer_id': v}) for t, v in pairs
+        ], batch_size=batch_size, ignore_conflicts=True)
+        if pairs and self.on_flush:
+            self.on_flush({t for t, _ in pairs})
+        return len(pairs)
+
+    def flush(self, now=None, batch_size=1000):
+        """
+        Сбрасывает закрытые корзины в БД. Возвращает число записанных пар
+        (None, если сброс уже выполняется другим воркером).
+        """
+        lock = self._key('flush-lock')
+        if not cache.add(lock, 1, FLUSH_LOCK_TTL):
+            return None
+        try:
+            current = int((now or time.time()) // BUCKET_SECONDS)
+            last = cache.get(self._key('flushed'))
+            first = current - BUFFER_TTL // BUCKET_SECONDS
+            if last is not None:
+                first = max(first, last + 1)
+            closed = range(first, current - 1)  # текущая и предыдущая корзины могут ещё заполняться
+
+            pairs, keys = set(), []
+            for bucket in closed:
+                count = cache.get(self._key(bucket, 'n'))
+                if not count:
+                    continue
+                slots = [self._key(bucket, slot) for slot in range(1, count + 1)]
+                pairs.update(tuple(pair) for pair in cache.get_many(slots).values())
+                keys += slots + [self._key(bucket, 'n')]
+
+            saved = self.save(pairs, batch_size)
+            # Ключи удаляются только после успешной вставки: при ошибке корзины сбросятся в следующий раз
+            cache.delete_many(keys)
+            if len(closed):
+                cache.set(self._key('flushed'), closed[-1], None)
+            return saved
+        finally:
+            cache.delete(lock)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Donation
+from .models import Donation, StripeEvent
+from .stripe_webhooks import replay_stripe_events
 
 class DonationAdmin(admin.ModelAdmin):
     list_display = ['get_donor_name', 'donor_amount', 'support_amount', 'total_amount', 'publication', 'created_at']
@@ -13,4 +14,18 @@ class DonationAdmin(admin.ModelAdmin):
 
     get_donor_name.short_description = "Donor Name"
 
-admin.site.register(Donation, DonationAdmin)
\ No newline at end of file
+admin.site.register(Donation, DonationAdmin)
+
+@admin.action(description="Повторно обработать выбранные события")
+def replay_events(modeladmin, request, queryset):
+    replay_stripe_events(queryset)
+
+
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'type', 'status', 'attempts', 'received_at', 'processed_at']
+    search_fields = ('event_id',)
+    list_filter = ('status', 'type')
+    readonly_fields = ('event_id', 'type', 'payload', 'received_at', 'processed_at', 'error')
+    actions = [replay_events]
+
+admin.site.register(StripeEvent, StripeEventAdmin)
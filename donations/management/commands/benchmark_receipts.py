@@ -0,0 +1,46 @@
+import tempfile
+import time
+from types import SimpleNamespace
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reportlab.lib.pagesizes import letter
+
+from demeu.pdf import render_file
+from donations.receipt import draw_receipt, generate_donation_receipt, receipt_file_name
+
+
+def fake_donation(number):
+    return SimpleNamespace(
+        id=number, donor_amount=f"{1000 + number}.00", support_amount="50.00", created_at=timezone.now(),
+        donor=SimpleNamespace(first_name="Aigerim", last_name="K."),
+        publication=SimpleNamespace(title="Operation for Aidana"),
+    )
+
+
+class Command(BaseCommand):
+    help = "Measure receipts per second, rendered in memory and streamed to storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000)
+
+    def run(self, label, render, donations):
+        start = time.perf_counter()
+        for donation in donations:
+            render(donation)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{label:28} {len(donations) / elapsed:8.0f} receipts/s")
+
+    def handle(self, *args, **options):
+        donations = [fake_donation(number) for number in range(options['count'])]
+        self.run("BytesIO", generate_donation_receipt, donations)
+
+        with tempfile.TemporaryDirectory() as directory:
+            storage = FileSystemStorage(location=directory)
+
+            def to_storage(donation):
+                name = receipt_file_name(donation)
+                storage.save(name, render_file(name, letter, draw_receipt, donation))
+
+            self.run("storage", to_storage, donations)
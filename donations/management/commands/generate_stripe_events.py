@@ -0,0 +1,109 @@
+import hashlib
+import hmac
+import json
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+
+from accounts.models import User
+from donations.models import Donation, StripeEvent
+from donations.stripe_webhooks import drain_stripe_events, stripe_webhook
+from publications.models import Publication
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: int = None) -> str:
+    """
+    Заголовок Stripe-Signature (схема v1: HMAC-SHA256 от "timestamp.payload").
+    """
+    timestamp = timestamp or int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def payment_intent_event(user_id, publication_id, donor_amount, intent_id=None, event_id=None):
+    intent_id = intent_id or f"pi_{uuid.uuid4().hex[:24]}"
+    return {
+        'id': event_id or f"evt_{uuid.uuid4().hex[:24]}",
+        'object': 'event',
+        'type': 'payment_intent.succeeded',
+        'created': int(time.time()),
+        'data': {'object': {
+            'id': intent_id,
+            'object': 'payment_intent',
+            'amount': int(donor_amount * 100),
+            'currency': 'kzt',
+            'metadata': {
+                'user_id': str(user_id),
+                'donor_amount': str(donor_amount),
+                'support_percentage': '0',
+                'publication_id': str(publication_id),
+            },
+        }},
+    }
+
+
+class Command(BaseCommand):
+    help = "Load-test the Stripe webhook with locally signed payment_intent.succeeded events"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000)
+        parser.add_argument('--duplicates', type=float, default=0.1,
+                            help="Share of events re-delivered with the same event id (Stripe retries)")
+        parser.add_argument('--user', type=int, help="Donor id (default: first user)")
+        parser.add_argument('--publication', type=int, help="Publication id (default: first publication)")
+        parser.add_argument('--process', action='store_true', help="Drain the queue afterwards and report throughput")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(id=options['user']) if options['user'] else User.objects.order_by('id')
+        publication = (Publication.objects.filter(id=options['publication']) if options['publication']
+                       else Publication.objects.order_by('id'))
+        user, publication = user.first(), publication.first()
+        if not user or not publication:
+            raise CommandError("Need at least one user and one publication.")
+
+        secret = settings.STRIPE_WEBHOOK_SECRET
+        events = [payment_intent_event(user.id, publication.id, random.randint(1, 50) * 100)
+                  for _ in range(options['count'])]
+        deliveries = events + random.sample(events, int(len(events) * options['duplicates']))
+        random.shuffle(deliveries)
+        # Подпись считается заранее, чтобы замер включал только обработку вебхука
+        requests = []
+        factory = RequestFactory()
+        for event in deliveries:
+            payload = json.dumps(event).encode()
+            requests.append(factory.post('/api/stripe/webhook/', data=payload, content_type='application/json',
+                                         HTTP_STRIPE_SIGNATURE=sign_payload(payload, secret)))
+
+        events_before = StripeEvent.objects.count()
+        donations_before = Donation.objects.count()
+
+        # При --process очередь разбирается здесь же, Celery не нужен
+        with override_settings(STRIPE_EVENTS_AUTOSCHEDULE=not options['process']):
+            start = time.perf_counter()
+            statuses = [stripe_webhook(request).status_code for request in requests]
+            elapsed = time.perf_counter() - start
+
+        failed = sum(status != 200 for status in statuses)
+        stored = StripeEvent.objects.count() - events_before
+        self.stdout.write(
+            f"📨 Webhook: {len(requests)} deliveries in {elapsed:.2f}s ({len(requests) / elapsed:.0f}/s), "
+            f"stored {stored} unique events, non-200: {failed}"
+        )
+
+        if options['process']:
+            # Воркер в этом же процессе: отложенные уведомления выполняются сразу, без брокера
+            from demeu.celery import app
+            app.conf.task_always_eager = True
+
+            start = time.perf_counter()
+            processed = drain_stripe_events()
+            elapsed = time.perf_counter() - start
+            created = Donation.objects.count() - donations_before
+            self.stdout.write(
+                f"⚙️ Worker: {processed} events in {elapsed:.2f}s ({processed / max(elapsed, 1e-9):.0f}/s), "
+                f"donations created: {created}"
+            )
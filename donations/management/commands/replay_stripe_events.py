@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from donations.models import StripeEvent
+from donations.stripe_webhooks import drain_stripe_events, replay_stripe_events
+
+
+class Command(BaseCommand):
+    help = "Put stored Stripe events back into the processing queue (idempotent per PaymentIntent)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', action='append', default=[], help="Stripe event id (repeatable)")
+        parser.add_argument('--since', help="Replay events received at or after this ISO datetime")
+        parser.add_argument('--status', choices=['failed', 'processed', 'all'], default='failed')
+        parser.add_argument('--now', action='store_true', help="Process the queue in this process instead of Celery")
+
+    def handle(self, *args, **options):
+        events = StripeEvent.objects.all()
+        if options['event']:
+            events = events.filter(event_id__in=options['event'])
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid datetime: {options['since']}")
+            events = events.filter(received_at__gte=since)
+        if options['status'] != 'all':
+            events = events.filter(status=options['status'])
+
+        count = replay_stripe_events(events)
+        self.stdout.write(f"🔁 Queued {count} Stripe events for replay.")
+
+        if options['now']:
+            processed = drain_stripe_events()
+            self.stdout.write(self.style.SUCCESS(f"✅ Processed {processed} events."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0004_stripe_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='receipt',
+            field=models.FileField(blank=True, null=True, upload_to='receipts/%Y/%m/'),
+        ),
+    ]
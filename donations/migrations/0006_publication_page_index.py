@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0005_donation_receipt'),
+        ('publications', '0022_sub_resource_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['publication', '-created_at', '-id'], name='donation_publication_page_idx'),
+        ),
+    ]
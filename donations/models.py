@@ -12,6 +12,15 @@ class Donation(models.Model):
     support_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     created_at = models.DateTimeField(default=timezone.now)
+    # PaymentIntent Stripe; уникальность не даёт повторной доставке вебхука создать второй донат
+    payment_intent_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    receipt = models.FileField(upload_to='receipts/%Y/%m/', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Постраничный список пожертвований /publications/<pk>/donations/
+            models.Index(fields=['publication', '-created_at', '-id'], name='donation_publication_page_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if self.donor_amount is not None and self.support_percentage is not None:
@@ -21,4 +30,30 @@ class Donation(models.Model):
 
     def __str__(self):
         donor_name = f"{self.donor.first_name} {self.donor.last_name}" if self.donor else "Anonymous"
-        return f"{donor_name} donated {self.total_amount} ₸"
\ No newline at end of file
+        return f"{donor_name} donated {self.total_amount} ₸"
+
+class StripeEvent(models.Model):
+    """
+    Сырое событие Stripe. Вебхук только сохраняет его (event_id уникален, повторы Stripe
+    отбрасываются), обработку выполняет задача donations.tasks.process_stripe_events.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает обработки'),
+        ('processed', 'Обработано'),
+        ('failed', 'Ошибка'),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'received_at'], name='stripe_event_queue_idx')]
+
+    def __str__(self):
+        return f"{self.type} {self.event_id} ({self.status})"
@@ -1,12 +1,11 @@
 from io import BytesIO
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 
-def generate_donation_receipt(donation):
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
+from demeu.pdf import render_file, render_pdf
 
+
+def draw_receipt_static(pdf):
     pdf.setFillColor(colors.red)
     pdf.setFont("Helvetica-Bold", 20)
     pdf.drawString(100, 750, "Demeu - Donation Successful")
@@ -17,6 +16,18 @@ def generate_donation_receipt(donation):
     pdf.setFont("Helvetica-Bold", 14)
     pdf.drawString(180, 728, "Donation Successfully Completed")
 
+    pdf.setFillColor(colors.black)
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(100, 610, "From: Kaspi Gold *XXXX")
+
+    pdf.setStrokeColor(colors.gray)
+    pdf.line(100, 570, 400, 570)
+    pdf.setFont("Helvetica-Oblique", 10)
+    pdf.drawString(100, 550, "Thank you for your support!")
+    pdf.drawString(100, 535, "This receipt is automatically generated.")
+
+
+def draw_receipt_fields(pdf, donation):
     pdf.setFillColor(colors.black)
     pdf.setFont("Helvetica-Bold", 14)
     pdf.drawString(100, 690, f"Amount: {donation.donor_amount} KZT")
@@ -28,16 +39,45 @@ def generate_donation_receipt(donation):
 
     donor_name = f"{donation.donor.first_name} {donation.donor.last_name}" if donation.donor else "Anonymous"
     pdf.drawString(100, 630, f"Donor Name: {donor_name}")
-
-    pdf.drawString(100, 610, "From: Kaspi Gold *XXXX")
     pdf.drawString(100, 590, f"To: {donation.publication.title}")
 
-    pdf.setStrokeColor(colors.gray)
-    pdf.line(100, 570, 400, 570)
-    pdf.setFont("Helvetica-Oblique", 10)
-    pdf.drawString(100, 550, "Thank you for your support!")
-    pdf.drawString(100, 535, "This receipt is automatically generated.")
 
-    pdf.save()
+def draw_receipt(pdf, donation):
+    draw_receipt_static(pdf)
+    draw_receipt_fields(pdf, donation)
+
+
+def receipt_file_name(donation):
+    return f"donation_receipt_{donation.id}.pdf"
+
+
+def generate_donation_receipt(donation):
+    buffer = BytesIO()
+    render_pdf(buffer, letter, draw_receipt, donation)
     buffer.seek(0)
     return buffer
+
+
+def store_donation_receipt(donation):
+    """
+    Рендерит чек прямо в хранилище (Donation.receipt). Строка обновляется через UPDATE,
+    чтобы не запускать Donation.save() и сигналы счётчиков.
+    """
+    from .models import Donation
+
+    name = receipt_file_name(donation)
+    donation.receipt.save(name, render_file(name, letter, draw_receipt, donation), save=False)
+    Donation.objects.filter(id=donation.id).update(receipt=donation.receipt.name)
+    return donation.receipt
+
+
+def render_donation_receipts(donations):
+    """
+    Пакетный рендер чеков в хранилище. donations должен приходить
+    с select_related('donor', 'publication'). Возвращает число сохранённых чеков.
+    """
+    count = 0
+    for donation in donations:
+        store_donation_receipt(donation)
+        count += 1
+    return count
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Donation
+from profiles.avatars import avatar_url
 
 class DonationSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
@@ -19,10 +20,8 @@ class DonationSerializer(serializers.ModelSerializer):
         return f"{obj.donor.first_name} {obj.donor.last_name}".strip() if obj.donor else "Anonymous"
 
     def get_donor_avatar(self, obj):
-        request = self.context.get('request')
-        if obj.donor and hasattr(obj.donor, 'profile') and obj.donor.profile.avatar:
-            avatar_url = obj.donor.profile.avatar.url
-            return request.build_absolute_uri(avatar_url) if request else avatar_url
+        if obj.donor and hasattr(obj.donor, 'profile'):
+            return avatar_url(obj.donor.profile, 48, self.context.get('request'))
         return None
 
     def get_donor_id(self, obj):
@@ -1,53 +1,142 @@
+import json
+from decimal import Decimal
+
 import stripe
+from django.core.cache import cache
+from django.db import transaction
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 from django.utils.timezone import now
 from accounts.models import User
 from publications.models import Publication
-from donations.models import Donation
+from donations.models import Donation, StripeEvent
 from donations.utils import handle_donation_created
 
+STRIPE_EVENT_BATCH_SIZE = 100
+STRIPE_EVENT_MAX_ATTEMPTS = 5
+
+
 @csrf_exempt
 def stripe_webhook(request):
+    """
+    Проверяет подпись и сохраняет событие; бизнес-логика выполняется воркером
+    (process_stripe_events), поэтому Stripe сразу получает 200.
+    """
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
     webhook_secret = settings.STRIPE_WEBHOOK_SECRET
 
     try:
-        event = stripe.Webhook.construct_event(payload, sig_header, webhook_secret)
+        # Только проверка подписи и один json.loads: StripeObject из construct_event здесь не нужен
+        stripe.WebhookSignature.verify_header(payload.decode('utf-8'), sig_header, webhook_secret)
+        event = json.loads(payload)
     except (ValueError, stripe.error.SignatureVerificationError) as e:
         print("❌ Stripe webhook error:", e)
         return HttpResponse(status=400)
 
-    if event['type'] == 'payment_intent.succeeded':
-        intent = event['data']['object']
-        metadata = intent.get('metadata', {})
+    # Повторная доставка того же события упирается в уникальный event_id и игнорируется
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event['id'], type=event['type'], payload=event)],
+        ignore_conflicts=True,
+    )
+    schedule_stripe_processing()
+    return HttpResponse(status=200)
+
 
+def schedule_stripe_processing():
+    # Не больше одной постановки задачи в секунду, сколько бы событий ни пришло;
+    # периодический запуск из CELERY_BEAT_SCHEDULE подстраховывает, если брокер был недоступен
+    if not getattr(settings, 'STRIPE_EVENTS_AUTOSCHEDULE', True):
+        return
+    if cache.add('stripe-events:scheduled', 1, timeout=1):
+        from donations.tasks import process_stripe_events
         try:
-            user_id = metadata.get('user_id')
-            donor_amount = float(metadata.get('donor_amount', 0))
-            support_percentage = int(metadata.get('support_percentage', 0))
-            publication_id = metadata.get('publication_id')
-
-            donor = User.objects.get(id=user_id)
-            publication = Publication.objects.get(id=publication_id)
-
-            donation = Donation.objects.create(
-                publication=publication,
-                donor=donor,
-                donor_amount=donor_amount,
-                support_percentage=support_percentage,
-                created_at=now()
-            )
+            process_stripe_events.apply_async(countdown=1)
+        except Exception as e:
+            print("⚠️ Не удалось поставить обработку Stripe-событий в очередь:", e)
 
-            # 📬 Запускаем всю бизнес-логику (уведомления, чек и т.д.)
-            handle_donation_created(donation)
 
-            print(f"✅ Stripe donation saved and handled: {donation}")
+def handle_payment_intent_succeeded(payload):
+    intent = payload['data']['object']
+    metadata = intent.get('metadata', {})
 
-        except Exception as e:
-            print("❌ Ошибка при обработке Stripe donation:", e)
-            return HttpResponse(status=500)
+    donor = User.objects.get(id=metadata.get('user_id'))
+    publication = Publication.objects.get(id=metadata.get('publication_id'))
 
-    return HttpResponse(status=200)
+    donation, created = Donation.objects.get_or_create(
+        payment_intent_id=intent['id'],
+        defaults={
+            'publication': publication,
+            'donor': donor,
+            'donor_amount': Decimal(str(metadata.get('donor_amount', 0))),
+            'support_percentage': int(metadata.get('support_percentage', 0)),
+            'created_at': now(),
+        }
+    )
+    if created:
+        # 📬 Запускаем всю бизнес-логику (уведомления, чек и т.д.)
+        handle_donation_created(donation)
+        print(f"✅ Stripe donation saved and handled: {donation}")
+    return donation
+
+
+EVENT_HANDLERS = {
+    'payment_intent.succeeded': handle_payment_intent_succeeded,
+}
+
+
+def process_stripe_event(event):
+    """
+    Обрабатывает одно событие в собственной точке сохранения; ошибка не откатывает остальную пачку.
+    """
+    handler = EVENT_HANDLERS.get(event.type)
+    try:
+        with transaction.atomic():
+            if handler:
+                handler(event.payload)
+    except Exception as e:
+        print(f"❌ Ошибка при обработке Stripe-события {event.event_id}:", e)
+        event.attempts += 1
+        event.error = str(e)
+        event.status = 'failed' if event.attempts >= STRIPE_EVENT_MAX_ATTEMPTS else 'pending'
+        return False
+
+    event.status = 'processed'
+    event.error = ''
+    event.processed_at = now()
+    return True
+
+
+def drain_stripe_events(batch_size=STRIPE_EVENT_BATCH_SIZE):
+    """
+    Разбирает очередь событий пачками. Строки пачки заблокированы (SKIP LOCKED), поэтому
+    параллельные воркеры берут разные события; повторная обработка того же платежа
+    невозможна из-за уникального payment_intent_id. Возвращает число обработанных событий.
+    """
+    processed = 0
+    retry_later = []  # упавшие в этом запуске события повторяются при следующем
+    while True:
+        with transaction.atomic():
+            batch = list(
+                StripeEvent.objects.select_for_update(skip_locked=True)
+                .filter(status='pending').exclude(id__in=retry_later)
+                .order_by('received_at', 'id')[:batch_size]
+            )
+            if not batch:
+                break
+            for event in batch:
+                if process_stripe_event(event):
+                    processed += 1
+                else:
+                    retry_later.append(event.id)
+            StripeEvent.objects.bulk_update(batch, ['status', 'attempts', 'error', 'processed_at'])
+    return processed
+
+
+def replay_stripe_events(queryset):
+    """
+    Возвращает события в очередь. Безопасно и для уже обработанных: донат по тому же
+    PaymentIntent второй раз не создаётся.
+    """
+    return queryset.update(status='pending', attempts=0, error='', processed_at=None)
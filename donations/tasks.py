@@ -1,13 +1,14 @@
 from celery import shared_task
 from django.core.mail import EmailMessage
 from django.conf import settings
+from django.db.models import Sum
 from .models import Donation
-from .receipt import generate_donation_receipt
+from .receipt import receipt_file_name, render_donation_receipts, store_donation_receipt
 
 @shared_task
 def send_donation_email_task(donation_id):
     try:
-        donation = Donation.objects.get(id=donation_id)
+        donation = Donation.objects.select_related('donor', 'publication').get(id=donation_id)
         donor = donation.donor
 
         if donor and donor.email:
@@ -24,12 +25,94 @@ def send_donation_email_task(donation_id):
 
             email = EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [donor.email])
 
-            # Генерация PDF-чека
-            pdf_buffer = generate_donation_receipt(donation)
-            email.attach(f"donation_receipt_{donation.id}.pdf", pdf_buffer.getvalue(), "application/pdf")
+            # Чек рендерится в хранилище один раз, повторная отправка берёт готовый файл
+            if not donation.receipt:
+                store_donation_receipt(donation)
+            with donation.receipt.open('rb') as receipt:
+                email.attach(receipt_file_name(donation), receipt.read(), "application/pdf")
 
             email.send()
 
     except Donation.DoesNotExist:
         # Можно логировать ошибку или игнорировать
         pass
+
+
+@shared_task
+def render_donation_receipts_task(donation_ids):
+    donations = Donation.objects.select_related('donor', 'publication').filter(id__in=donation_ids)
+    return render_donation_receipts(donations)
+
+
+@shared_task
+def process_donation_notifications(donation_id, milestones=()):
+    """
+    Все уведомления по новому пожертвованию одной задачей: автору, донору из топ-3,
+    о достигнутых вехах (см. donations.utils.donation_milestones) и чек на почту.
+    """
+    from notifications.models import Notification
+    from notifications.utils import send_notifications
+
+    try:
+        donation = Donation.objects.select_related('publication__author', 'donor').get(id=donation_id)
+    except Donation.DoesNotExist:
+        return
+
+    publication = donation.publication
+    author = publication.author
+    donor = donation.donor
+    notifications = []  # все уведомления по донату сохраняются одним INSERT
+
+    # Уведомление автору
+    if donor and author != donor:
+        notifications.append(Notification(
+            recipient=author,
+            verb="💰 Кто-то пожертвовал на вашу публикацию",
+            target=f"{donor.first_name} отправил {donation.donor_amount} ₸",
+            url=f"/publications/{publication.id}"
+        ))
+
+    # ✅ Уведомление донору, если он входит в топ-3
+    if donor:
+        top_donors = (
+            publication.donations
+            .values('donor')
+            .annotate(total=Sum('donor_amount'))
+            .order_by('-total')[:3]
+        )
+        if any(d['donor'] == donor.id for d in top_donors):
+            notifications.append(Notification(
+                recipient=donor,
+                verb="🏆 Вы вошли в топ-донатёры публикации",
+                target=publication.title,
+                url=f"/publications/{publication.id}"
+            ))
+
+    if 'half_goal' in milestones:
+        notifications.append(Notification(
+            recipient=author,
+            verb="🎯 Ваша публикация достигла 50% цели!",
+            target=publication.title,
+            url=f"/publications/{publication.id}"
+        ))
+
+    if 'goal' in milestones:
+        notifications.append(Notification(
+            recipient=author,
+            verb="🎉 Цель сбора достигнута!",
+            target=publication.title,
+            url=f"/publications/{publication.id}"
+        ))
+
+    send_notifications(notifications)
+    send_donation_email_task(donation.id)
+
+
+@shared_task
+def process_stripe_events():
+    from .stripe_webhooks import drain_stripe_events
+
+    processed = drain_stripe_events()
+    if processed:
+        print(f"[💳] Обработано Stripe-событий: {processed}")
+    return processed
@@ -1,3 +1,167 @@
-from django.test import TestCase
+import json
+import tempfile
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+import fitz
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from notifications.models import Notification
+from publications.models import Publication
+from publications.tests import make_publication, make_user
+from .management.commands.generate_stripe_events import payment_intent_event, sign_payload
+from .models import Donation, StripeEvent
+from .stripe_webhooks import drain_stripe_events, replay_stripe_events
+from .utils import handle_donation_created
+
+
+class DonationPipelineTests(TestCase):
+    def setUp(self):
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        self.publication = make_publication(self.author, amount=1000)
+
+    def donate(self, amount):
+        donation = Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=amount)
+        with mock.patch('donations.utils.process_donation_notifications') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as queries:
+                    milestones = handle_donation_created(donation)
+        return donation, milestones, task, queries
+
+    def test_request_reads_total_once_and_defers_notifications(self):
+        donation, milestones, task, queries = self.donate(100)
+        self.assertEqual(milestones, [])
+        statements = [q['sql'] for q in queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(statements), 1)
+        task.delay.assert_called_once_with(donation.id, [])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_milestones_fire_once_when_crossed(self):
+        self.assertEqual(self.donate(400)[1], [])
+        self.assertEqual(self.donate(200)[1], ['half_goal'])
+        self.assertEqual(self.donate(100)[1], [])
+        self.assertEqual(self.donate(300)[1], ['goal'])
+        self.assertEqual(self.donate(50)[1], [])
+
+        self.publication.refresh_from_db()
+        self.assertEqual(self.publication.status, 'successful')
+        self.assertTrue(self.publication.is_archived)
+
+    def test_notification_task_fans_out_in_one_run(self):
+        from .tasks import process_donation_notifications
+
+        donation = Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=1000)
+        with mock.patch('donations.tasks.send_donation_email_task') as email:
+            process_donation_notifications(donation.id, ['half_goal', 'goal'])
+
+        verbs = set(Notification.objects.values_list('verb', flat=True))
+        self.assertEqual(verbs, {
+            "💰 Кто-то пожертвовал на вашу публикацию",
+            "🏆 Вы вошли в топ-донатёры публикации",
+            "🎯 Ваша публикация достигла 50% цели!",
+            "🎉 Цель сбора достигнута!",
+        })
+        email.assert_called_once_with(donation.id)
+        self.assertEqual(Publication.objects.get(id=self.publication.id).status, 'active')
+
+
+@override_settings(STRIPE_EVENTS_AUTOSCHEDULE=False)
+class StripeWebhookIngestionTests(TestCase):
+    def setUp(self):
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        self.publication = make_publication(self.author, amount=100000)
+
+    def deliver(self, event, secret=None):
+        payload = json.dumps(event).encode()
+        return self.client.post(
+            '/api/stripe/webhook/', data=payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=sign_payload(payload, secret or settings.STRIPE_WEBHOOK_SECRET),
+        )
+
+    def drain(self):
+        with mock.patch('donations.utils.process_donation_notifications'):
+            return drain_stripe_events(batch_size=2)
+
+    def test_webhook_only_stores_event_once(self):
+        event = payment_intent_event(self.donor.id, self.publication.id, 500)
+        self.assertEqual(self.deliver(event).status_code, 200)
+        self.assertEqual(self.deliver(event).status_code, 200)  # повтор Stripe
+
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.assertEqual(StripeEvent.objects.get().status, 'pending')
+        self.assertFalse(Donation.objects.exists())
+
+    def test_rejects_invalid_signature(self):
+        event = payment_intent_event(self.donor.id, self.publication.id, 500)
+        self.assertEqual(self.deliver(event, secret='wrong').status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_worker_creates_one_donation_per_payment_intent(self):
+        first = payment_intent_event(self.donor.id, self.publication.id, 500, intent_id='pi_1')
+        again = payment_intent_event(self.donor.id, self.publication.id, 500, intent_id='pi_1')
+        other = payment_intent_event(self.donor.id, self.publication.id, 700, intent_id='pi_2')
+        for event in (first, again, other):
+            self.deliver(event)
+
+        self.assertEqual(self.drain(), 3)
+        self.assertEqual(
+            sorted(Donation.objects.values_list('payment_intent_id', 'donor_amount')),
+            [('pi_1', 500), ('pi_2', 700)],
+        )
+        self.assertFalse(StripeEvent.objects.exclude(status='processed').exists())
+
+        # Повторная обработка всех событий не создаёт новых донатов
+        self.assertEqual(replay_stripe_events(StripeEvent.objects.all()), 3)
+        self.assertEqual(self.drain(), 3)
+        self.assertEqual(Donation.objects.count(), 2)
+
+    def test_failed_events_are_retried_then_parked(self):
+        self.deliver(payment_intent_event(999999, self.publication.id, 500))
+
+        self.assertEqual(self.drain(), 0)
+        event = StripeEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ('pending', 1))
+
+        for _ in range(4):
+            self.drain()
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('failed', 5))
+        self.assertTrue(event.error)
+
+
+class DonationReceiptTests(TestCase):
+    def setUp(self):
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        self.publication = make_publication(self.author, title="Operation for Aidana")
+
+    def pdf_text(self, data):
+        with fitz.open(stream=data, filetype='pdf') as pdf:
+            return pdf[0].get_text()
+
+    def test_receipt_contains_static_layout_and_fields(self):
+        from .receipt import generate_donation_receipt
+
+        donation = Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=1500,
+                                           support_percentage=10)
+        text = self.pdf_text(generate_donation_receipt(donation).getvalue())
+        for line in ("Demeu - Donation Successful", "Amount: 1500 KZT", f"Donation ID: {donation.id}",
+                     "Donor Name: Test User", "To: Operation for Aidana", "Thank you for your support!"):
+            self.assertIn(line, text)
+
+    def test_batch_render_streams_receipts_to_storage(self):
+        from .tasks import render_donation_receipts_task
+
+        donations = [Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=100 + i)
+                     for i in range(3)]
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            self.assertEqual(render_donation_receipts_task([d.id for d in donations]), 3)
+            for donation in Donation.objects.filter(id__in=[d.id for d in donations]):
+                with donation.receipt.open('rb') as receipt:
+                    self.assertIn(f"Donation ID: {donation.id}", self.pdf_text(receipt.read()))
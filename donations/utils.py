@@ -1,4 +1,5 @@
 import os
+from decimal import Decimal
 from io import BytesIO
 from django.core.mail import EmailMessage
 from django.conf import settings
@@ -6,26 +7,56 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+from django.db import transaction
+from django.utils import timezone
 from .models import Donation
-from donations.signals import (
-    check_publication_funding,
-    notify_goal_reached,
-    notify_half_goal_reached,
-    notify_new_donation
-)
-from donations.tasks import send_donation_email_task
+from donations.tasks import process_donation_notifications
+from publications.models import Publication, PublicationStats
 from .receipt import generate_donation_receipt
 
+MILESTONE_HALF_GOAL = 'half_goal'
+MILESTONE_GOAL = 'goal'
+
+
+def donation_milestones(previous_total, total, goal):
+    """
+    Вехи, которые пересекла сумма сбора этим пожертвованием (previous_total -> total).
+    """
+    milestones = []
+    if goal > 0 and previous_total < goal / 2 <= total:
+        milestones.append(MILESTONE_HALF_GOAL)
+    return milestones
+
+
 def handle_donation_created(donation):
     """
     Выполняет все необходимые действия после создания пожертвования.
     Используется как в обычной форме, так и при Stripe-платежах.
+
+    В запросе — только одно чтение суммы сбора (счётчик уже обновлён сигналом publications)
+    и закрытие сбора условным UPDATE; уведомления, топ донатёров и чек уходят
+    одной отложенной задачей после коммита.
     """
-    check_publication_funding(type(donation), donation, created=True)
-    notify_half_goal_reached(type(donation), donation, created=True)
-    notify_goal_reached(type(donation), donation, created=True)
-    notify_new_donation(type(donation), donation, created=True)
-    send_donation_email_task.delay(donation.id)
+    publication = donation.publication
+    with transaction.atomic():
+        total = PublicationStats.objects.filter(publication_id=publication.id).values_list(
+            'donated_total', flat=True
+        ).first() or 0
+        # Stripe-вебхук передаёт сумму как float
+        amount = Decimal(str(donation.donor_amount))
+        milestones = donation_milestones(total - amount, total, publication.amount)
+
+        if total >= publication.amount:
+            # Условие в UPDATE гарантирует одно закрытие даже при параллельных донатах
+            closed = Publication.objects.filter(id=publication.id).exclude(status='successful').update(
+                status='successful', is_archived=True, updated_at=timezone.now()
+            )
+            if closed:
+                milestones.append(MILESTONE_GOAL)
+                print(f"✅ Публикация '{publication.title}' успешно завершена и отправлена в архив.")
+
+        transaction.on_commit(lambda: process_donation_notifications.delay(donation.id, milestones))
+    return milestones
 
 
 def send_donation_email(donor, donation):
@@ -1,11 +1,11 @@
 from rest_framework import serializers
 from .models import FavoritePublication, FavoriteUser
-from publications.serializers import PublicationSerializer
+from publications.serializers import PublicationCardSerializer
 from accounts.models import User
 
 
 class FavoritePublicationSerializer(serializers.ModelSerializer):
-    publication = PublicationSerializer(read_only=True)
+    publication = PublicationCardSerializer(read_only=True)
     user = serializers.StringRelatedField(read_only=True)
 
     class Meta:
@@ -2,6 +2,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from django.db.models import Prefetch
 from .models import FavoritePublication, FavoriteUser
 from .serializers import FavoritePublicationSerializer, FavoriteUserSerializer
 from publications.models import Publication
@@ -12,8 +13,10 @@ from accounts.models import User
 @permission_classes([IsAuthenticated])
 def favorite_publication_list_create(request):
     if request.method == 'GET':
-        favorites = FavoritePublication.objects.filter(user=request.user)
-        serializer = FavoritePublicationSerializer(favorites, many=True)
+        favorites = FavoritePublication.objects.filter(user=request.user).select_related('user').prefetch_related(
+            Prefetch('publication', queryset=Publication.objects.for_card())
+        )
+        serializer = FavoritePublicationSerializer(favorites, many=True, context={'request': request})
         return Response(serializer.data)
 
     elif request.method == 'POST':
@@ -22,7 +25,7 @@ def favorite_publication_list_create(request):
             try:
                 publication = Publication.objects.get(id=publication_id)
                 favorite = FavoritePublication.objects.create(user=request.user, publication=publication)
-                serializer = FavoritePublicationSerializer(favorite)
+                serializer = FavoritePublicationSerializer(favorite, context={'request': request})
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except Publication.DoesNotExist:
                 return Response({"error": "Publication not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -1,5 +1,3 @@
-import os
-import requests
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from rest_framework.views import APIView
@@ -9,7 +7,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import GoogleAuthSerializer
 from accounts.models import User
 from profiles.models import Profile
-from django.core.files.base import ContentFile
+from profiles.avatars import schedule_avatar_download
 
 class GoogleLoginAPIView(APIView):
     permission_classes = [AllowAny]
@@ -50,13 +48,8 @@ class GoogleLoginAPIView(APIView):
                 profile, profile_created = Profile.objects.get_or_create(user=user)
 
                 if not profile.avatar and google_avatar:
-                    avatar_response = requests.get(google_avatar)
-                    if avatar_response.status_code == 200:
-                        profile.avatar.save(
-                            f"{user.pk}_google.jpg",
-                            ContentFile(avatar_response.content),
-                            save=True
-                        )
+                    # Загрузка и обработка аватара — в задаче fetch_remote_avatar, не на запросе логина
+                    schedule_avatar_download(profile.id, google_avatar)
 
                 refresh = RefreshToken.for_user(user)
 
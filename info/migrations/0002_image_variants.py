@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
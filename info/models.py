@@ -39,3 +39,5 @@ class Feedback(models.Model):
 class FeedbackImage(models.Model):
     feedback = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to=feedback_photo_upload_path, validators=[validate_file_size, validate_image_format])
+    # WEBP-варианты рядом с оригиналом (demeu/image_variants.py), строятся задачей после загрузки
+    variants = models.JSONField(default=dict, blank=True, editable=False)
@@ -1,10 +1,16 @@
 from rest_framework import serializers
+from demeu.image_variants import srcset
 from .models import Feedback, FeedbackImage
 
 class FeedbackImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = FeedbackImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'srcset']
+
+    def get_srcset(self, obj):
+        return srcset(obj, self.context.get('request'))
 
 class FeedbackSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(read_only=True)
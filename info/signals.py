@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from demeu.image_variants import delete_variants, schedule_variants
+from .models import FeedbackImage
+
+
+@receiver(post_save, sender=FeedbackImage)
+def build_image_variants(sender, instance, created, **kwargs):
+    if created:
+        from .tasks import build_feedback_image_variants
+        transaction.on_commit(lambda: schedule_variants(build_feedback_image_variants, instance.pk))
+
+
+@receiver(post_delete, sender=FeedbackImage)
+def delete_image_variants(sender, instance, **kwargs):
+    delete_variants(instance)
@@ -2,7 +2,7 @@ from celery import shared_task
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.urls import reverse
-from .models import Feedback
+from .models import Feedback, FeedbackImage
 
 
 @shared_task
@@ -48,3 +48,11 @@ def send_admin_notification_task(feedback_id):
     )
     email.attach_alternative(message_html, "text/html")
     email.send()
+
+
+@shared_task
+def build_feedback_image_variants(image_id):
+    from demeu.image_variants import build_variants
+
+    image = FeedbackImage.objects.filter(pk=image_id).first()
+    return build_variants(image) if image else None
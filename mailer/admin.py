@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutboxMessage
+
+
+@admin.action(description="Повторить отправку")
+def retry_messages(modeladmin, request, queryset):
+    queryset.exclude(status='sent').update(status='queued', attempts=0, last_error='', next_attempt_at=timezone.now())
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'from_email', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    search_fields = ('subject',)
+    list_filter = ('status',)
+    readonly_fields = ('last_error', 'created_at', 'sent_at')
+    actions = [retry_messages]
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
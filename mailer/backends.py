@@ -0,0 +1,18 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .utils import enqueue_messages
+
+
+class OutboxBackend(BaseEmailBackend):
+    """
+    EMAIL_BACKEND для всего проекта: send() / send_mail() кладут письма в OutboxMessage
+    без обращения к SMTP; доставка — settings.MAILER_DELIVERY_BACKEND в задаче send_queued_mail.
+    """
+
+    def send_messages(self, email_messages):
+        try:
+            return len(enqueue_messages(email_messages))
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
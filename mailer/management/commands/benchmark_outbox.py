@@ -0,0 +1,54 @@
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from mailer.testing import LocalSMTPServer
+
+SMTP = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+class Command(BaseCommand):
+    help = ("Measure messages per second against a local SMTP stand-in: a new connection per message "
+            "(old send()) vs one reused connection (drain_outbox). Database is not touched")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500)
+
+    def run(self, label, send, messages, smtp):
+        connections = smtp.connections
+        start = time.perf_counter()
+        send(messages)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{label:26} {len(messages) / elapsed:8.0f} msgs/s  "
+                          f"({smtp.connections - connections} connections)")
+
+    def handle(self, *args, **options):
+        messages = [
+            EmailMessage(f"Спасибо за пожертвование #{number}", "Чек во вложении", "noreply@demeu.kz",
+                         [f"donor{number}@example.com"])
+            for number in range(options['count'])
+        ]
+
+        with LocalSMTPServer() as smtp:
+            def connect():
+                return get_connection(SMTP, host=smtp.host, port=smtp.port, username='', password='',
+                                      use_tls=False, use_ssl=False, fail_silently=False)
+
+            def per_message(messages):
+                # Прежняя схема: каждое send() открывает и закрывает своё соединение
+                for message in messages:
+                    connect().send_messages([message])
+
+            def pooled(messages):
+                # Как drain_outbox: одно соединение, по письму на вызов
+                connection = connect()
+                connection.open()
+                try:
+                    for message in messages:
+                        connection.send_messages([message])
+                finally:
+                    connection.close()
+
+            self.run("connection per message", per_message, messages, smtp)
+            self.run("one pooled connection", pooled, messages, smtp)
@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    Письмо в исходящей очереди. EMAIL_BACKEND (mailer.backends.OutboxBackend) только
+    записывает сюда готовые письма, отправляет их задача send_queued_mail.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'В очереди'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Не отправлено'),
+    ]
+
+    subject = models.CharField(max_length=998)
+    body = models.TextField(blank=True)
+    content_subtype = models.CharField(max_length=20, default='plain')  # 'plain' или 'html'
+    alternatives = models.JSONField(default=list, blank=True)  # [[content, mimetype], ...]
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    attachments = models.JSONField(default=list, blank=True)  # [{filename, content (base64), mimetype}]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # Когда письмо можно брать в отправку: откладывается при ретрае и на время аренды воркером
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='outbox_queue_idx')]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,18 @@
+from celery import shared_task
+
+from .utils import drain_outbox, purge_outbox
+
+
+@shared_task
+def send_queued_mail():
+    result = drain_outbox()
+    if any(result.values()):
+        print(f"[✉️] Почта: отправлено {result['sent']}, отложено {result['retry']}, ошибок {result['failed']}")
+    return result
+
+
+@shared_task
+def purge_sent_mail():
+    result = purge_outbox()
+    print(f"[🗑] Почта: удалено отправленных {result['sent']}, не отправленных {result['failed']}")
+    return result
@@ -0,0 +1,88 @@
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Минимальный SMTP-диалог (EHLO/MAIL/RCPT/DATA/RSET/NOOP/QUIT) без TLS и авторизации.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 localhost ESMTP stand-in")
+        sender, recipients, data, in_data = None, [], [], False
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            if in_data:
+                if line.rstrip(b"\r\n") == b".":
+                    with server.lock:
+                        server.messages.append((sender, recipients, b"".join(data)))
+                    sender, recipients, data, in_data = None, [], [], False
+                    self.reply("250 OK: queued")
+                else:
+                    data.append(line[1:] if line.startswith(b"..") else line)
+                continue
+
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply("250 localhost")
+            elif verb == 'MAIL':
+                sender = command.split(':', 1)[1].strip()
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                recipient = command.split(':', 1)[1].strip().strip('<>')
+                if recipient in server.reject:
+                    self.reply("550 Mailbox unavailable")
+                else:
+                    recipients.append(recipient)
+                    self.reply("250 OK")
+            elif verb == 'DATA':
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif verb == 'RSET':
+                sender, recipients, data = None, [], []
+                self.reply("250 OK")
+            elif verb == 'NOOP':
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Локальная замена SMTP-сервера для тестов и бенчмарков: считает соединения и
+    сохраняет принятые письма; адреса из reject отклоняются с кодом 550.
+
+        with LocalSMTPServer() as smtp:
+            get_connection(..., host=smtp.host, port=smtp.port, use_tls=False)
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, reject=()):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.host, self.port = self.server_address
+        self.reject = set(reject)
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
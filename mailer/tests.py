@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives, send_mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .testing import LocalSMTPServer
+from .utils import (
+    OUTBOX_FAILED_RETENTION, OUTBOX_MAX_ATTEMPTS, OUTBOX_SENT_RETENTION, drain_outbox, purge_outbox,
+)
+
+OUTBOX = {'EMAIL_BACKEND': 'mailer.backends.OutboxBackend', 'MAILER_AUTOSCHEDULE': False}
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+SMTP = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+def smtp_settings(smtp):
+    return override_settings(MAILER_DELIVERY_BACKEND=SMTP, EMAIL_HOST=smtp.host, EMAIL_PORT=smtp.port,
+                             EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='')
+
+
+@override_settings(**OUTBOX, MAILER_DELIVERY_BACKEND=LOCMEM)
+class OutboxBackendTests(TestCase):
+    def test_send_only_enqueues(self):
+        send_mail("Account Locked", "Too many attempts", "noreply@demeu.kz", ["user@example.com"])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.get().status, 'queued')
+
+    def test_drain_delivers_messages_unchanged(self):
+        receipt = EmailMessage("Спасибо!", "Чек во вложении", "noreply@demeu.kz", ["donor@example.com"])
+        receipt.attach("donation_receipt_1.pdf", b"%PDF-1.4 binary\x00\xff", "application/pdf")
+        receipt.send()
+        feedback = EmailMultiAlternatives("Feedback", "text", "noreply@demeu.kz", ["admin@demeu.kz"],
+                                          reply_to=["user@example.com"])
+        feedback.attach_alternative("<h2>Feedback</h2>", "text/html")
+        feedback.send()
+        html = EmailMessage("Verify", "<a href='#'>Confirm</a>", "noreply@demeu.kz", ["new@example.com"])
+        html.content_subtype = "html"
+        html.send()
+
+        self.assertEqual(drain_outbox(), {'sent': 3, 'retry': 0, 'failed': 0})
+        self.assertFalse(OutboxMessage.objects.exclude(status='sent').exists())
+
+        sent = {message.subject: message for message in mail.outbox}
+        self.assertEqual(sent["Спасибо!"].attachments[0],
+                         ("donation_receipt_1.pdf", b"%PDF-1.4 binary\x00\xff", "application/pdf"))
+        self.assertEqual(sent["Feedback"].alternatives[0][0], "<h2>Feedback</h2>")
+        self.assertEqual(sent["Feedback"].reply_to, ["user@example.com"])
+        self.assertEqual(sent["Verify"].content_subtype, "html")
+        # Вложения отправленного письма в очереди больше не хранятся
+        self.assertEqual(OutboxMessage.objects.get(subject="Спасибо!").attachments, [])
+
+    def test_purge_keeps_recent_and_queued_messages(self):
+        for number in range(5):
+            EmailMessage(f"Message {number}", "body", "noreply@demeu.kz", ["user@example.com"]).send()
+        now = timezone.now()
+        ids = list(OutboxMessage.objects.order_by('id').values_list('id', flat=True))
+        OutboxMessage.objects.filter(id=ids[0]).update(status='sent', sent_at=now - OUTBOX_SENT_RETENTION * 2)
+        OutboxMessage.objects.filter(id=ids[1]).update(status='sent', sent_at=now)
+        OutboxMessage.objects.filter(id=ids[2]).update(status='failed')
+        OutboxMessage.objects.filter(id=ids[3]).update(status='failed', created_at=now - OUTBOX_FAILED_RETENTION * 2)
+
+        self.assertEqual(purge_outbox(now, batch_size=1), {'sent': 1, 'failed': 1})
+        self.assertEqual(sorted(OutboxMessage.objects.values_list('id', flat=True)), [ids[1], ids[2], ids[4]])
+
+
+@override_settings(**OUTBOX)
+class OutboxSMTPTests(TestCase):
+    def queue(self, count, **kwargs):
+        for number in range(count):
+            EmailMessage(f"Message {number}", "body", "noreply@demeu.kz", [f"user{number}@example.com"],
+                         **kwargs).send()
+
+    def test_batch_reuses_one_connection(self):
+        self.queue(25)
+        with LocalSMTPServer() as smtp, smtp_settings(smtp):
+            result = drain_outbox(batch_size=10)
+        self.assertEqual(result['sent'], 25)
+        self.assertEqual(smtp.connections, 1)
+        self.assertEqual(len(smtp.messages), 25)
+
+    def test_rejected_message_is_retried_with_backoff(self):
+        self.queue(3)
+        with LocalSMTPServer(reject={'user1@example.com'}) as smtp, smtp_settings(smtp):
+            result = drain_outbox()
+        self.assertEqual(result, {'sent': 2, 'retry': 1, 'failed': 0})
+        self.assertEqual(smtp.connections, 1)
+
+        rejected = OutboxMessage.objects.get(status='queued')
+        self.assertEqual(rejected.attempts, 1)
+        self.assertGreater(rejected.next_attempt_at, timezone.now() + timedelta(seconds=30))
+        self.assertIn("user1@example.com", rejected.last_error)
+
+    def test_unreachable_server_postpones_everything(self):
+        self.queue(3)
+        with LocalSMTPServer() as smtp:
+            port = smtp.port
+        with override_settings(MAILER_DELIVERY_BACKEND=SMTP, EMAIL_HOST='127.0.0.1', EMAIL_PORT=port,
+                               EMAIL_USE_TLS=False, EMAIL_TIMEOUT=1):
+            self.assertEqual(drain_outbox(), {'sent': 0, 'retry': 3, 'failed': 0})
+        self.assertEqual(OutboxMessage.objects.filter(status='queued', attempts=1).count(), 3)
+
+    def test_gives_up_after_max_attempts(self):
+        self.queue(1)
+        OutboxMessage.objects.update(attempts=OUTBOX_MAX_ATTEMPTS - 1)
+        with LocalSMTPServer(reject={'user0@example.com'}) as smtp, smtp_settings(smtp):
+            self.assertEqual(drain_outbox()['failed'], 1)
+        self.assertEqual(OutboxMessage.objects.get().status, 'failed')
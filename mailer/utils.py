@@ -0,0 +1,203 @@
+import base64
+import smtplib
+from datetime import timedelta
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_RETRY_DELAY = timedelta(minutes=1)  # 1, 2, 4, 8... минут, не больше OUTBOX_MAX_RETRY_DELAY
+OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+# Аренда пачки воркером: если он упал посреди отправки, письма вернутся в очередь после неё
+OUTBOX_LEASE = timedelta(minutes=10)
+# Сколько хранятся отправленные и не отправленные письма (purge_outbox). Вложения отправленных
+# писем (чеки, сертификаты) стираются сразу после отправки
+OUTBOX_SENT_RETENTION = timedelta(days=30)
+OUTBOX_FAILED_RETENTION = timedelta(days=90)
+OUTBOX_PURGE_BATCH_SIZE = 1000
+
+
+def _serialize_attachment(attachment):
+    if isinstance(attachment, MIMEBase):
+        filename, content, mimetype = attachment.get_filename(), attachment.get_payload(decode=True), \
+            attachment.get_content_type()
+    else:
+        filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return {'filename': filename, 'content': base64.b64encode(content).decode('ascii'), 'mimetype': mimetype}
+
+
+def serialize_email(message):
+    return OutboxMessage(
+        subject=message.subject,
+        body=message.body,
+        content_subtype=message.content_subtype,
+        alternatives=[[content, mimetype] for content, mimetype in getattr(message, 'alternatives', [])],
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+        attachments=[_serialize_attachment(attachment) for attachment in message.attachments],
+    )
+
+
+def build_email(outbox_message, connection=None):
+    email = EmailMultiAlternatives(
+        subject=outbox_message.subject,
+        body=outbox_message.body,
+        from_email=outbox_message.from_email,
+        to=outbox_message.to,
+        cc=outbox_message.cc,
+        bcc=outbox_message.bcc,
+        reply_to=outbox_message.reply_to,
+        headers=outbox_message.headers,
+        alternatives=[tuple(alternative) for alternative in outbox_message.alternatives],
+        connection=connection,
+    )
+    email.content_subtype = outbox_message.content_subtype
+    for attachment in outbox_message.attachments:
+        email.attach(attachment['filename'], base64.b64decode(attachment['content']), attachment['mimetype'])
+    return email
+
+
+def enqueue_messages(email_messages):
+    """
+    Сохраняет письма в очередь одним INSERT и после коммита ставит отправку.
+    """
+    queued = OutboxMessage.objects.bulk_create(
+        [serialize_email(message) for message in email_messages if message.recipients()]
+    )
+    if queued:
+        transaction.on_commit(schedule_outbox_drain)
+    return queued
+
+
+def schedule_outbox_drain():
+    # Не чаще раза в секунду; периодический запуск из CELERY_BEAT_SCHEDULE подстраховывает
+    if not getattr(settings, 'MAILER_AUTOSCHEDULE', True):
+        return
+    if cache.add('mailer:scheduled', 1, timeout=1):
+        from .tasks import send_queued_mail
+        try:
+            send_queued_mail.apply_async(countdown=1)
+        except Exception as e:
+            print("⚠️ Не удалось поставить отправку почты в очередь:", e)
+
+
+def retry_delay(attempts):
+    return min(OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), OUTBOX_MAX_RETRY_DELAY)
+
+
+def claim_batch(batch_size, now):
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+        )
+        OutboxMessage.objects.filter(id__in=ids).update(next_attempt_at=now + OUTBOX_LEASE)
+    return list(OutboxMessage.objects.filter(id__in=ids).order_by('id'))
+
+
+def _connection_lost(error):
+    # SMTPException — подкласс OSError, но отказ по конкретному письму соединение не рвёт
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def _postpone(message, error, result):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+        result['failed'] += 1
+    else:
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+        result['retry'] += 1
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, connection=None):
+    """
+    Отправляет очередь пачками через одно открытое соединение settings.MAILER_DELIVERY_BACKEND.
+    Неудачные письма откладываются с экспоненциальной задержкой, после OUTBOX_MAX_ATTEMPTS
+    попыток помечаются 'failed'. Возвращает счётчики {'sent', 'retry', 'failed'}.
+    """
+    connection = connection or get_connection(settings.MAILER_DELIVERY_BACKEND, fail_silently=False)
+    result = {'sent': 0, 'retry': 0, 'failed': 0}
+    connection_error = None
+
+    try:
+        connection.open()
+    except Exception as e:
+        connection_error = e
+
+    try:
+        while True:
+            batch = claim_batch(batch_size, timezone.now())
+            if not batch:
+                break
+            for message in batch:
+                if connection_error is not None:
+                    # Сервер недоступен — вся пачка уходит на ретрай без попыток отправки
+                    _postpone(message, connection_error, result)
+                    continue
+                try:
+                    # По одному письму на вызов: соединение уже открыто и переиспользуется,
+                    # зато ошибка одного письма не теряет статус остальных в пачке
+                    connection.send_messages([build_email(message)])
+                except Exception as e:
+                    _postpone(message, e, result)
+                    if _connection_lost(e):
+                        # Соединение потеряно — пробуем открыть новое для оставшихся писем
+                        connection.close()
+                        try:
+                            connection.open()
+                        except Exception as reconnect_error:
+                            connection_error = reconnect_error
+                else:
+                    message.status = 'sent'
+                    message.sent_at = timezone.now()
+                    message.last_error = ''
+                    # base64 вложений больше не нужен, а строка хранится до purge_outbox
+                    message.attachments = []
+                    result['sent'] += 1
+            OutboxMessage.objects.bulk_update(
+                batch, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at', 'attachments']
+            )
+            if connection_error is not None:
+                break
+    finally:
+        connection.close()
+    return result
+
+
+def purge_outbox(now=None, batch_size=OUTBOX_PURGE_BATCH_SIZE):
+    """
+    Удаляет отправленные письма старше OUTBOX_SENT_RETENTION и не отправленные старше
+    OUTBOX_FAILED_RETENTION пачками по batch_size. Возвращает {'sent', 'failed'} — сколько удалено.
+    """
+    now = now or timezone.now()
+    expired = {
+        'sent': OutboxMessage.objects.filter(status='sent', sent_at__lt=now - OUTBOX_SENT_RETENTION),
+        'failed': OutboxMessage.objects.filter(status='failed', created_at__lt=now - OUTBOX_FAILED_RETENTION),
+    }
+    result = {}
+    for status, queryset in expired.items():
+        result[status] = 0
+        while True:
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            result[status] += OutboxMessage.objects.filter(id__in=ids).delete()[0]
+    return result
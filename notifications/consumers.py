@@ -1,5 +1,7 @@
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
+from .presence import PRESENCE_HEARTBEAT, socket_alive, socket_closed, socket_opened
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -10,14 +12,35 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             self.group_name = f"user_{self.user.id}"
             await self.channel_layer.group_add(self.group_name, self.channel_name)
             await self.accept()
+            await socket_opened(self.user.id)
+            self.heartbeat = asyncio.create_task(self.keep_presence())
 
     async def disconnect(self, close_code):
         if not self.user.is_anonymous:
+            heartbeat = getattr(self, 'heartbeat', None)
+            if heartbeat:
+                heartbeat.cancel()
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await socket_closed(self.user.id)
+
+    async def keep_presence(self):
+        # Сокет может жить дольше PRESENCE_TTL — без продления пользователь выпал бы из онлайна
+        while True:
+            await asyncio.sleep(PRESENCE_HEARTBEAT)
+            try:
+                await socket_alive(self.user.id)
+            except Exception as e:
+                print("⚠️ Не удалось продлить присутствие сокета:", e)
 
     async def receive(self, text_data):
         # не обязательно, если клиент ничего не отправляет
         pass
 
     async def send_notification(self, event):
-        await self.send(text_data=json.dumps(event['content']))
+        content = event['content']
+        if 'unread_count' in event:
+            content = dict(content, unread_count=event['unread_count'])
+        await self.send(text_data=json.dumps(content))
+
+    async def send_unread_count(self, event):
+        await self.send(text_data=json.dumps({'unread_count': event['unread_count']}))
@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from .models import Notification, NotificationCounter
+
+
+def bump_unread(deltas):
+    """
+    Прибавляет к счётчикам непрочитанных {user_id: delta} одним UPDATE на каждое
+    различное значение delta (при рассылке — обычно одно). Недостающие строки создаются.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+
+    for delta, user_ids in by_delta.items():
+        counters = NotificationCounter.objects.filter(user_id__in=user_ids)
+        changes = {'unread': Greatest(F('unread') + delta, Value(0))}
+        if counters.update(**changes) == len(user_ids):
+            continue
+        existing = set(counters.values_list('user_id', flat=True))
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        # Строку могли создать параллельно: вставка игнорирует конфликт, прибавка идёт вторым UPDATE
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in missing], ignore_conflicts=True
+        )
+        NotificationCounter.objects.filter(user_id__in=missing).update(**changes)
+
+
+def unread_counts(user_ids):
+    return dict(NotificationCounter.objects.filter(user_id__in=user_ids).values_list('user_id', 'unread'))
+
+
+def unread_count(user_id):
+    return unread_counts([user_id]).get(user_id, 0)
+
+
+def rebuild_unread_counts(user_ids=None, batch_size=1000):
+    """
+    Пересчитывает счётчики по таблице уведомлений. Возвращает число обновлённых пользователей.
+    """
+    notifications = Notification.objects.filter(is_read=False)
+    counters = NotificationCounter.objects.all()
+    if user_ids is not None:
+        notifications = notifications.filter(recipient__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        counters.update(unread=0)
+        rows = notifications.values('recipient').annotate(unread=Count('id')).values_list('recipient', 'unread')
+        updated = NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id, unread=unread) for user_id, unread in rows],
+            batch_size=batch_size, update_conflicts=True, unique_fields=['user'], update_fields=['unread'],
+        )
+    return len(updated)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from notifications.counters import rebuild_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild unread notification counters (NotificationCounter) from the notifications table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="User ids (all users if omitted)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ids = options['ids'] or None
+        count = rebuild_unread_counts(ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt unread counters for {count} users."))
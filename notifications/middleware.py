@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
 from urllib.parse import parse_qs
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
@@ -7,24 +11,191 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-@database_sync_to_async
-def get_user(token):
-    try:
-        access_token = AccessToken(token)
-        user_id = access_token['user_id']
-        return User.objects.get(id=user_id)
-    except Exception:
-        return None
+# Пользователи в кэше процесса: сохранение User сбрасывает запись сигналом (notifications/signals.py),
+# но только в своём процессе — изменения из других процессов видны не позже чем через TTL
+USER_CACHE_TTL = 30
+USER_CACHE_SIZE = 10000
+# Промахи кэша за это окно загружаются одним запросом
+USER_BATCH_WINDOW = 0.01
+# Не больше CONNECT_RATE подключений с походом в БД в секунду (с запасом CONNECT_BURST);
+# сверх этого рукопожатие отклоняется, клиент переподключается позже
+CONNECT_RATE = 200
+CONNECT_BURST = 400
+STATS_LOG_EVERY = 1000
+
+USER_FIELDS = ('id', 'email', 'first_name', 'last_name')
+
+
+class SocketUser:
+    """
+    Лёгкая замена User в scope вебсокета: только поля, нужные потребителям.
+    """
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, id, email, first_name, last_name):
+        self.id = self.pk = id
+        self.email = email
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def __repr__(self):
+        return f"<SocketUser {self.id} {self.email}>"
+
+
+class UserCache:
+    """
+    LRU user_id -> SocketUser со сроком жизни записей. Потокобезопасен: сбрасывается
+    из сигналов, которые могут прийти из потоков database_sync_to_async.
+    """
+
+    def __init__(self, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RateGuard:
+    """
+    Token bucket: allow() возвращает False, если лимит rate в секунду (с запасом burst) исчерпан.
+    """
+
+    def __init__(self, rate=CONNECT_RATE, burst=CONNECT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def allow(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+user_cache = UserCache()
+
+
+def load_users(user_ids):
+    users = User.objects.filter(id__in=user_ids, is_active=True).values_list(*USER_FIELDS)
+    return {row[0]: SocketUser(*row) for row in users}
+
 
 class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Аутентификация вебсокета по ?token=<JWT>. Пользователь берётся из user_cache;
+    одновременные промахи (шторм переподключений после деплоя) склеиваются в один
+    запрос к БД за USER_BATCH_WINDOW, а их частота ограничена RateGuard.
+    """
+
+    def __init__(self, inner, cache=None, guard=None):
+        super().__init__(inner)
+        self.cache = cache or user_cache
+        self.guard = guard or RateGuard()
+        self._pending = {}  # user_id -> Future текущей пачки
+        self.stats = {'connects': 0, 'hits': 0, 'misses': 0, 'queries': 0, 'rejected': 0,
+                      'auth_seconds': 0.0, 'max_auth_seconds': 0.0}
+
+    def stats_snapshot(self):
+        stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['avg_auth_ms'] = stats['auth_seconds'] / stats['connects'] * 1000 if stats['connects'] else 0.0
+        return stats
+
+    async def _flush(self):
+        await asyncio.sleep(USER_BATCH_WINDOW)
+        pending, self._pending = self._pending, {}
+        self.stats['queries'] += 1
+        try:
+            users = await database_sync_to_async(load_users)(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                future.set_exception(e)
+            return
+        for user_id, future in pending.items():
+            user = users.get(user_id)
+            if user is not None:
+                self.cache.set(user_id, user)
+            future.set_result(user)
+
+    async def get_user(self, user_id):
+        user = self.cache.get(user_id)
+        if user is not None:
+            self.stats['hits'] += 1
+            return user
+        self.stats['misses'] += 1
+
+        future = self._pending.get(user_id)
+        if future is None:
+            if not self.guard.allow():
+                self.stats['rejected'] += 1
+                return None
+            if not self._pending:
+                self._flush_task = asyncio.ensure_future(self._flush())
+            future = self._pending[user_id] = asyncio.get_running_loop().create_future()
+        return await asyncio.shield(future)
+
+    async def authenticate(self, token):
+        try:
+            user_id = AccessToken(token)['user_id']
+        except Exception:
+            return AnonymousUser()
+        try:
+            user = await self.get_user(user_id)
+        except Exception as e:
+            print("❌ Ошибка загрузки пользователя вебсокета:", e)
+            return AnonymousUser()
+        return user or AnonymousUser()
+
     async def __call__(self, scope, receive, send):
         query_string = scope["query_string"].decode()
         query_params = parse_qs(query_string)
         token = query_params.get("token")
 
         if token:
-            user = await get_user(token[0])
-            scope["user"] = user or AnonymousUser()
+            started = time.perf_counter()
+            scope["user"] = await self.authenticate(token[0])
+            elapsed = time.perf_counter() - started
+            self.stats['connects'] += 1
+            self.stats['auth_seconds'] += elapsed
+            self.stats['max_auth_seconds'] = max(self.stats['max_auth_seconds'], elapsed)
+            if self.stats['connects'] % STATS_LOG_EVERY == 0:
+                stats = self.stats_snapshot()
+                print(f"[🔌] WS-аутентификация: {stats['connects']} подключений, "
+                      f"hit rate {stats['hit_rate']:.0%}, запросов к БД {stats['queries']}, "
+                      f"отклонено {stats['rejected']}, среднее {stats['avg_auth_ms']:.2f} мс")
         else:
             scope["user"] = AnonymousUser()
 
@@ -7,10 +7,32 @@ class Notification(models.Model):
     target = models.CharField(max_length=255, null=True, blank=True)  # Например: "Publication: XYZ"
     url = models.URLField(null=True, blank=True)  # ссылка на объект (пост, профиль и т.д.)
     is_read = models.BooleanField(default=False)
+    count = models.PositiveIntegerField(default=1)  # сколько однотипных событий свёрнуто в строку (retention.py)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Страницы списка уведомлений (NotificationCursorPagination)
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_inbox_idx'),
+            # ?unread=true: только непрочитанные, без прохода по всей истории
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_unread_idx',
+                         condition=models.Q(is_read=False)),
+        ]
 
     def __str__(self):
         return f"{self.recipient.email} - {self.verb}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Денормализованное число непрочитанных уведомлений пользователя. Обновляется
+    в notifications/counters.py, пересобирается командой rebuild_unread_counts.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+                                related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Unread notifications of user {self.user_id}: {self.unread}"
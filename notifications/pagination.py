@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NotificationCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация списка уведомлений по индексу (recipient, -created_at, -id):
+    стоимость страницы не зависит от длины истории пользователя.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
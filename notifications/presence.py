@@ -0,0 +1,52 @@
+from django.core.cache import cache
+
+# Счётчик открытых сокетов пользователя живёт в общем кэше. Пока сокет открыт, консьюмер
+# продлевает ключ каждые PRESENCE_HEARTBEAT секунд (socket_alive); срок жизни лишь убирает
+# счётчики процессов daphne, упавших без disconnect. Лишняя публикация в пустую группу
+# безопасна, пропущенная — нет.
+PRESENCE_TTL = 15 * 60
+PRESENCE_HEARTBEAT = 5 * 60
+
+
+def presence_key(user_id):
+    return f"notifications:presence:{user_id}"
+
+
+async def socket_opened(user_id):
+    key = presence_key(user_id)
+    await cache.aadd(key, 0, PRESENCE_TTL)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        # Ключ истёк между add и incr
+        await cache.aset(key, 1, PRESENCE_TTL)
+    await cache.atouch(key, PRESENCE_TTL)
+
+
+async def socket_alive(user_id):
+    """
+    Продлевает присутствие открытого сокета. Если ключ истёк или вытеснен из кэша (или счётчик
+    ушёл в ноль из-за этого), сокет снова отмечается: лучше лишняя публикация, чем пропущенная.
+    """
+    key = presence_key(user_id)
+    count = await cache.aget(key)
+    if count is None or count < 1:
+        await cache.aset(key, 1, PRESENCE_TTL)
+    else:
+        await cache.atouch(key, PRESENCE_TTL)
+
+
+async def socket_closed(user_id):
+    try:
+        await cache.adecr(presence_key(user_id))
+    except ValueError:
+        pass
+
+
+def online_user_ids(user_ids):
+    """
+    Из переданных id — те, у кого сейчас открыт хотя бы один сокет; один запрос к кэшу.
+    """
+    keys = {presence_key(user_id): user_id for user_id in set(user_ids)}
+    counts = cache.get_many(keys)
+    return {keys[key] for key, count in counts.items() if count > 0}
@@ -0,0 +1,122 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Func, IntegerField, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Notification
+
+# Прочитанные уведомления хранятся столько, если для verb не задано иное в NOTIFICATION_RETENTION
+DEFAULT_RETENTION = timedelta(days=90)
+# Сворачиваются только прочитанные уведомления старше этого срока: свежие остаются как есть
+COMPACT_AFTER = timedelta(days=1)
+# Оценка места строки кроме текстовых полей: заголовок кортежа и указатель (28), id, recipient_id,
+# created_at, is_read, count (29) и записи в трёх индексах (~48)
+ROW_OVERHEAD_BYTES = 105
+
+
+class OctetLength(Func):
+    function = 'OCTET_LENGTH'
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='LENGTH(CAST(%(expressions)s AS BLOB))', **extra_context)
+
+
+def estimate_bytes(queryset):
+    text = Coalesce(OctetLength('verb'), Value(0)) + Coalesce(OctetLength('target'), Value(0)) \
+        + Coalesce(OctetLength('url'), Value(0))
+    totals = queryset.aggregate(rows=Count('id'), text=Sum(text))
+    return totals['rows'] * ROW_OVERHEAD_BYTES + (totals['text'] or 0)
+
+
+def retention_windows():
+    windows = dict(getattr(settings, 'NOTIFICATION_RETENTION', {}))
+    default = windows.pop('default', DEFAULT_RETENTION)
+    return windows, default
+
+
+def expired_notifications(now):
+    """
+    Прочитанные уведомления старше окна хранения своего verb.
+    """
+    windows, default = retention_windows()
+    condition = Q(created_at__lt=now - default) & ~Q(verb__in=list(windows))
+    for verb, window in windows.items():
+        condition |= Q(verb=verb, created_at__lt=now - window)
+    return Notification.objects.filter(condition, is_read=True)
+
+
+def purge_read(now, batch_size=1000):
+    """
+    Удаляет истёкшие прочитанные уведомления пачками по batch_size, каждая пачка —
+    отдельная короткая транзакция. Возвращает (строк, оценка байт).
+    """
+    deleted = reclaimed = 0
+    queryset = expired_notifications(now).order_by('id')
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        chunk = Notification.objects.filter(id__in=ids)
+        with transaction.atomic():
+            reclaimed += estimate_bytes(chunk)
+            deleted += chunk.delete()[0]
+    return deleted, reclaimed
+
+
+def compact_repeated(now, batch_size=1000):
+    """
+    Сворачивает прочитанные однотипные уведомления (verb из NOTIFICATION_COMPACT_VERBS,
+    один получатель и одна ссылка) в одну строку — самую свежую, с суммарным count.
+    Получатели обрабатываются пачками по batch_size. Возвращает (удалено строк, оценка байт).
+    """
+    verbs = list(getattr(settings, 'NOTIFICATION_COMPACT_VERBS', ()))
+    if not verbs:
+        return 0, 0
+    eligible = Notification.objects.filter(is_read=True, verb__in=verbs, created_at__lt=now - COMPACT_AFTER)
+    recipients = eligible.order_by('recipient').values_list('recipient', flat=True).distinct()
+
+    deleted = reclaimed = 0
+    last_recipient = 0
+    while True:
+        chunk = list(recipients.filter(recipient__gt=last_recipient)[:batch_size])
+        if not chunk:
+            break
+        last_recipient = chunk[-1]
+        rows = eligible.filter(recipient__in=chunk)
+        with transaction.atomic():
+            groups = list(
+                rows.values('recipient', 'verb', 'url').order_by()
+                .annotate(rows=Count('id'), total=Sum('count'), keep=Max('id'))
+            )
+            keep = [group['keep'] for group in groups]
+            collapsed = rows.exclude(id__in=keep)
+            reclaimed += estimate_bytes(collapsed)
+            deleted += collapsed.delete()[0]
+            Notification.objects.bulk_update([
+                Notification(id=group['keep'], count=group['total']) for group in groups if group['rows'] > 1
+            ], ['count'], batch_size=batch_size)
+    return deleted, reclaimed
+
+
+def _timed(phases, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    rows, reclaimed = func(*args, **kwargs)
+    phases[name] = {'rows': rows, 'bytes': reclaimed, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def run_retention(now=None, batch_size=1000):
+    """
+    Сначала удаляет истёкшие прочитанные уведомления, затем сворачивает повторы среди оставшихся.
+    Возвращает {фаза: {'rows': ..., 'bytes': ..., 'seconds': ...}}; bytes — оценка освобождённого
+    места (место в файлах таблицы переиспользуется после VACUUM/autovacuum).
+    """
+    now = now or timezone.now()
+    phases = {}
+    _timed(phases, 'purged', purge_read, now, batch_size)
+    _timed(phases, 'compacted', compact_repeated, now, batch_size)
+    return phases
@@ -4,4 +4,21 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['id', 'verb', 'target', 'url', 'is_read', 'created_at']
+        fields = ['id', 'verb', 'target', 'url', 'is_read', 'count', 'created_at']
+
+    def to_representation(self, instance):
+        # Один формат и для REST, и для сокета (notifications/utils.py)
+        return notification_payload(instance)
+
+
+def notification_payload(notification):
+    """
+    Представление уведомления без полей DRF: при рассылке тысячам получателей
+    сериализатор был основной стоимостью на строку. Поля — NotificationSerializer.Meta.fields.
+    """
+    payload = {field: getattr(notification, field) for field in NotificationSerializer.Meta.fields}
+    created_at = notification.created_at.isoformat()
+    if created_at.endswith('+00:00'):
+        created_at = created_at[:-6] + 'Z'
+    payload['created_at'] = created_at
+    return payload
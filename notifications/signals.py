@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .middleware import user_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_socket_user(sender, instance, **kwargs):
+    # Смена имени, email или деактивация должны быть видны следующему подключению
+    user_cache.invalidate(instance.pk)
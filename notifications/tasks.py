@@ -0,0 +1,16 @@
+from celery import shared_task
+from .retention import run_retention
+
+
+PHASE_ICONS = {'purged': '🗑', 'compacted': '🗜'}
+
+
+@shared_task
+def purge_notifications():
+    print("🕒 Циклическая задача запущена: очистка уведомлений")
+
+    phases = run_retention()
+    for name, phase in phases.items():
+        print(f"[{PHASE_ICONS[name]}] {name}: {phase['rows']} уведомлений, ~{phase['bytes'] / 1024:.1f} КБ "
+              f"за {phase['seconds']:.3f} с")
+    return phases
@@ -0,0 +1,257 @@
+import asyncio
+import socketserver
+import threading
+import time
+
+
+class _RedisHandler(socketserver.StreamRequestHandler):
+    """
+    Подмножество протокола Redis (RESP2), которым пользуются RedisPubSubChannelLayer
+    и django.core.cache.backends.redis: pub/sub и строковые ключи со сроком жизни.
+    """
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.subscriptions = set()
+
+    def encode(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, (list, tuple)):
+            return b"*%d\r\n" % len(value) + b"".join(self.encode(item) for item in value)
+        if isinstance(value, str):
+            value = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def send(self, data):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        try:
+            while True:
+                command = self.read_command()
+                if command is None:
+                    break
+                name = command[0].decode().upper()
+                handler = getattr(self, f"cmd_{name.lower()}", None)
+                if handler is None:
+                    self.send(b"-ERR unknown command '%s'\r\n" % name.encode())
+                    continue
+                reply = handler(*command[1:])
+                if reply is not None:
+                    self.send(reply)
+        finally:
+            with server.lock:
+                for channel in self.subscriptions:
+                    server.subscribers[channel].discard(self)
+
+    # Служебные команды
+    def cmd_ping(self, *args):
+        return b"+PONG\r\n"
+
+    def cmd_client(self, *args):
+        return b"+OK\r\n"
+
+    def cmd_select(self, db):
+        return b"+OK\r\n"
+
+    # Pub/sub
+    def cmd_subscribe(self, *channels):
+        replies = []
+        with self.server.lock:
+            for channel in channels:
+                self.subscriptions.add(channel)
+                self.server.subscribers.setdefault(channel, set()).add(self)
+                replies.append(self.encode([b"subscribe", channel, len(self.subscriptions)]))
+        return b"".join(replies)
+
+    def cmd_unsubscribe(self, *channels):
+        replies = []
+        with self.server.lock:
+            for channel in channels or list(self.subscriptions):
+                self.subscriptions.discard(channel)
+                self.server.subscribers.get(channel, set()).discard(self)
+                replies.append(self.encode([b"unsubscribe", channel, len(self.subscriptions)]))
+        return b"".join(replies)
+
+    def cmd_publish(self, channel, message):
+        with self.server.lock:
+            self.server.published.append(channel)
+            receivers = list(self.server.subscribers.get(channel, ()))
+        for receiver in receivers:
+            receiver.send(self.encode([b"message", channel, message]))
+        return self.encode(len(receivers))
+
+    # Ключи
+    def cmd_get(self, key):
+        return self.encode(self.server.get(key))
+
+    def cmd_mget(self, *keys):
+        return self.encode([self.server.get(key) for key in keys])
+
+    def cmd_set(self, key, value, *options):
+        options = [option.decode().upper() if isinstance(option, bytes) else option for option in options]
+        expires_at = None
+        if 'EX' in options:
+            expires_at = time.monotonic() + int(options[options.index('EX') + 1])
+        if 'PX' in options:
+            expires_at = time.monotonic() + int(options[options.index('PX') + 1]) / 1000
+        with self.server.lock:
+            exists = self.server.get(key) is not None
+            if ('NX' in options and exists) or ('XX' in options and not exists):
+                return b"$-1\r\n"
+            self.server.data[key] = (value, expires_at)
+        return b"+OK\r\n"
+
+    def cmd_incrby(self, key, delta):
+        with self.server.lock:
+            value = int(self.server.get(key) or 0) + int(delta)
+            _, expires_at = self.server.data.get(key, (None, None))
+            self.server.data[key] = (str(value).encode(), expires_at)
+        return self.encode(value)
+
+    def cmd_decrby(self, key, delta):
+        return self.cmd_incrby(key, -int(delta))
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, 1)
+
+    def cmd_decr(self, key):
+        return self.cmd_incrby(key, -1)
+
+    def cmd_exists(self, *keys):
+        return self.encode(sum(self.server.get(key) is not None for key in keys))
+
+    def cmd_del(self, *keys):
+        with self.server.lock:
+            return self.encode(sum(self.server.data.pop(key, None) is not None for key in keys))
+
+    def cmd_expire(self, key, seconds):
+        with self.server.lock:
+            if self.server.get(key) is None:
+                return self.encode(0)
+            self.server.data[key] = (self.server.data[key][0], time.monotonic() + int(seconds))
+        return self.encode(1)
+
+    def cmd_persist(self, key):
+        with self.server.lock:
+            if self.server.get(key) is None:
+                return self.encode(0)
+            self.server.data[key] = (self.server.data[key][0], None)
+        return self.encode(1)
+
+    def cmd_flushdb(self, *args):
+        with self.server.lock:
+            self.server.data.clear()
+        return b"+OK\r\n"
+
+
+class LocalRedisServer(socketserver.ThreadingTCPServer):
+    """
+    Локальная замена Redis для тестов слоя каналов и кэша присутствия: считает
+    соединения и публикации (published — имена каналов в порядке PUBLISH).
+
+        with LocalRedisServer() as redis:
+            CHANNEL_LAYERS = {'default': {..., 'CONFIG': {'hosts': [redis.url]}}}
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _RedisHandler)
+        self.host, self.port = self.server_address
+        self.url = f"redis://{self.host}:{self.port}/0"
+        self.data = {}
+        self.subscribers = {}
+        self.published = []
+        self.connections = 0
+        self.lock = threading.RLock()
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return value
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def redis_settings(*servers):
+    """
+    Настройки слоя каналов и кэша поверх LocalRedisServer — для override_settings
+    и для процессов-воркеров в тестах.
+    """
+    return {
+        'CHANNEL_LAYERS': {
+            'default': {
+                'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+                'CONFIG': {'hosts': [server.url for server in servers]},
+            },
+        },
+        'CACHES': {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'LOCATION': servers[0].url,
+            },
+        },
+        'NOTIFICATIONS_TRACK_PRESENCE': True,
+    }
+
+
+def run_socket_worker(overrides, user_id, connected, received, timeout=10):
+    """
+    Отдельный ASGI-процесс с одним открытым сокетом уведомлений пользователя user_id:
+    сообщает о подключении через connected (Event) и кладёт первое полученное
+    уведомление в received (Queue). Запускается через multiprocessing (spawn).
+    """
+    import django
+    django.setup()
+
+    from django.conf import settings
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+    from channels.testing import WebsocketCommunicator
+    from accounts.models import User
+    from notifications.consumers import NotificationConsumer
+
+    async def main():
+        communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), "/ws/notifications/")
+        communicator.scope['user'] = User(id=user_id)
+        accepted, _ = await communicator.connect(timeout=timeout)
+        connected.set()
+        try:
+            received.put(await communicator.receive_json_from(timeout=timeout) if accepted else None)
+        finally:
+            await communicator.disconnect()
+
+    asyncio.run(main())
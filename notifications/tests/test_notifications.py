@@ -0,0 +1,293 @@
+import asyncio
+import multiprocessing
+from unittest import mock
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from publications.tasks import notify_expiring_publications
+from publications.tests import make_publication
+from notifications.counters import rebuild_unread_counts, unread_count
+from notifications.models import Notification, NotificationCounter
+from notifications.middleware import JWTAuthMiddleware, RateGuard, UserCache
+from notifications.presence import online_user_ids, presence_key, socket_alive, socket_closed, socket_opened
+from notifications.retention import run_retention
+from notifications.serializers import NotificationSerializer
+from notifications.utils import notify_many
+from .redis_server import LocalRedisServer, redis_settings, run_socket_worker
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def make_users(count, counters=True):
+    users = User.objects.bulk_create([
+        User(email=f"user{number}@example.com", first_name="Test", last_name="User", password="!")
+        for number in range(count)
+    ])
+    if counters:
+        NotificationCounter.objects.bulk_create([NotificationCounter(user=user) for user in users])
+    return users
+
+
+def statements(queries):
+    return [q['sql'] for q in queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class NotifyManyTests(TestCase):
+    def test_one_insert_and_serializer_compatible_payload(self):
+        users = make_users(3)
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"user_{users[1].id}", channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                notifications = notify_many(users, "📢 Новости", target="Demeu", url="http://example.com/news")
+            # INSERT уведомлений и один UPDATE счётчиков
+            self.assertEqual(len(statements(queries)), 2)
+
+        self.assertEqual(Notification.objects.filter(verb="📢 Новости").count(), 3)
+        message = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(message['type'], "send_notification")
+        self.assertEqual(message['content'], NotificationSerializer(notifications[1]).data)
+        # Тот же результат, что у полей DRF по Meta.fields
+        serializer = NotificationSerializer(notifications[1])
+        self.assertEqual(message['content'], serializers.ModelSerializer.to_representation(serializer, notifications[1]))
+        self.assertEqual(message['unread_count'], 1)
+
+    def test_expiry_reminders_use_one_select_and_one_insert(self):
+        authors = make_users(6)
+        now = timezone.now()
+        for author in authors[:4]:
+            make_publication(author, expires_at=now + timedelta(days=1))
+        for author in authors[4:]:
+            make_publication(author, expires_at=now)
+        make_publication(authors[0], expires_at=now + timedelta(days=5))
+
+        with CaptureQueriesContext(connection) as queries:
+            notify_expiring_publications()
+        # SELECT публикаций, INSERT уведомлений, UPDATE счётчиков
+        self.assertEqual(len(statements(queries)), 3)
+
+        self.assertEqual(Notification.objects.filter(verb__startswith="⏰").count(), 4)
+        self.assertEqual(Notification.objects.filter(verb__startswith="❗").count(), 2)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class NotificationInboxTests(TestCase):
+    def setUp(self):
+        self.user, self.other = make_users(2, counters=False)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counter_follows_notify_and_read(self):
+        notify_many([self.user, self.other], "📢 Новости")
+        notify_many([self.user], "💬 Комментарий")
+        self.assertEqual(self.client.get('/notifications/unread-count/').data, {'unread_count': 2})
+
+        notification = self.user.notifications.first()
+        self.client.post(f'/notifications/{notification.id}/mark-as-read/')
+        self.client.post(f'/notifications/{notification.id}/mark-as-read/')  # повторно — без изменений
+        self.assertEqual(unread_count(self.user.id), 1)
+        self.assertEqual(self.client.post('/notifications/0/mark-as-read/').status_code, 404)
+
+        self.client.post('/notifications/mark-all-as-read/')
+        self.assertEqual(unread_count(self.user.id), 0)
+        self.assertEqual(unread_count(self.other.id), 1)
+
+        notify_many([self.user], "💰 Пожертвование")
+        self.client.delete('/notifications/delete-all/')
+        self.assertEqual(unread_count(self.user.id), 0)
+
+    def test_rebuild_matches_incremental_counters(self):
+        notify_many([self.user, self.other], "📢 Новости")
+        notify_many([self.user], "💬 Комментарий")
+        Notification.objects.filter(recipient=self.other).update(is_read=True)  # в обход счётчика
+        rebuild_unread_counts()
+        self.assertEqual((unread_count(self.user.id), unread_count(self.other.id)), (2, 0))
+
+    def test_cursor_pages_walk_history_once(self):
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, verb=f"#{number}") for number in range(45)
+        ])
+        seen, url = [], '/notifications/?page_size=20'
+        while url:
+            page = self.client.get(url).data
+            self.assertLessEqual(len(page['results']), 20)
+            seen += [item['id'] for item in page['results']]
+            url = page['next']
+        self.assertEqual(seen, list(self.user.notifications.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_read_pushes_new_count_to_socket(self):
+        notify_many([self.user], "📢 Новости")
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"user_{self.user.id}", channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/notifications/mark-all-as-read/')
+        message = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(message, {'type': 'send_unread_count', 'unread_count': 0})
+
+
+DONATED = "💰 Кто-то пожертвовал на вашу публикацию"
+COMMENTED = "💬 Новый комментарий к вашей публикации"
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.user, = make_users(1)
+        self.now = timezone.now()
+
+    def add(self, verb, days, is_read=True, url="/publications/1"):
+        notification = Notification.objects.create(recipient=self.user, verb=verb, url=url, is_read=is_read)
+        Notification.objects.filter(id=notification.id).update(created_at=self.now - timedelta(days=days))
+        return notification.id
+
+    def test_purges_read_rows_by_verb_window(self):
+        expired = [self.add(DONATED, 40, url="/publications/1"), self.add("📢 Новости", 100)]
+        kept = [self.add(COMMENTED, 40), self.add(DONATED, 200, is_read=False), self.add(DONATED, 10)]
+
+        phases = run_retention(self.now)
+
+        self.assertEqual(phases['purged']['rows'], 2)
+        self.assertGreater(phases['purged']['bytes'], 0)
+        self.assertFalse(Notification.objects.filter(id__in=expired).exists())
+        self.assertEqual(Notification.objects.filter(id__in=kept).count(), 3)
+
+    def test_repeated_events_collapse_into_latest_row(self):
+        repeated = [self.add(DONATED, 5) for _ in range(5)]
+        others = [
+            self.add(DONATED, 5, url="/publications/2"),
+            self.add(DONATED, 5, is_read=False),
+            self.add(DONATED, 0),  # свежее — не сворачивается
+        ]
+
+        phases = run_retention(self.now)
+
+        self.assertEqual(phases['compacted']['rows'], 4)
+        self.assertEqual(
+            list(Notification.objects.filter(id__in=repeated).values_list('id', 'count')), [(repeated[-1], 5)]
+        )
+        self.assertEqual(Notification.objects.filter(id__in=others, count=1).count(), 3)
+
+        # Следующий прогон добавляет новые повторы к уже свёрнутой строке
+        self.add(DONATED, 3)
+        run_retention(self.now)
+        self.assertEqual(Notification.objects.get(url="/publications/1", is_read=True, count__gt=1).count, 6)
+
+
+class SharedChannelLayerTests(TestCase):
+    def test_notifications_reach_sockets_in_other_processes(self):
+        online, other, offline = make_users(3)
+        spawn = multiprocessing.get_context('spawn')
+
+        with LocalRedisServer() as first, LocalRedisServer() as second:
+            overrides = redis_settings(first, second)
+            received = spawn.Queue()
+            workers = []
+            for user in (online, other):
+                connected = spawn.Event()
+                worker = spawn.Process(target=run_socket_worker, args=(overrides, user.id, connected, received))
+                worker.start()
+                workers.append(worker)
+                self.assertTrue(connected.wait(30))
+
+            with override_settings(**overrides):
+                self.assertEqual(online_user_ids([online.id, other.id, offline.id]), {online.id, other.id})
+                with self.captureOnCommitCallbacks(execute=True):
+                    notify_many([online, other, offline], "📢 Новости", target="Demeu")
+
+                messages = [received.get(timeout=15) for _ in workers]
+                for worker in workers:
+                    worker.join(15)
+                # Оба воркера закрыли сокеты — пользователи снова офлайн
+                self.assertEqual(online_user_ids([online.id, other.id]), set())
+
+            published = first.published + second.published
+
+        self.assertEqual(sorted(message['verb'] for message in messages), ["📢 Новости"] * 2)
+        self.assertEqual(
+            Notification.objects.filter(id__in=[message['id'] for message in messages]).count(), 2
+        )
+        # Пользователю без открытых сокетов ничего не публикуется
+        self.assertEqual(len(published), 2)
+        self.assertFalse(any(f"user_{offline.id}".encode() in channel for channel in published))
+
+
+class PresenceTests(TestCase):
+    def test_heartbeat_keeps_long_lived_socket_online(self):
+        (user,) = make_users(1, counters=False)
+        async_to_sync(socket_opened)(user.id)
+        # Сокет открыт дольше PRESENCE_TTL: ключ истёк, пользователь выпал из онлайна
+        cache.delete(presence_key(user.id))
+        self.assertEqual(online_user_ids([user.id]), set())
+
+        async_to_sync(socket_alive)(user.id)
+        self.assertEqual(online_user_ids([user.id]), {user.id})
+        async_to_sync(socket_alive)(user.id)
+        async_to_sync(socket_closed)(user.id)
+        self.assertEqual(online_user_ids([user.id]), set())
+
+
+class JWTAuthMiddlewareTests(TransactionTestCase):
+    def setUp(self):
+        self.users = make_users(30)
+        self.cache = UserCache()
+
+        async def inner(scope, receive, send):
+            return scope['user']
+
+        self.middleware = JWTAuthMiddleware(inner, cache=self.cache, guard=RateGuard(rate=0, burst=1000))
+
+    def connect_all(self, users):
+        async def connect(user):
+            scope = {'type': 'websocket', 'query_string': f"token={AccessToken.for_user(user)}".encode()}
+            return await self.middleware(scope, None, None)
+
+        async def storm():
+            return await asyncio.gather(*(connect(user) for user in users))
+
+        with CaptureQueriesContext(connection) as queries:
+            scope_users = async_to_sync(storm)()
+        return scope_users, len(queries)
+
+    def test_reconnect_storm_is_one_query_then_cached(self):
+        scope_users, queries = self.connect_all(self.users)
+        self.assertEqual(queries, 1)
+        self.assertEqual([user.id for user in scope_users], [user.id for user in self.users])
+        self.assertEqual(scope_users[0].email, self.users[0].email)
+
+        scope_users, queries = self.connect_all(self.users)
+        self.assertEqual(queries, 0)
+        stats = self.middleware.stats_snapshot()
+        self.assertEqual((stats['hits'], stats['misses'], stats['queries']), (30, 30, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_user_save_invalidates_cached_entry(self):
+        user = self.users[0]
+        with mock.patch('notifications.signals.user_cache', self.cache):
+            self.connect_all([user])
+            user.first_name = "Renamed"
+            user.save()
+            self.assertIsNone(self.cache.get(user.id))
+            (scope_user,), queries = self.connect_all([user])
+        self.assertEqual((scope_user.first_name, queries), ("Renamed", 1))
+
+    def test_rate_guard_rejects_misses_over_budget(self):
+        self.middleware.guard = RateGuard(rate=0, burst=10)
+        scope_users, queries = self.connect_all(self.users)
+        self.assertEqual(sum(not user.is_anonymous for user in scope_users), 10)
+        self.assertEqual(self.middleware.stats['rejected'], 20)
+        self.assertEqual(queries, 1)
@@ -1,26 +1,110 @@
+import asyncio
+from collections import Counter
+
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from .counters import bump_unread, unread_count, unread_counts
 from .models import Notification
-from .serializers import NotificationSerializer
+from .presence import online_user_ids
+from .serializers import notification_payload
 
-def notify_user(user, verb, target=None, url=None):
-    notification = Notification.objects.create(
-        recipient=user,
-        verb=verb,
-        target=target,
-        url=url
-    )
+NOTIFICATION_BATCH_SIZE = 1000
+
+
+async def _group_send_many(channel_layer, messages):
+    await asyncio.gather(*(
+        channel_layer.group_send(group_name, message) for group_name, message in messages
+    ))
+
+
+def online_recipients(user_ids):
+    """
+    Получатели, которым есть смысл публиковать: при NOTIFICATIONS_TRACK_PRESENCE —
+    только с открытыми сокетами, иначе все.
+    """
+    user_ids = set(user_ids)
+    if not getattr(settings, 'NOTIFICATIONS_TRACK_PRESENCE', False):
+        return user_ids
+    return online_user_ids(user_ids)
+
+
+def publish_to_users(messages):
+    """
+    Отправляет [(user_id, event)] в websocket-группы пользователей одним вызовом
+    async_to_sync: group_send по всем группам выполняются конкурентно.
+    """
     channel_layer = get_channel_layer()
-    group_name = f"user_{user.id}"
-    serializer = NotificationSerializer(notification)
+    if channel_layer is None or not messages:
+        return
+    try:
+        async_to_sync(_group_send_many)(channel_layer, [
+            (f"user_{user_id}", event) for user_id, event in messages
+        ])
+    except Exception as e:
+        # Данные уже сохранены и придут со списком; недоступный Redis не роняет вызывающий код
+        print("⚠️ Не удалось отправить уведомления в websocket:", e)
 
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
+
+def dispatch_notifications(notifications):
+    """
+    Публикует сохранённые уведомления вместе с новым числом непрочитанных получателя.
+    """
+    online = online_recipients(notification.recipient_id for notification in notifications)
+    notifications = [notification for notification in notifications if notification.recipient_id in online]
+    if not notifications:
+        return
+    counts = unread_counts(online)
+    publish_to_users([
+        (notification.recipient_id, {
             "type": "send_notification",
-            "content": serializer.data
-        }
-    )
+            "content": notification_payload(notification),
+            "unread_count": counts.get(notification.recipient_id, 0),
+        })
+        for notification in notifications
+    ])
+
+
+def push_unread_count(user_id):
+    if user_id in online_recipients([user_id]):
+        publish_to_users([(user_id, {"type": "send_unread_count", "unread_count": unread_count(user_id)})])
+
+
+def send_notifications(notifications):
+    """
+    Сохраняет несохранённые Notification пачками через bulk_create, обновляет счётчики
+    непрочитанных и после коммита рассылает уведомления по websocket.
+    Возвращает сохранённые объекты.
+    """
+    if not notifications:
+        return []
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+        bump_unread(Counter(notification.recipient_id for notification in notifications))
+        transaction.on_commit(lambda: dispatch_notifications(notifications))
+    return notifications
+
+
+def notify_many(recipients, verb, target=None, url=None):
+    """
+    Одно и то же уведомление нескольким получателям (пользователи или их id).
+    """
+    return send_notifications([
+        Notification(
+            recipient_id=getattr(recipient, 'pk', recipient),
+            verb=verb,
+            target=target,
+            url=url,
+        )
+        for recipient in recipients
+    ])
+
+
+def notify_user(user, verb, target=None, url=None):
+    return notify_many([user], verb=verb, target=target, url=url)[0]
+
+
 def notify_top_donor(user, publication):
     notify_user(
         user=user,
@@ -28,5 +112,3 @@ def notify_top_donor(user, publication):
         target=publication.title,
         url=f"/publications/{publication.id}"
     )
-
-
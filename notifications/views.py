@@ -1,19 +1,23 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from .counters import bump_unread, rebuild_unread_counts, unread_count
 from .models import Notification
+from .pagination import NotificationCursorPagination
 from .serializers import NotificationSerializer
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.http import JsonResponse
-from .utils import notify_user
+from .utils import notify_user, push_unread_count
 
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Notification.objects.filter(recipient=user).order_by('-created_at')
+        queryset = Notification.objects.filter(recipient=user)
 
         if self.request.query_params.get('unread') == 'true':
             queryset = queryset.filter(is_read=False)
@@ -24,29 +28,46 @@ class NotificationListView(generics.ListAPIView):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_as_read(request, pk):
-    try:
-        notification = Notification.objects.get(pk=pk, recipient=request.user)
-        notification.is_read = True
-        notification.save()
-        return Response({'status': 'marked as read'})
-    except Notification.DoesNotExist:
-        return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+    user = request.user
+    with transaction.atomic():
+        # Счётчик уменьшается, только если уведомление действительно было непрочитанным
+        if Notification.objects.filter(pk=pk, recipient=user, is_read=False).update(is_read=True):
+            bump_unread({user.id: -1})
+            transaction.on_commit(lambda: push_unread_count(user.id))
+        elif not Notification.objects.filter(pk=pk, recipient=user).exists():
+            return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'status': 'marked as read'})
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_all_as_read(request):
-    request.user.notifications.update(is_read=True)
+    user = request.user
+    with transaction.atomic():
+        marked = user.notifications.filter(is_read=False).update(is_read=True)
+        if marked:
+            bump_unread({user.id: -marked})
+            transaction.on_commit(lambda: push_unread_count(user.id))
     return Response({'status': 'all marked as read'})
 
 
 @api_view(['DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def delete_all_notifications(request):
-    request.user.notifications.all().delete()
+    user = request.user
+    with transaction.atomic():
+        user.notifications.all().delete()
+        rebuild_unread_counts([user.id])
+        transaction.on_commit(lambda: push_unread_count(user.id))
     return Response({'status': 'all deleted'})
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def unread_notifications_count(request):
+    return Response({'unread_count': unread_count(request.user.id)})
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])  # Временно, чтобы можно было тестировать
 def send_test_notification(request):
@@ -0,0 +1,169 @@
+import hashlib
+from io import BytesIO
+
+import requests
+from PIL import Image, UnidentifiedImageError
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .models import Profile
+
+# Размеры аватара (квадрат, px): 48 — комментарии и доноры, 96 — автор в карточках, 300 — профиль
+AVATAR_SIZES = (48, 96, 300)
+AVATAR_QUALITY = 85
+# Аватары из Google загружаются в задаче, а не на запросе логина
+AVATAR_DOWNLOAD_TIMEOUT = 5
+AVATAR_MAX_DOWNLOAD = 5 * 1024 * 1024
+AVATAR_DOWNLOAD_CHUNK = 64 * 1024
+# Профилей за один проход подстраховочной задачи process_pending_avatars
+PENDING_BATCH_SIZE = 100
+
+
+def avatar_size_name(digest, size):
+    # Имя по хэшу содержимого: одинаковые загрузки (тот же аватар Google) делят файлы,
+    # повторная обработка не пишет их заново
+    return f"avatars/{digest[:2]}/{digest}_{size}.webp"
+
+
+def render_sizes(content, sizes=AVATAR_SIZES):
+    """
+    Декодирует изображение один раз и кодирует в WEBP все размеры, от большего к меньшему:
+    каждый следующий уменьшается из предыдущего, а не из оригинала. Возвращает {size: bytes}.
+    """
+    image = Image.open(BytesIO(content))
+    # Для JPEG декодер сразу уменьшает в 2-8 раз — большие фото с телефона не разворачиваются целиком
+    image.draft('RGB', (max(sizes), max(sizes)))
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'P', 'LA') else 'RGB')
+
+    rendered = {}
+    for size in sorted(sizes, reverse=True):
+        image.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, format='WEBP', quality=AVATAR_QUALITY)
+        rendered[size] = buffer.getvalue()
+    return rendered
+
+
+def process_avatar(profile_id):
+    """
+    Строит размеры AVATAR_SIZES для текущего аватара профиля. Возвращает {"48": имя, ...}
+    или None, если аватара нет, он не читается как изображение или сменился во время обработки.
+    """
+    profile = Profile.objects.filter(pk=profile_id).only('avatar', 'avatar_hash', 'avatar_sizes').first()
+    if profile is None or not profile.avatar:
+        return None
+    name = profile.avatar.name
+    storage = profile.avatar.storage
+    with profile.avatar.open('rb') as file:
+        content = file.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if digest == profile.avatar_hash and profile.avatar_sizes:
+        return profile.avatar_sizes
+
+    sizes = {}
+    missing = [size for size in AVATAR_SIZES if not storage.exists(avatar_size_name(digest, size))]
+    try:
+        rendered = render_sizes(content, missing) if missing else {}
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"⚠️ Аватар профиля {profile_id} не обработан:", e)
+        # Хэш без размеров: сериализаторы отдают оригинал, process_pending_avatars не берёт профиль снова
+        Profile.objects.filter(pk=profile_id, avatar=name).update(avatar_hash=digest, avatar_sizes={})
+        return None
+    for size in AVATAR_SIZES:
+        target = avatar_size_name(digest, size)
+        if size in rendered:
+            target = storage.save(target, ContentFile(rendered[size]))
+        sizes[str(size)] = target
+
+    # Условие по avatar: если пользователь успел загрузить новый аватар, результат не записывается
+    if not Profile.objects.filter(pk=profile_id, avatar=name).update(avatar_hash=digest, avatar_sizes=sizes):
+        return None
+    return sizes
+
+
+def delete_replaced_avatar(name, digest, sizes):
+    """
+    Удаляет файлы заменённого аватара; размеры — только если их хэш больше ни у кого не используется.
+    """
+    storage = Profile._meta.get_field('avatar').storage
+    if name and not Profile.objects.filter(avatar=name).exists():
+        storage.delete(name)
+    if digest and not Profile.objects.filter(avatar_hash=digest).exists():
+        for size_name in (sizes or {}).values():
+            storage.delete(size_name)
+
+
+def schedule_avatar_processing(profile_id, replaced=None):
+    if not getattr(settings, 'AVATAR_AUTOSCHEDULE', True):
+        return
+    from .tasks import process_profile_avatar
+    try:
+        process_profile_avatar.delay(profile_id, replaced)
+    except Exception as e:
+        # Аватар обработает process_pending_avatars; до тех пор сериализаторы отдают оригинал
+        print("⚠️ Не удалось поставить обработку аватара в очередь:", e)
+
+
+def schedule_avatar_download(profile_id, url):
+    if not getattr(settings, 'AVATAR_AUTOSCHEDULE', True):
+        return
+    from .tasks import fetch_remote_avatar
+    try:
+        fetch_remote_avatar.delay(profile_id, url)
+    except Exception as e:
+        print("⚠️ Не удалось поставить загрузку аватара в очередь:", e)
+
+
+def read_limited(response, limit):
+    """
+    Тело ответа, если оно не больше limit байт, иначе None. Читается потоком: заявленный
+    Content-Length проверяется до чтения, а чтение обрывается, как только лимит превышен.
+    """
+    length = response.headers.get('Content-Length', '')
+    if length.isdigit() and int(length) > limit:
+        return None
+    chunks, size = [], 0
+    for chunk in response.iter_content(AVATAR_DOWNLOAD_CHUNK):
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def download_avatar(profile_id, url):
+    """
+    Загружает внешний аватар (Google), если у профиля всё ещё нет своего.
+    Сохранение профиля ставит обработку размеров.
+    """
+    profile = Profile.objects.filter(pk=profile_id).first()
+    if profile is None or profile.avatar:
+        return False
+    with requests.get(url, timeout=AVATAR_DOWNLOAD_TIMEOUT, stream=True) as response:
+        if response.status_code != 200:
+            return False
+        content = read_limited(response, AVATAR_MAX_DOWNLOAD)
+    if content is None:
+        return False
+    profile.avatar.save(f"{profile.user_id}_google.jpg", ContentFile(content), save=True)
+    return True
+
+
+def pick_avatar_size(sizes, size):
+    # Наименьший готовый размер не меньше запрошенного, иначе наибольший из готовых
+    available = sorted(int(value) for value in (sizes or {}))
+    if not available:
+        return None
+    chosen = next((value for value in available if value >= size), available[-1])
+    return sizes[str(chosen)]
+
+
+def avatar_url(profile, size, request=None):
+    """
+    URL аватара нужного размера; пока размеры не построены — оригинал.
+    """
+    if profile is None or not profile.avatar:
+        return None
+    name = pick_avatar_size(profile.avatar_sizes, size) or profile.avatar.name
+    url = profile.avatar.storage.url(name)
+    return request.build_absolute_uri(url) if request else url
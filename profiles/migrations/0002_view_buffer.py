@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_profile_view_count(apps, schema_editor):
+    Profile = apps.get_model('profiles', 'Profile')
+    ProfileView = apps.get_model('profiles', 'ProfileView')
+
+    views = ProfileView.objects.filter(profile=OuterRef('pk')).order_by().values('profile') \
+        .annotate(count=Count('id')).values('count')
+    Profile.objects.update(view_count=Coalesce(Subquery(views), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_profile_view_count, migrations.RunPython.noop),
+    ]
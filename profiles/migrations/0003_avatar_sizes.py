@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_view_buffer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_sizes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,13 +1,9 @@
-import os
-import time
-from io import BytesIO
 from datetime import date
-from PIL import Image
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.files.base import ContentFile
+from django.core.files import File
 
 
 def validate_image_size(image):
@@ -30,37 +26,45 @@ class Profile(models.Model):
     telegram = models.URLField(max_length=255, blank=True, null=True)
 
     birth_date = models.DateField(blank=True, null=True)
+    view_count = models.PositiveIntegerField(default=0)  # уникальные зрители, пересчитывается при сбросе буфера
+    # Размеры аватара {"48": имя файла, ...} и SHA-256 оригинала, по которому они построены
+    avatar_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    avatar_sizes = models.JSONField(default=dict, blank=True, editable=False)
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            old_avatar = Profile.objects.get(pk=self.pk).avatar
-            if old_avatar and self.avatar and old_avatar.name != self.avatar.name:
-                old_path = old_avatar.path
-                if os.path.exists(old_path):
-                    os.remove(old_path)
-
-        if self.avatar:
-            self.avatar = self.convert_to_webp(self.avatar)
-
-        super().save(*args, **kwargs)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_avatar = self._avatar_state()
 
-    def convert_to_webp(self, image, size=(300, 300)):
-        img = Image.open(image)
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGBA")
-        else:
-            img = img.convert("RGB")
+    def _avatar_state(self):
+        # Без обращения к дескриптору: при .only()/.defer() он загрузил бы поле отдельным запросом
+        value = self.__dict__.get('avatar')
+        return getattr(value, 'name', value) or None
 
-        img.thumbnail(size, Image.LANCZOS)
+    def save(self, *args, **kwargs):
+        """
+        Размеры аватара (profiles/avatars.py) строятся задачей process_profile_avatar после
+        коммита и только если аватар сменился; сохранения без аватара картинки не трогают.
+        """
+        previous = self._loaded_avatar
+        value = self.__dict__.get('avatar')
+        uploaded = isinstance(value, File) and not getattr(value, '_committed', False)
+        changed = uploaded or self._avatar_state() != previous
+        replaced = None
+        if changed:
+            replaced = {'name': previous, 'hash': self.avatar_hash, 'sizes': self.avatar_sizes} if previous else None
+            self.avatar_hash = ''
+            self.avatar_sizes = {}
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'avatar' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'avatar_hash', 'avatar_sizes'}
 
-        buffer = BytesIO()
-        img.save(buffer, format="WEBP", quality=85)
+        super().save(*args, **kwargs)
 
-        timestamp = int(time.time())
-        base_name = os.path.splitext(image.name)[0]
-        new_name = f"{base_name}_{timestamp}.webp"
+        if changed:
+            from .avatars import schedule_avatar_processing
 
-        return ContentFile(buffer.getvalue(), name=new_name)
+            self._loaded_avatar = self._avatar_state()
+            transaction.on_commit(lambda: schedule_avatar_processing(self.pk, replaced))
 
     @property
     def age(self):
@@ -1,12 +1,14 @@
-from django.db.models import Sum
+from django.db.models import Prefetch, Sum
 from rest_framework import serializers
 
 from favorites.models import FavoritePublication
 from favorites.serializers import FavoritePublicationSerializer
 from donations.models import Donation
 from .models import Profile
+from .avatars import AVATAR_SIZES, avatar_url
 from accounts.models import User
-from publications.serializers import PublicationSerializer
+from publications.models import Publication
+from publications.serializers import PublicationCardSerializer
 from publications.serializers import DonationSerializer
 from datetime import date
 
@@ -18,8 +20,9 @@ class ProfileSerializer(serializers.ModelSerializer):
     last_name = serializers.CharField(source='user.last_name', read_only=True)
     age = serializers.SerializerMethodField()
     avatar = serializers.ImageField(required=False)
+    avatar_sizes = serializers.SerializerMethodField()
     date_joined = serializers.DateTimeField(source='user.date_joined', read_only=True)
-    publications = PublicationSerializer(many=True, read_only=True, source="user.publications")
+    publications = serializers.SerializerMethodField()
     latest_donations = serializers.SerializerMethodField()
     total_profile_views = serializers.SerializerMethodField()
     total_publications = serializers.SerializerMethodField()
@@ -36,12 +39,24 @@ class ProfileSerializer(serializers.ModelSerializer):
             'avatar', 'country', 'city', 'phone_number', 'bio',
             'instagram', 'whatsapp', 'facebook', 'telegram',
             'birth_date', 'age',
-            'avatar','date_joined', 'days_since_registration', 'publications', 'latest_donations',
+            'avatar', 'avatar_sizes', 'date_joined', 'days_since_registration', 'publications', 'latest_donations',
             'total_profile_views',
             'total_publications', 'total_donations',
             'total_favorite_publications', 'favorite_publications',
         ]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Для показа — 300px WEBP (пока размеры не построены — оригинал), а не загруженный файл
+        data['avatar'] = avatar_url(instance, 300, self.context.get('request'))
+        return data
+
+    def get_avatar_sizes(self, obj):
+        if not obj.avatar_sizes:
+            return {}
+        request = self.context.get('request')
+        return {str(size): avatar_url(obj, size, request) for size in AVATAR_SIZES}
+
     def get_age(self, obj):
         if obj.birth_date:
             today = date.today()
@@ -70,21 +85,29 @@ class ProfileSerializer(serializers.ModelSerializer):
             for donation in donations
         ]
 
+    def get_publications(self, obj):
+        # Карточки: полные публикации с документами и пожертвованиями раздували ответ профиля
+        publications = Publication.objects.filter(author=obj.user).for_card()
+        context = {**self.context, 'fields': (), 'expand': ()}  # ?fields= запроса относится к профилю
+        return PublicationCardSerializer(publications, many=True, context=context).data
+
     def get_total_publications(self, obj):
         return obj.user.publications.count()
 
     def get_total_donations(self, obj):
-        return obj.user.publications.aggregate(total=Sum('donations__donor_amount'))['total'] or 0
+        return obj.user.publications.aggregate(total=Sum('stats__donated_total'))['total'] or 0
 
     def get_total_profile_views(self, obj):
-        return obj.views.count()
+        return obj.view_count
 
     def get_total_favorite_publications(self, obj):
         return FavoritePublication.objects.filter(user=obj.user).count()
 
     def get_favorite_publications(self, obj):
-        favorites = FavoritePublication.objects.filter(user=obj.user)
-        return FavoritePublicationSerializer(favorites, many=True).data
+        favorites = FavoritePublication.objects.filter(user=obj.user).select_related('user').prefetch_related(
+            Prefetch('publication', queryset=Publication.objects.for_card())
+        )
+        return FavoritePublicationSerializer(favorites, many=True, context=self.context).data
 
     def get_days_since_registration(self, obj):
         if hasattr(obj, 'user') and hasattr(obj.user, 'date_joined') and obj.user.date_joined:
@@ -0,0 +1,53 @@
+from celery import shared_task
+
+
+@shared_task
+def flush_profile_views():
+    from profiles.viewing import profile_views
+
+    saved = profile_views.flush()
+    if saved:
+        print(f"[👁] Просмотров профилей записано: {saved}")
+    return saved
+
+
+@shared_task
+def process_profile_avatar(profile_id, replaced=None):
+    from profiles.avatars import delete_replaced_avatar, process_avatar
+
+    sizes = process_avatar(profile_id)
+    if replaced:
+        delete_replaced_avatar(replaced['name'], replaced['hash'], replaced['sizes'])
+    return sizes
+
+
+@shared_task
+def process_pending_avatars():
+    # Подстраховка: профили, чья задача обработки потерялась (брокер был недоступен), и аватары,
+    # загруженные до появления размеров
+    from profiles.avatars import PENDING_BATCH_SIZE, process_avatar
+    from profiles.models import Profile
+
+    ids = list(
+        Profile.objects.exclude(avatar='').exclude(avatar__isnull=True).filter(avatar_hash='')
+        .values_list('id', flat=True)[:PENDING_BATCH_SIZE]
+    )
+    for profile_id in ids:
+        try:
+            process_avatar(profile_id)
+        except Exception as e:
+            print(f"⚠️ Аватар профиля {profile_id} не обработан:", e)
+    if ids:
+        print(f"[🖼] Аватаров обработано: {len(ids)}")
+    return len(ids)
+
+
+@shared_task
+def fetch_remote_avatar(profile_id, url):
+    from profiles.avatars import download_avatar
+
+    try:
+        return download_avatar(profile_id, url)
+    except Exception as e:
+        print(f"⚠️ Не удалось загрузить аватар профиля {profile_id}:", e)
+        return False
@@ -1,3 +1,162 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .avatars import AVATAR_DOWNLOAD_CHUNK, AVATAR_MAX_DOWNLOAD, avatar_url, download_avatar, process_avatar
+from .models import Profile, ProfileView
+from .tasks import process_profile_avatar
+from .viewing import profile_views
+
+
+def make_user(email):
+    return User.objects.create_user(email=email, first_name="Test", last_name="User", password="pass12345")
+
+
+class CountingBody(BytesIO):
+    # Тело ответа, которое помнит, сколько из него прочитано
+    consumed = 0
+
+    def read(self, *args):
+        data = super().read(*args)
+        self.consumed += len(data)
+        return data
+
+
+class ProfileViewBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = make_user("owner@example.com")
+        self.viewer = make_user("viewer@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def get_profile(self):
+        return self.client.get(f'/profiles/{self.owner.id}/').data
+
+    @override_settings(VIEW_BUFFER_ENABLED=True)
+    def test_views_are_buffered_and_counted_on_flush(self):
+        self.get_profile()
+        self.get_profile()
+        self.assertFalse(ProfileView.objects.exists())
+
+        self.assertEqual(profile_views.flush(now=time.time() + 30), 1)
+        self.assertEqual(self.get_profile()['total_profile_views'], 1)
+
+    @override_settings(VIEW_BUFFER_ENABLED=False)
+    def test_without_shared_cache_views_are_written_immediately(self):
+        self.get_profile()
+        self.assertEqual(self.get_profile()['total_profile_views'], 1)
+        self.assertEqual(ProfileView.objects.count(), 1)
+
+
+def png(color, size=(640, 480)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@override_settings(AVATAR_AUTOSCHEDULE=False)
+class AvatarPipelineTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = self.settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.profile = make_user("owner@example.com").profile
+
+    def upload(self, content, name="photo.png"):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.profile.avatar = ContentFile(content, name=name)
+            self.profile.save()
+        return callbacks
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media, name))
+
+    def test_saves_without_avatar_change_skip_image_work(self):
+        self.upload(png('red'))
+        profile = Profile.objects.get(pk=self.profile.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            profile.bio = "Волонтёр"
+            profile.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(len(self.upload(png('blue'))), 1)
+
+    def test_sizes_are_built_by_content_hash_and_picked_by_serializers(self):
+        self.upload(png('red'))
+        self.assertEqual(avatar_url(self.profile, 48), self.profile.avatar.url)  # до обработки — оригинал
+
+        sizes = process_avatar(self.profile.pk)
+        self.profile.refresh_from_db()
+
+        self.assertEqual(set(sizes), {'48', '96', '300'})
+        with Image.open(os.path.join(self.media, sizes['300'])) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (300, 225)))
+        self.assertTrue(avatar_url(self.profile, 48).endswith('_48.webp'))
+        self.assertTrue(avatar_url(self.profile, 64).endswith('_96.webp'))
+        self.assertTrue(avatar_url(self.profile, 1000).endswith('_300.webp'))
+        self.assertEqual(process_avatar(self.profile.pk), sizes)
+
+        data = APIClient().get(f'/profiles/{self.profile.user_id}/').data
+        self.assertTrue(data['avatar'].endswith('_300.webp'))
+        self.assertEqual(set(data['avatar_sizes']), {'48', '96', '300'})
+
+    @override_settings(AVATAR_AUTOSCHEDULE=True)
+    def test_replaced_avatar_files_are_deleted_by_the_task(self):
+        with mock.patch('profiles.tasks.process_profile_avatar.delay') as delay:
+            self.upload(png('red'))
+            process_profile_avatar(*delay.call_args.args)
+            self.profile.refresh_from_db()
+            old_files = [self.profile.avatar.name, *self.profile.avatar_sizes.values()]
+
+            self.upload(png('green'))
+            process_profile_avatar(*delay.call_args.args)
+
+        self.assertEqual(delay.call_count, 2)
+        self.assertFalse(any(self.exists(name) for name in old_files))
+        self.profile.refresh_from_db()
+        self.assertTrue(all(self.exists(name) for name in [self.profile.avatar.name,
+                                                           *self.profile.avatar_sizes.values()]))
+
+    def response(self, content, **headers):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = CountingBody(content)
+        response.headers.update(headers)
+        return response
+
+    def test_remote_avatar_is_downloaded_outside_login(self):
+        with mock.patch('profiles.avatars.requests.get', return_value=self.response(png('red'))) as get:
+            self.assertTrue(download_avatar(self.profile.pk, 'https://example.com/a.jpg'))
+            self.assertFalse(download_avatar(self.profile.pk, 'https://example.com/a.jpg'))
+
+        get.assert_called_once()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar_hash, '')
+        self.assertTrue(process_avatar(self.profile.pk))
+
+    def test_remote_avatar_over_limit_is_not_read_to_the_end(self):
+        body = b'x' * (AVATAR_MAX_DOWNLOAD + 10 * AVATAR_DOWNLOAD_CHUNK)
+        declared = self.response(body, **{'Content-Length': str(len(body))})
+        undeclared = self.response(body)
+        with mock.patch('profiles.avatars.requests.get', side_effect=[declared, undeclared]):
+            self.assertFalse(download_avatar(self.profile.pk, 'https://example.com/a.jpg'))
+            self.assertFalse(download_avatar(self.profile.pk, 'https://example.com/a.jpg'))
+
+        self.assertEqual(declared.raw.consumed, 0)
+        self.assertLessEqual(undeclared.raw.consumed, AVATAR_MAX_DOWNLOAD + AVATAR_DOWNLOAD_CHUNK)
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.avatar)
@@ -0,0 +1,16 @@
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from demeu.view_buffer import ViewBuffer
+from .models import Profile, ProfileView
+
+
+def recount_profile_views(profile_ids):
+    views = ProfileView.objects.filter(profile=OuterRef('pk')).order_by().values('profile') \
+        .annotate(count=Count('id')).values('count')
+    return Profile.objects.filter(pk__in=profile_ids).update(view_count=Coalesce(Subquery(views), Value(0)))
+
+
+# Просмотры профилей: ProfilePublicView только отмечает их в буфере,
+# в БД они попадают задачей flush_profile_views
+profile_views = ViewBuffer('profile', ProfileView, 'profile', on_flush=recount_profile_views)
@@ -4,8 +4,9 @@ from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, filters
 from rest_framework.exceptions import NotFound
 from accounts.models import User
-from .models import Profile, ProfileView
+from .models import Profile
 from .serializers import ProfileSerializer
+from .viewing import profile_views
 from accounts.serializers import UserSerializer
 
 
@@ -36,7 +37,7 @@ class ProfilePublicView(generics.RetrieveAPIView):
         # Фиксируем просмотр профиля
         viewer = self.request.user if self.request.user.is_authenticated else None
         if viewer and viewer != profile.user:
-            ProfileView.objects.get_or_create(profile=profile, viewer=viewer)
+            profile_views.record(profile.id, viewer.id)
 
         return profile
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PublicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'publications'
+
+    def ready(self):
+        import publications.signals
@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Publication
+from .response_cache import bump_all
+from .stats import suspended_stats
+
+ARCHIVE_RETENTION = timedelta(days=90)
+
+
+def mark_successful(now):
+    """
+    Одним UPDATE переводит в 'successful' активные публикации, собравшие нужную сумму
+    (сумма берётся из PublicationStats; нет строки статистики — собрано 0).
+    """
+    return Publication.objects.alias(
+        donated=Coalesce('stats__donated_total', Value(0), output_field=DecimalField())
+    ).filter(status='active', donated__gte=F('amount')).update(
+        status='successful', is_archived=True, updated_at=now
+    )
+
+
+def mark_expired(now):
+    # Вызывается после mark_successful: публикация, собравшая сумму, не считается истёкшей
+    return Publication.objects.filter(status='active', expires_at__lte=now).update(
+        status='expired', is_archived=True, updated_at=now
+    )
+
+
+def purge_archived(before, batch_size=500):
+    """
+    Удаляет архивные публикации, не менявшиеся с before, пачками по batch_size:
+    каждая пачка — отдельная короткая транзакция каскадного удаления.
+    """
+    deleted = 0
+    queryset = Publication.objects.filter(is_archived=True, updated_at__lte=before).order_by('id')
+    with suspended_stats():
+        while True:
+            ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            Publication.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+    return deleted
+
+
+def _timed(phases, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    rows = func(*args, **kwargs)
+    phases[name] = {'rows': rows, 'seconds': round(time.perf_counter() - start, 3)}
+    return rows
+
+
+def close_finished_publications(now=None):
+    now = now or timezone.now()
+    phases = {}
+    _timed(phases, 'successful', mark_successful, now)
+    _timed(phases, 'expired', mark_expired, now)
+    if phases['successful']['rows'] or phases['expired']['rows']:
+        bump_all()  # статусы сменились одним UPDATE без сигналов
+    return phases
+
+
+def run_lifecycle(now=None, batch_size=500):
+    """
+    Ночной цикл публикаций: завершение успешных и истёкших, затем удаление архива старше 90 дней.
+    Возвращает {фаза: {'rows': ..., 'seconds': ...}}.
+    """
+    now = now or timezone.now()
+    phases = close_finished_publications(now)
+    _timed(phases, 'purged', purge_archived, now - ARCHIVE_RETENTION, batch_size)
+    return phases
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from donations.models import Donation
+from publications.models import Publication, PublicationDocument, View
+from publications.serializers import PublicationCardSerializer, PublicationSerializer
+from publications.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = ("Compare payload bytes and render time of full PublicationSerializer vs PublicationCardSerializer "
+            "on generated publications. Data is created inside a transaction and rolled back")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100)
+        parser.add_argument('--views', type=int, default=50)
+        parser.add_argument('--donations', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def generate(self, count, views, donations):
+        users = User.objects.bulk_create([
+            User(email=f"bench{number}@example.com", first_name="Bench", last_name=str(number), password="!")
+            for number in range(max(views, donations) + 1)
+        ])
+        author, viewers = users[0], users[1:]
+        publications = Publication.objects.bulk_create([
+            Publication(author=author, title=f"Сбор #{number}", category='medicine',
+                        description="Сбор средств на операцию. " * 20, bank_details='4400430012345678',
+                        amount=1000000, contact_name="Bench", contact_email=author.email,
+                        contact_phone='+77011234567', status='active')
+            for number in range(count)
+        ])
+        View.objects.bulk_create([
+            View(publication=publication, viewer=viewer)
+            for publication in publications for viewer in viewers[:views]
+        ])
+        Donation.objects.bulk_create([
+            Donation(publication=publication, donor=donor, donor_amount=1000)
+            for publication in publications for donor in viewers[:donations]
+        ])
+        PublicationDocument.objects.bulk_create([
+            PublicationDocument(publication=publication, document_type='income', file='documents/income.pdf',
+                                verification_status='approved',
+                                extracted_data={'text': "Справка о доходах. " * 100})
+            for publication in publications
+        ])
+        rebuild_stats([publication.id for publication in publications])
+        return [publication.id for publication in publications]
+
+    def run(self, label, serializer_class, queryset, repeat):
+        best, payload = None, b''
+        for _ in range(repeat):
+            start = time.perf_counter()
+            payload = JSONRenderer().render(serializer_class(list(queryset.all()), many=True).data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        count = queryset.count()
+        self.stdout.write(f"{label:6} {len(payload) / 1024:9.1f} KB  {len(payload) / count:8.0f} B/publication  "
+                          f"{best * 1000:8.1f} ms (best of {repeat}, queries included)")
+        return len(payload), best
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ids = self.generate(options['count'], options['views'], options['donations'])
+            published = Publication.objects.filter(id__in=ids).order_by('-created_at', '-id')
+
+            full_bytes, full_time = self.run(
+                "full", PublicationSerializer, published.for_serializer(['views']), options['repeat'])
+            card_bytes, card_time = self.run("card", PublicationCardSerializer, published.for_card(), options['repeat'])
+            self.stdout.write(f"card/full: {card_bytes / full_bytes:.1%} bytes, {card_time / full_time:.1%} time")
+            transaction.set_rollback(True)
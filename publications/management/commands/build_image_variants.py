@@ -0,0 +1,82 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from demeu.image_variants import build_variants
+from publications.response_cache import bump_all
+
+MODELS = {
+    'publication': 'publications.PublicationImage',
+    'feedback': 'info.FeedbackImage',
+}
+
+
+def setup_worker():
+    django.setup()
+
+
+def process_chunk(label, ids):
+    """
+    Выполняется в процессе пула: у каждого процесса своё соединение с БД.
+    Возвращает (обработано, не читаются как изображение).
+    """
+    model = apps.get_model(label)
+    built = failed = 0
+    for instance in model.objects.filter(pk__in=ids).order_by('pk'):
+        if 'error' in build_variants(instance):
+            failed += 1
+        else:
+            built += 1
+    return built, failed
+
+
+class Command(BaseCommand):
+    help = ("Build WEBP variants (thumbnail/medium/large) for existing PublicationImage and FeedbackImage "
+            "files in a process pool. Only images without variants unless --force")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=[*MODELS, 'all'], default='all')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=20)
+        parser.add_argument('--force', action='store_true', help="Rebuild variants that already exist")
+
+    def handle(self, *args, **options):
+        labels = MODELS.values() if options['model'] == 'all' else [MODELS[options['model']]]
+        chunk_size = options['chunk_size']
+        tasks = []
+        for label in labels:
+            queryset = apps.get_model(label).objects.exclude(image='')
+            if not options['force']:
+                queryset = queryset.filter(variants={})
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+            tasks += [(label, ids[start:start + chunk_size]) for start in range(0, len(ids), chunk_size)]
+
+        total = sum(len(ids) for _, ids in tasks)
+        if not total:
+            self.stdout.write("Nothing to build")
+            return
+
+        # Соединения родителя не должны наследоваться процессами пула
+        connections.close_all()
+        started = time.perf_counter()
+        built = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=setup_worker) as pool:
+            futures = [pool.submit(process_chunk, label, ids) for label, ids in tasks]
+            for future in as_completed(futures):
+                chunk_built, chunk_failed = future.result()
+                built += chunk_built
+                failed += chunk_failed
+                self.stdout.write(f"{built + failed}/{total} images")
+
+        elapsed = time.perf_counter() - started
+        # Варианты записаны UPDATE без сигналов — сбрасываем кэш ответов публикаций целиком
+        bump_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Built variants for {built} images ({failed} unreadable) with {options['workers']} workers "
+            f"in {elapsed:.1f} s ({total / elapsed:.1f} images/s)"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from publications.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild denormalized publication counters (PublicationStats) from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="Publication ids (all publications if omitted)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ids = options['ids'] or None
+        count = rebuild_stats(ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt stats for {count} publications."))
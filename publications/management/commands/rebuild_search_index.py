@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from publications.models import Publication
+from publications.search import build_search_document, update_search_vector
+
+
+class Command(BaseCommand):
+    help = "Rebuild the publication full-text search index (search_document / search_vector)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        total = 0
+        for publication in Publication.objects.select_related('author').iterator(chunk_size=batch_size):
+            publication.search_document = build_search_document(publication)
+            batch.append(publication)
+            if len(batch) >= batch_size:
+                total += self.flush(batch)
+                batch = []
+        if batch:
+            total += self.flush(batch)
+        self.stdout.write(self.style.SUCCESS(f"✅ Reindexed {total} publications."))
+
+    def flush(self, batch):
+        Publication.objects.bulk_update(batch, ['search_document'])
+        update_search_vector([publication.id for publication in batch])
+        return len(batch)
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_publication_stats(apps, schema_editor):
+    Publication = apps.get_model('publications', 'Publication')
+    PublicationStats = apps.get_model('publications', 'PublicationStats')
+    View = apps.get_model('publications', 'View')
+    Donation = apps.get_model('donations', 'Donation')
+    Comment = apps.get_model('comments', 'Comment')
+
+    donations = {row['publication']: row for row in
+                 Donation.objects.values('publication').annotate(total=Sum('donor_amount'), count=Count('id'))}
+    views = dict(View.objects.values('publication').annotate(count=Count('id')).values_list('publication', 'count'))
+    comments = {row['publication']: row for row in
+                Comment.objects.values('publication').annotate(count=Count('id'),
+                                                               authors=Count('author', distinct=True))}
+
+    PublicationStats.objects.bulk_create([
+        PublicationStats(
+            publication_id=publication_id,
+            donated_total=donations.get(publication_id, {}).get('total') or 0,
+            donation_count=donations.get(publication_id, {}).get('count', 0),
+            view_count=views.get(publication_id, 0),
+            comment_count=comments.get(publication_id, {}).get('count', 0),
+            commenter_count=comments.get(publication_id, {}).get('authors', 0),
+        )
+        for publication_id in Publication.objects.values_list('id', flat=True).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0016_alter_publication_status'),
+        ('donations', '0003_donation_support_amount_and_more'),
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationStats',
+            fields=[
+                ('publication', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='publications.publication')),
+                ('donated_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('view_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('commenter_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_publication_stats, migrations.RunPython.noop),
+    ]
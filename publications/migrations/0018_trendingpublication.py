@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0017_publicationstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPublication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(unique=True)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('publication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='publications.publication')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:41
+
+import django.contrib.postgres.search
+import publications.search
+import re
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def normalize_text(text):
+    return re.sub(r'[^\w\s]', '', text.lower())
+
+
+def fill_search_index(apps, schema_editor):
+    Publication = apps.get_model('publications', 'Publication')
+    batch = []
+    for publication in Publication.objects.select_related('author').iterator(chunk_size=1000):
+        publication.search_document = normalize_text(
+            "\n".join([publication.title, publication.description, publication.author.email])
+        )
+        batch.append(publication)
+        if len(batch) >= 1000:
+            Publication.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Publication.objects.bulk_update(batch, ['search_document'])
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "UPDATE publications_publication SET search_vector = "
+        "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(search_document, '')), 'C')"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0018_trendingpublication'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='publication',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=publications.search.SearchGinIndex(fields=['search_vector'], name='publication_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=publications.search.SearchGinIndex(
+                fields=['search_document'], name='publication_search_doc_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_views(apps, schema_editor):
+    # Проверка exists() + create() на запросе не защищала от гонок: оставляем самый ранний просмотр пары
+    View = apps.get_model('publications', 'View')
+    PublicationStats = apps.get_model('publications', 'PublicationStats')
+
+    duplicates = View.objects.values('publication', 'viewer').order_by() \
+        .annotate(first=Min('id'), count=Count('id')).filter(count__gt=1)
+    touched = set()
+    for row in duplicates.iterator():
+        View.objects.filter(publication=row['publication'], viewer=row['viewer']).exclude(id=row['first']).delete()
+        touched.add(row['publication'])
+
+    views = View.objects.filter(publication=OuterRef('publication')).order_by().values('publication') \
+        .annotate(count=Count('id')).values('count')
+    PublicationStats.objects.filter(publication_id__in=touched).update(view_count=Coalesce(Subquery(views), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0020_lifecycle_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_views, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='view',
+            constraint=models.UniqueConstraint(fields=('publication', 'viewer'), name='unique_publication_view'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0021_view_buffer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publicationdocument',
+            index=models.Index(fields=['publication', '-uploaded_at', '-id'], name='document_publication_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='view',
+            index=models.Index(fields=['publication', '-viewed_at', '-id'], name='view_publication_page_idx'),
+        ),
+    ]
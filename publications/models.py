@@ -4,9 +4,12 @@ from django.utils import timezone
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
+from django.db.models import Value, Prefetch, DecimalField
+from django.db.models.functions import Coalesce
+from django.contrib.postgres.search import SearchVectorField
 from phonenumber_field.modelfields import PhoneNumberField
 from datetime import timedelta
+from .search import SearchGinIndex, build_search_document
 
 
 def validate_file_size(file):
@@ -68,6 +71,55 @@ DURATION_CHOICES = [
     (30, "1 месяц"),
 ]
 
+class PublicationQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Итоги из денормализованной таблицы PublicationStats — без SUM/COUNT по связанным таблицам.
+        """
+        return self.select_related('stats').annotate(
+            donated_sum=Coalesce('stats__donated_total', Value(0),
+                                 output_field=DecimalField(max_digits=12, decimal_places=2)),
+            views_count=Coalesce('stats__view_count', Value(0)),
+            comments_count=Coalesce('stats__comment_count', Value(0)),
+        )
+
+    def _prefetch_relations(self, names):
+        from donations.models import Donation
+        from .pagination import SUB_RESOURCE_PAGE_SIZE
+
+        # Списки, растущие с популярностью, подгружаются только первой страницей в <связь>_page
+        # (срез в Prefetch — оконная функция по каждой публикации; без to_attr Django его не принимает)
+        first_page = slice(None, SUB_RESOURCE_PAGE_SIZE)
+        relations = {
+            'images': 'images',
+            'videos': 'videos',
+            'documents': Prefetch('documents', to_attr='documents_page', queryset=PublicationDocument.objects.order_by(
+                '-uploaded_at', '-id')[first_page]),
+            'views': Prefetch('views', to_attr='views_page',
+                              queryset=View.objects.order_by('-viewed_at', '-id')[first_page]),
+            'donations': Prefetch('donations', to_attr='donations_page', queryset=Donation.objects.select_related(
+                'donor__profile').order_by('-created_at', '-id')[first_page]),
+        }
+        return [relations[name] for name in relations if name in names]
+
+    def for_serializer(self, expand=()):
+        """
+        Подгружает всё, что читает PublicationSerializer, фиксированным числом запросов
+        (просмотры — только если запрошены через ?expand=views).
+        """
+        return self.select_related('author__profile', 'stats').prefetch_related(
+            *self._prefetch_relations({'images', 'videos', 'documents', 'donations', *expand})
+        )
+
+    def for_card(self, expand=()):
+        """
+        То же для PublicationCardSerializer: изображения для обложки и только запрошенные связи.
+        """
+        return self.select_related('author__profile', 'stats').prefetch_related(
+            *self._prefetch_relations({'images', *expand})
+        )
+
+
 # Models
 class Publication(models.Model):
     CATEGORY_CHOICES = [
@@ -103,15 +155,40 @@ class Publication(models.Model):
     expires_at = models.DateTimeField(blank=True, null=True) #дата окончания
     verification_status = models.CharField(max_length=20,choices=VERIFICATION_STATUS_CHOICES,default='pending',
         help_text="Статус проверки всех загруженных документов")
+    # Поисковый индекс (publications/search.py): нормализованный текст и tsvector для Postgres
+    search_document = models.TextField(blank=True, default='', editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PublicationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Ночной цикл publications/lifecycle.py: выборки по статусу/сроку и по возрасту архива
+            models.Index(fields=['status', 'expires_at'], name='publication_status_expires_idx'),
+            models.Index(fields=['is_archived', 'updated_at'], name='publication_archive_idx'),
+            # Поиск publications/search.py: tsvector и подстрока по search_document (pg_trgm), только Postgres
+            SearchGinIndex(fields=['search_vector'], name='publication_search_vector_gin'),
+            SearchGinIndex(fields=['search_document'], name='publication_search_doc_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+    @property
+    def counters(self):
+        """
+        Счётчики публикации; если строка ещё не создана — нулевые значения без записи в БД.
+        """
+        try:
+            return self.stats
+        except PublicationStats.DoesNotExist:
+            return PublicationStats(publication=self)
 
     def total_donated(self):
-        return self.donations.aggregate(total=Sum('donor_amount'))['total'] or 0
+        return self.counters.donated_total
 
     def total_views(self):
-        return self.views.count()
+        return self.counters.view_count
 
     def total_comments(self):
-        return self.comments.count() if hasattr(self, 'comments') else 0
+        return self.counters.comment_count
 
     def donation_percentage(self):
         total = self.total_donated()
@@ -120,15 +197,52 @@ class Publication(models.Model):
     def save(self, *args, **kwargs):
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(days=self.duration_days)
+        self.search_document = build_search_document(self)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
 
+class PublicationStats(models.Model):
+    """
+    Денормализованные счётчики публикации. Обновляются инкрементально сигналами
+    (publications/signals.py), пересобираются командой rebuild_publication_stats.
+    """
+    publication = models.OneToOneField(Publication, on_delete=models.CASCADE, primary_key=True,
+                                       related_name='stats')
+    donated_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+    view_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    commenter_count = models.PositiveIntegerField(default=0)  # уникальные авторы комментариев
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for publication {self.publication_id}"
+
+
+class TrendingPublication(models.Model):
+    """
+    Предрассчитанный топ публикаций (см. publications/trending.py), обновляется периодической задачей.
+    """
+    rank = models.PositiveSmallIntegerField(unique=True)
+    publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"#{self.rank} {self.publication_id} ({self.score:.2f})"
+
+
 class PublicationImage(models.Model):
     publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='publications/images/', validators=[validate_file_size, validate_image_format])
+    # WEBP-варианты рядом с оригиналом (demeu/image_variants.py), строятся задачей после загрузки
+    variants = models.JSONField(default=dict, blank=True, editable=False)
 
 
 class PublicationVideo(models.Model):
@@ -168,6 +282,11 @@ class PublicationDocument(models.Model):
     verification_details = models.JSONField(null=True, blank=True)
     extracted_data = models.JSONField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['publication', '-uploaded_at', '-id'], name='document_publication_page_idx'),
+        ]
+
     def __str__(self):
         return f"{self.publication.title} - {self.get_document_type_display()}"
 
@@ -188,7 +307,16 @@ class PublicationDocument(models.Model):
 class View(models.Model):
     publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name='views')
     viewer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    viewed_at = models.DateTimeField(auto_now_add=True)  # при буферизации — время сброса буфера
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['publication', 'viewer'], name='unique_publication_view'),
+        ]
+        indexes = [
+            # Постраничный список зрителей /publications/<pk>/viewers/
+            models.Index(fields=['publication', '-viewed_at', '-id'], name='view_publication_page_idx'),
+        ]
 
     def __str__(self):
         return f"User {self.viewer} viewed publication {self.publication.title}"
\ No newline at end of file
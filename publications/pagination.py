@@ -0,0 +1,54 @@
+from rest_framework.pagination import CursorPagination
+
+
+# Публичные значения ?ordering= -> аннотации из PublicationQuerySet.with_totals()
+ORDERING_FIELDS = {
+    'created_at': 'created_at',
+    'total_views': 'views_count',
+    'total_donated': 'donated_sum',
+}
+
+# Доступно только при ?search= (аннотация из publications/search.py)
+SEARCH_ORDERING_FIELDS = dict(ORDERING_FIELDS, relevance='search_rank')
+
+
+def resolve_ordering(value, default='-created_at', searching=False):
+    descending = value.startswith('-')
+    fields = SEARCH_ORDERING_FIELDS if searching else ORDERING_FIELDS
+    field = fields.get(value.lstrip('-'))
+    if not field:
+        return default
+    return f"-{field}" if descending else field
+
+
+class PublicationCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация ленты: страница выбирается по значению поля сортировки,
+    а не через OFFSET, поэтому стоимость запроса не растёт с номером страницы.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+    def get_ordering(self, request, queryset, view):
+        # self.ordering уже разрешён во view через resolve_ordering();
+        # id добавляется для стабильного порядка при одинаковых значениях
+        return (self.ordering, '-id')
+
+
+# Первая страница вложенных списков в детальной публикации; дальше — отдельные эндпоинты
+SUB_RESOURCE_PAGE_SIZE = 20
+
+
+class SubResourceCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация пожертвований, просмотров и документов одной публикации
+    по индексам (publication, -<время>, -id).
+    """
+    page_size = SUB_RESOURCE_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, ordering):
+        self.ordering = ordering
@@ -0,0 +1,123 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+# Срок жизни закэшированного ответа; он же шаг, с которым меняются ETag — за это время
+# устаревают значения, не привязанные к версиям (days_remaining, /urgent/, имя и аватар автора)
+RESPONSE_CACHE_TTL = 60
+
+VERSION_PREFIX = 'response:version:'
+
+
+def enabled():
+    return getattr(settings, 'RESPONSE_CACHE_ENABLED', False)
+
+
+def get_versions(names):
+    """
+    Текущие версии по именам. Отсутствующая версия создаётся со значением «сейчас»,
+    а не с нуля: после вытеснения ключа из кэша старые ответы не станут снова актуальными.
+    """
+    keys = [VERSION_PREFIX + name for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key) or time.time_ns()
+    return [versions[key] for key in keys]
+
+
+def bump_versions(names):
+    # Версия — время изменения в наносекундах (отдаётся как Last-Modified), но строго растёт
+    keys = [VERSION_PREFIX + name for name in names]
+    current = cache.get_many(keys)
+    now = time.time_ns()
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, None)
+
+
+def _bump(names):
+    if not enabled():
+        return
+    bump_versions(names)
+    # Повторно после коммита: иначе запрос, прочитавший данные до коммита, мог закэшировать
+    # их уже под новой версией
+    transaction.on_commit(lambda: bump_versions(names))
+
+
+def bump_publications(publication_ids):
+    """
+    Изменились публикации (или их пожертвования, просмотры, комментарии, файлы):
+    сбрасывает их детальные ответы и все списки.
+    """
+    _bump([f"publication:{publication_id}" for publication_id in set(publication_ids)] + ['list'])
+
+
+def bump_lists():
+    _bump(['list'])
+
+
+def bump_all():
+    # Массовые изменения без списка id (ночной цикл публикаций, полный пересчёт счётчиков)
+    _bump(['global'])
+
+
+def list_scope(request, *args, **kwargs):
+    return ['list']
+
+
+def publication_scope(request, pk, *args, **kwargs):
+    return [f"publication:{pk}"]
+
+
+def cached_response(scope):
+    """
+    Кэш ответов анонимных GET-запросов с условным GET. Ключ и ETag строятся из версий
+    scope(request, **kwargs) (плюс 'global' и шаг RESPONSE_CACHE_TTL), поэтому If-None-Match
+    проверяется без обращения к БД и без чтения самого ответа. Запросы с Authorization
+    (ответ зависит от пользователя, деталь отмечает просмотр) идут мимо кэша.
+    Оборачивает view, уже обёрнутую @api_view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not enabled() or request.method not in ('GET', 'HEAD') or 'HTTP_AUTHORIZATION' in request.META:
+                return view(request, *args, **kwargs)
+
+            bucket = int(time.time() // RESPONSE_CACHE_TTL)
+            versions = get_versions(['global', *scope(request, *args, **kwargs)])
+            version = '.'.join(str(value) for value in [*versions, bucket])
+            digest = hashlib.md5(
+                f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}".encode()
+            ).hexdigest()
+            etag = quote_etag(f"{view.__name__}-{digest[:12]}-{version}")
+            last_modified = max(max(versions) // 10 ** 9, bucket * RESPONSE_CACHE_TTL)
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                key = f"response:{view.__name__}:{digest}:{version}"
+                entry = cache.get(key)
+                if entry is not None:
+                    content, content_type = entry
+                    response = HttpResponse(content, content_type=content_type)
+                else:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    if hasattr(response, 'render'):
+                        response.render()
+                    cache.set(key, (response.content, response['Content-Type']), RESPONSE_CACHE_TTL)
+
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,131 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.backends.ddl_references import Statement
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+
+class SearchGinIndex(GinIndex):
+    """
+    GIN-индекс поиска (Publication.Meta.indexes). На других БД (SQLite в тестах) не создаётся:
+    поиск там идёт подстрокой по search_document без индекса.
+    """
+
+    def create_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('')
+        return super().create_sql(model, schema_editor, *args, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('')
+        return super().remove_sql(model, schema_editor, **kwargs)
+
+
+def normalize_text(text):
+    return re.sub(r'[^\w\s]', '', text.lower())
+
+
+def build_search_document(publication):
+    """
+    Нормализованный текст для поиска: поля разделены переводом строки,
+    чтобы фраза не «склеивалась» на стыке заголовка и описания.
+    """
+    email = publication.author.email if publication.author_id else ''
+    return normalize_text("\n".join([publication.title or '', publication.description or '', email]))
+
+
+class SimpleSearchBackend:
+    """
+    Поиск подстрокой по search_document. Работает на любой БД (SQLite в тестах);
+    релевантность — совпадения в заголовке весят больше, чем в остальном тексте.
+    """
+
+    def condition(self, terms, phrase):
+        query = Q()
+        for term in terms:
+            query |= Q(search_document__contains=term)
+        return query
+
+    def rank(self, terms, phrase):
+        total = Value(0)
+        for term in terms:
+            total = total + Case(
+                When(title__icontains=term, then=Value(2)),
+                When(search_document__contains=term, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        return total
+
+    def search(self, queryset, search):
+        search_words = [word for word in (normalize_text(w) for w in search.split()) if word]
+        if not search_words:
+            return queryset
+
+        if len(search_words) <= 2:
+            # Если 1-2 слова → ищем любое из слов (логика OR)
+            terms, phrase = search_words, False
+        else:
+            # Если 3+ слова → ищем полное совпадение фразы
+            terms, phrase = [" ".join(search_words)], True
+
+        return queryset.filter(self.condition(terms, phrase)).annotate(search_rank=self.rank(terms, phrase))
+
+
+class PostgresSearchBackend(SimpleSearchBackend):
+    """
+    tsvector (GIN) со стеммингом 'russian' и конфигурацией 'simple' для казахских слов
+    и email; подстрочный поиск по search_document ускоряется триграммным GIN-индексом.
+    """
+    configs = ('russian', 'simple')
+
+    def ts_query(self, terms, phrase):
+        query = None
+        for term in terms:
+            for config in self.configs:
+                if phrase:
+                    term_query = SearchQuery(term, config=config, search_type='phrase')
+                else:
+                    # префиксный поиск, как у icontains; normalize_text уже убрал спецсимволы tsquery
+                    term_query = SearchQuery(f"{term}:*", config=config, search_type='raw')
+                query = term_query if query is None else query | term_query
+        return query
+
+    def condition(self, terms, phrase):
+        return Q(search_vector=self.ts_query(terms, phrase)) | super().condition(terms, phrase)
+
+    def rank(self, terms, phrase):
+        return SearchRank(F('search_vector'), self.ts_query(terms, phrase))
+
+
+def get_search_backend():
+    path = getattr(settings, 'PUBLICATION_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SimpleSearchBackend()
+
+
+def search_publications(queryset, search):
+    return get_search_backend().search(queryset, search)
+
+
+def update_search_vector(publication_ids):
+    """
+    Пересчитывает tsvector (только Postgres; на других БД поиск идёт по search_document).
+    """
+    if connection.vendor != 'postgresql':
+        return
+    from .models import Publication
+
+    Publication.objects.filter(id__in=publication_ids).update(search_vector=(
+        SearchVector('title', weight='A', config='russian')
+        + SearchVector('description', weight='B', config='russian')
+        + SearchVector('search_document', weight='C', config='simple')
+    ))
@@ -4,15 +4,24 @@ from rest_framework import serializers
 from datetime import date
 from donations import models
 from .models import Publication, PublicationImage, PublicationVideo, View, PublicationDocument
+from .pagination import SUB_RESOURCE_PAGE_SIZE
 from profiles.models import Profile
+from profiles.avatars import avatar_url
+from demeu.image_variants import srcset, variant_url
 from donations.models import Donation
 from verification.tasks import process_document_verification
 
 
 class PublicationImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = PublicationImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'srcset']
+
+    def get_srcset(self, obj):
+        # {"320w": url, "960w": url, "1920w": url}; пустой, пока варианты не построены
+        return srcset(obj, self.context.get('request'))
 
 
 class PublicationVideoSerializer(serializers.ModelSerializer):
@@ -30,10 +39,8 @@ class DonationSerializer(serializers.ModelSerializer):
         fields = ['donor_name', 'donor_amount', 'avatar', 'created_at']
 
     def get_avatar(self, obj):
-        if obj.donor and hasattr(obj.donor, 'profile') and obj.donor.profile.avatar:
-            request = self.context.get('request')
-            avatar_url = obj.donor.profile.avatar.url
-            return request.build_absolute_uri(avatar_url) if request else avatar_url
+        if obj.donor and hasattr(obj.donor, 'profile'):
+            return avatar_url(obj.donor.profile, 48, self.context.get('request'))
         return None
 
     def get_donor_name(self, obj):
@@ -81,7 +88,53 @@ class PublicationDocumentSerializer(serializers.ModelSerializer):
 
 
 
-class PublicationSerializer(serializers.ModelSerializer):
+def parse_field_list(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def requested_expand(request):
+    return parse_field_list(request.query_params.get('expand')) if request else set()
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b — вывести только перечисленные поля; ?expand=x,y — добавить тяжёлые поля из
+    expandable_fields, которые по умолчанию не выводятся. Параметры берутся из context
+    ('fields'/'expand') или, для корневого сериализатора, из запроса; вложенные сериализаторы
+    (избранное, профиль) параметры запроса не наследуют.
+    """
+    expandable_fields = ()
+
+    def _requested(self, name):
+        if name in self.context:
+            return parse_field_list(self.context[name]) if isinstance(self.context[name], str) \
+                else set(self.context[name])
+        parent = self.parent
+        is_root = parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+        request = self.context.get('request')
+        if not is_root or request is None or not hasattr(request, 'query_params'):
+            return None
+        value = request.query_params.get(name)
+        return parse_field_list(value) if value is not None else None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only = self._requested('fields')
+        expand = self._requested('expand') or set()
+        for name in self.expandable_fields:
+            if name not in expand and not (only and name in only):
+                fields.pop(name, None)
+        if only:
+            for name in list(fields):
+                if name not in only and not fields[name].write_only:
+                    fields.pop(name)
+        return fields
+
+
+class PublicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Список всех просмотров растёт с историей публикации — только по ?expand=views
+    expandable_fields = ('views',)
+
     images = PublicationImageSerializer(many=True, read_only=True)
     videos = PublicationVideoSerializer(many=True, read_only=True)
     uploaded_images = serializers.ListField(child=serializers.ImageField(), write_only=True, required=False)
@@ -99,10 +152,13 @@ class PublicationSerializer(serializers.ModelSerializer):
     delete_all_images = serializers.BooleanField(write_only=True, required=False, default=False)
     delete_all_videos = serializers.BooleanField(write_only=True, required=False, default=False)
 
-    documents = PublicationDocumentSerializer(many=True, read_only=True)
+    # Пожертвования, просмотры и документы — первая страница (новые сначала); полностью —
+    # /publications/<pk>/donations/, /viewers/, /documents/
+    documents = serializers.SerializerMethodField()
     donations = serializers.SerializerMethodField()
+    donation_count = serializers.SerializerMethodField()
     donation_percentage = serializers.SerializerMethodField()
-    views = ViewSerializer(many=True, read_only=True)
+    views = serializers.SerializerMethodField()
     total_views = serializers.SerializerMethodField()
     total_donated = serializers.SerializerMethodField()
     total_comments = serializers.SerializerMethodField()
@@ -121,7 +177,7 @@ class PublicationSerializer(serializers.ModelSerializer):
             'contact_phone', 'created_at', 'updated_at', 'images',
             'videos', 'uploaded_images', 'uploaded_videos','uploaded_documents','uploaded_document_types',
             'deleted_images', 'deleted_videos', 'delete_all_images', 'delete_all_videos',
-            'documents', 'donations', 'views', 'donation_percentage',
+            'documents', 'donations', 'donation_count', 'views', 'donation_percentage',
             'total_views', 'total_donated', 'total_comments','duration_days',
             'days_remaining','status', 'verification_status',]
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
@@ -137,38 +193,54 @@ class PublicationSerializer(serializers.ModelSerializer):
         return obj.author.email if obj.author else None
 
     def get_author_avatar(self, obj):
-        if obj.author and hasattr(obj.author, 'profile') and obj.author.profile.avatar:
-            request = self.context.get('request')
-            avatar_url = obj.author.profile.avatar.url
-            return request.build_absolute_uri(avatar_url) if request else avatar_url
+        if obj.author and hasattr(obj.author, 'profile'):
+            return avatar_url(obj.author.profile, 96, self.context.get('request'))
         return None
 
 
+    def first_page(self, obj, relation, *ordering):
+        # Первая страница из prefetch Publication.objects.for_serializer()/for_card(); без него —
+        # тот же срез отдельным запросом, а не весь список
+        if hasattr(obj, f"{relation}_page"):
+            return getattr(obj, f"{relation}_page")
+        return getattr(obj, relation).order_by(*ordering)[:SUB_RESOURCE_PAGE_SIZE]
+
+    def represent(self, serializer_class, items):
+        # Один экземпляр вложенного сериализатора на весь список публикаций: создание
+        # сериализатора (копирование полей) на каждую публикацию стоило дороже самих данных
+        serializers_cache = self.__dict__.setdefault('_nested_serializers', {})
+        if serializer_class not in serializers_cache:
+            serializers_cache[serializer_class] = serializer_class(context=self.context)
+        serializer = serializers_cache[serializer_class]
+        return [serializer.to_representation(item) for item in items]
+
+    def get_documents(self, obj):
+        return self.represent(PublicationDocumentSerializer, self.first_page(obj, 'documents', '-uploaded_at', '-id'))
+
+    def get_views(self, obj):
+        return self.represent(ViewSerializer, self.first_page(obj, 'views', '-viewed_at', '-id'))
+
     def get_donations(self, obj):
-        donations = obj.donations.select_related('donor')
-        return [
-            {
-                "donor_name": f"{donation.donor.first_name} {donation.donor.last_name}".strip()
-                if donation.donor else "Anonymous",
-                "donor_amount": donation.donor_amount
-            }
-            for donation in donations
-        ]
+        return self.represent(DonationSerializer, self.first_page(obj, 'donations', '-created_at', '-id'))
+
+    def get_donation_count(self, obj):
+        return obj.counters.donation_count
 
     def get_donation_percentage(self, obj):
-        total_donations = obj.donations.aggregate(total=Sum('donor_amount'))['total'] or 0
+        total_donations = self.get_total_donated(obj)
         if obj.amount:
             return (total_donations / obj.amount) * 100
         return 0
 
+    # Итоги читаются из PublicationStats (select_related('stats') в for_serializer)
     def get_total_views(self, obj):
-        return obj.views.count()
+        return obj.counters.view_count
 
     def get_total_donated(self, obj):
-        return Donation.objects.filter(publication=obj).aggregate(total=Sum('donor_amount'))['total'] or 0
+        return obj.counters.donated_total
 
     def get_total_comments(self, obj):
-        return obj.comments.count()
+        return obj.counters.comment_count
 
     def get_days_remaining(self, obj):
         if obj.expires_at:
@@ -272,4 +344,40 @@ class PublicationSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
 
-        return instance
\ No newline at end of file
+        return instance
+
+
+class PublicationCardSerializer(PublicationSerializer):
+    """
+    Компактная карточка для списков (лента, топ, архив, избранное, профиль): итоги из
+    PublicationStats и обложка вместо вложенных списков. Изображения, видео, документы,
+    пожертвования и просмотры — по ?expand= (Publication.objects.for_card(expand)).
+    """
+    expandable_fields = ('images', 'videos', 'documents', 'donations', 'views')
+
+    cover_image = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Publication
+        fields = [
+            'id', 'author_id', 'author_name', 'author_avatar', 'title', 'category', 'description',
+            'amount', 'created_at', 'duration_days', 'days_remaining', 'status', 'verification_status',
+            'total_views', 'total_donated', 'total_comments', 'donation_count', 'donation_percentage',
+            'cover_image', 'cover_srcset',
+            'images', 'videos', 'documents', 'donations', 'views',
+        ]
+        read_only_fields = fields
+
+    def cover(self, obj):
+        # .all() использует prefetch из for_card(): первое изображение без отдельного запроса
+        return next(iter(obj.images.all()), None)
+
+    def get_cover_image(self, obj):
+        # Вариант 'medium' вместо оригинала (до 50 МБ); пока варианты не построены — оригинал
+        image = self.cover(obj)
+        return variant_url(image, 'medium', self.context.get('request')) if image else None
+
+    def get_cover_srcset(self, obj):
+        image = self.cover(obj)
+        return srcset(image, self.context.get('request')) if image else {}
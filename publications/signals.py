@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from demeu.image_variants import delete_variants, schedule_variants
+
+from .models import Publication, PublicationDocument, PublicationImage, PublicationVideo, View
+from .response_cache import bump_publications
+from .stats import ensure_stats, bump_stats, rebuild_stats, stats_suspended
+from .search import update_search_vector
+
+
+@receiver(post_save, sender=Publication)
+def create_publication_stats(sender, instance, created, **kwargs):
+    if created:
+        ensure_stats(instance.id)
+
+
+@receiver(post_save, sender=Publication)
+def index_publication(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'title', 'description'} & set(update_fields):
+        update_search_vector([instance.id])
+
+
+@receiver(post_save, sender='donations.Donation')
+def count_donation(sender, instance, created, **kwargs):
+    if created:
+        bump_stats(instance.publication_id, donated_total=instance.donor_amount, donation_count=1)
+    else:
+        # Редкий случай правки суммы — проще пересчитать одну публикацию
+        rebuild_stats([instance.publication_id])
+
+
+@receiver(post_delete, sender='donations.Donation')
+def uncount_donation(sender, instance, **kwargs):
+    bump_stats(instance.publication_id, create=False, donated_total=-instance.donor_amount, donation_count=-1)
+
+
+@receiver(post_save, sender=View)
+def count_view(sender, instance, created, **kwargs):
+    if created:
+        bump_stats(instance.publication_id, view_count=1)
+
+
+@receiver(post_delete, sender=View)
+def uncount_view(sender, instance, **kwargs):
+    bump_stats(instance.publication_id, create=False, view_count=-1)
+
+
+@receiver(post_save, sender='comments.Comment')
+def count_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+    first_comment = not sender.objects.filter(
+        publication_id=instance.publication_id, author_id=instance.author_id
+    ).exclude(id=instance.id).exists()
+    bump_stats(instance.publication_id, comment_count=1, commenter_count=int(first_comment))
+
+
+@receiver(post_delete, sender='comments.Comment')
+def uncount_comment(sender, instance, **kwargs):
+    if stats_suspended():
+        return
+    last_comment = not sender.objects.filter(
+        publication_id=instance.publication_id, author_id=instance.author_id
+    ).exists()
+    bump_stats(instance.publication_id, create=False, comment_count=-1, commenter_count=-int(last_comment))
+
+
+# Кэш ответов (publications/response_cache.py): любая запись, видимая в публикации или списках,
+# сбрасывает версию публикации
+@receiver([post_save, post_delete], sender=Publication)
+def invalidate_publication(sender, instance, **kwargs):
+    bump_publications([instance.id])
+
+
+@receiver([post_save, post_delete], sender='donations.Donation')
+@receiver([post_save, post_delete], sender='comments.Comment')
+@receiver([post_save, post_delete], sender=View)
+@receiver([post_save, post_delete], sender=PublicationImage)
+@receiver([post_save, post_delete], sender=PublicationVideo)
+@receiver([post_save, post_delete], sender=PublicationDocument)
+def invalidate_related(sender, instance, **kwargs):
+    bump_publications([instance.publication_id])
+
+
+@receiver(post_save, sender=PublicationImage)
+def build_image_variants(sender, instance, created, **kwargs):
+    if created:
+        from .tasks import build_publication_image_variants
+        transaction.on_commit(lambda: schedule_variants(build_publication_image_variants, instance.pk))
+
+
+@receiver(post_delete, sender=PublicationImage)
+def delete_image_variants(sender, instance, **kwargs):
+    delete_variants(instance)
@@ -0,0 +1,131 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from demeu.view_buffer import ViewBuffer
+
+from .models import Publication, PublicationStats, View
+from .response_cache import bump_all, bump_publications
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended_stats():
+    """
+    Отключает инкрементальные счётчики в текущем потоке — для массового удаления публикаций,
+    когда их строки статистики удаляются каскадом вместе с ними.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def stats_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def ensure_stats(publication_id):
+    PublicationStats.objects.get_or_create(publication_id=publication_id)
+
+
+def bump_stats(publication_id, create=True, **deltas):
+    """
+    Атомарно прибавляет deltas к счётчикам через F()-выражения, без чтения строки в Python.
+    create=False используется при удалениях: при каскадном удалении публикации
+    строку статистики создавать уже нельзя.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates or stats_suspended():
+        return
+    updated = PublicationStats.objects.filter(publication_id=publication_id).update(**updates)
+    if not updated and create:
+        ensure_stats(publication_id)
+        PublicationStats.objects.filter(publication_id=publication_id).update(**updates)
+
+
+def rebuild_stats(publication_ids=None, batch_size=1000):
+    """
+    Пересчитывает счётчики с нуля групповыми запросами. Возвращает число обработанных публикаций.
+    """
+    from donations.models import Donation
+    from comments.models import Comment
+
+    publications = Publication.objects.all()
+    if publication_ids is not None:
+        publications = publications.filter(id__in=publication_ids)
+    ids = list(publications.values_list('id', flat=True))
+
+    total = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+
+        donations = {
+            row['publication']: row for row in
+            Donation.objects.filter(publication__in=chunk).values('publication')
+            .annotate(total=Sum('donor_amount'), count=Count('id'))
+        }
+        views = dict(
+            View.objects.filter(publication__in=chunk).values('publication')
+            .annotate(count=Count('id')).values_list('publication', 'count')
+        )
+        comments = {
+            row['publication']: row for row in
+            Comment.objects.filter(publication__in=chunk).values('publication')
+            .annotate(count=Count('id'), authors=Count('author', distinct=True))
+        }
+
+        stats = []
+        for publication_id in chunk:
+            donation_row = donations.get(publication_id, {})
+            comment_row = comments.get(publication_id, {})
+            stats.append(PublicationStats(
+                publication_id=publication_id,
+                donated_total=donation_row.get('total') or 0,
+                donation_count=donation_row.get('count', 0),
+                view_count=views.get(publication_id, 0),
+                comment_count=comment_row.get('count', 0),
+                commenter_count=comment_row.get('authors', 0),
+            ))
+
+        PublicationStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['publication'],
+            update_fields=['donated_total', 'donation_count', 'view_count', 'comment_count', 'commenter_count'],
+        )
+        total += len(stats)
+
+    if publication_ids is None:
+        bump_all()
+    else:
+        bump_publications(ids)
+    return total
+
+
+def recount_views(publication_ids):
+    """
+    Пересчитывает view_count одним UPDATE с подзапросом: после bulk_create сигналы
+    не срабатывают, а точное значение не зависит от конфликтов вставки.
+    """
+    PublicationStats.objects.bulk_create(
+        [PublicationStats(publication_id=publication_id) for publication_id in publication_ids],
+        ignore_conflicts=True,
+    )
+    views = View.objects.filter(publication=OuterRef('publication')).order_by().values('publication') \
+        .annotate(count=Count('id')).values('count')
+    updated = PublicationStats.objects.filter(publication_id__in=publication_ids).update(
+        view_count=Coalesce(Subquery(views), Value(0))
+    )
+    bump_publications(publication_ids)
+    return updated
+
+
+# Просмотры публикаций: publication_detail только отмечает их в буфере,
+# в БД они попадают задачей flush_publication_views
+publication_views = ViewBuffer('publication', View, 'publication', on_flush=recount_views)
@@ -1,35 +1,26 @@
 from celery import shared_task
-from .models import Publication
-from django.utils import timezone
-from datetime import timedelta
+from .lifecycle import run_lifecycle
+
+
+PHASE_ICONS = {'successful': '✓', 'expired': '⌛', 'purged': '🗑'}
 
 
 @shared_task
 def check_publication_status():
     print("🕒 Циклическая задача запущена: проверка публикаций")
 
-    now = timezone.now()
-    three_months_ago = now - timedelta(days=90)
-    publications = Publication.objects.filter(status='active')
-    for pub in publications:
-        donated = pub.total_donated()
-        if donated >= pub.amount:
-            pub.status = 'successful'
-            pub.is_archived = True
-            pub.save()
-            print(f"[✓] {pub.title} marked as successful.")
-        elif pub.expires_at and pub.expires_at <= now:
-            pub.status = 'expired'
-            pub.is_archived = True
-            pub.save()
-            print(f"[⌛] {pub.title} expired and archived.")
-
-    # Удаляем публикации, которые были архивированы более 3 месяцев назад
-    old_archived = Publication.objects.filter(is_archived=True, updated_at__lte=three_months_ago)
-    count = old_archived.count()
-    old_archived.delete()
-    if count:
-        print(f"[🗑] Удалено {count} архивных публикаций старше 3 месяцев.")
+    phases = run_lifecycle()
+    for name, phase in phases.items():
+        print(f"[{PHASE_ICONS[name]}] {name}: {phase['rows']} публикаций за {phase['seconds']:.3f} с")
+    return phases
+
+
+@shared_task
+def refresh_trending_publications():
+    from publications.trending import refresh_trending
+
+    ranking = refresh_trending()
+    print(f"[📈] Топ публикаций пересчитан: {len(ranking)} позиций.")
 
 
 @shared_task
@@ -37,36 +28,53 @@ def notify_expiring_publications():
     from django.utils import timezone
     from datetime import timedelta
     from publications.models import Publication
-    from notifications.utils import notify_user
+    from notifications.models import Notification
+    from notifications.utils import send_notifications
 
-    now = timezone.now()
-    tomorrow = now + timedelta(days=1)
-    today = now.date()
+    today = timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+    verbs = {
+        tomorrow: "⏰ Ваша публикация скоро истекает",  # За день до истечения
+        today: "❗ Сегодня заканчивается срок вашей публикации",  # В день истечения
+    }
 
-    # За день до истечения
-    almost_expired = Publication.objects.filter(
-        expires_at__date=tomorrow.date(),
+    # Один SELECT по обоим дням и один bulk INSERT вместо запроса автора и INSERT на публикацию
+    expiring = Publication.objects.filter(
+        expires_at__date__in=list(verbs),
         status='active',
-    )
-
-    for pub in almost_expired:
-        notify_user(
-            user=pub.author,
-            verb="⏰ Ваша публикация скоро истекает",
-            target=pub.title,
-            url=f"/post/{pub.id}"
-        )
+    ).values_list('id', 'author_id', 'title', 'expires_at')
 
-    # В день истечения
-    expiring_today = Publication.objects.filter(
-        expires_at__date=today,
-        status='active',
-    )
-
-    for pub in expiring_today:
-        notify_user(
-            user=pub.author,
-            verb="❗ Сегодня заканчивается срок вашей публикации",
-            target=pub.title,
-            url=f"/post/{pub.id}"
+    notifications = send_notifications([
+        Notification(
+            recipient_id=author_id,
+            verb=verbs[timezone.localdate(expires_at)],
+            target=title,
+            url=f"/post/{pub_id}"
         )
+        for pub_id, author_id, title, expires_at in expiring.iterator()
+    ])
+    print(f"[⏰] Напоминаний об истечении: {len(notifications)}")
+
+
+@shared_task
+def flush_publication_views():
+    from publications.stats import publication_views
+
+    saved = publication_views.flush()
+    if saved:
+        print(f"[👁] Просмотров публикаций записано: {saved}")
+    return saved
+
+
+@shared_task
+def build_publication_image_variants(image_id):
+    from demeu.image_variants import build_variants
+    from publications.models import PublicationImage
+    from publications.response_cache import bump_publications
+
+    image = PublicationImage.objects.filter(pk=image_id).first()
+    if image is None:
+        return None
+    variants = build_variants(image)
+    bump_publications([image.publication_id])  # в ответах появились srcset и уменьшенная обложка
+    return variants
@@ -1,3 +1,601 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from comments.models import Comment
+from donations.models import Donation
+from demeu.image_variants import build_variants
+from .lifecycle import close_finished_publications, purge_archived, run_lifecycle
+from .models import Publication, PublicationImage, PublicationStats, TrendingPublication, View
+from .management.commands.build_image_variants import process_chunk
+from .stats import publication_views
+
+
+def make_user(email):
+    return User.objects.create_user(email=email, first_name="Test", last_name="User", password="pass12345")
+
+
+def make_publication(author, **kwargs):
+    data = {
+        'author': author,
+        'title': "Помощь на лечение",
+        'category': 'medicine',
+        'description': "Сбор средств на операцию",
+        'bank_details': '4400430012345678',
+        'amount': 100000,
+        'contact_name': "Test",
+        'contact_email': author.email,
+        'contact_phone': '+77011234567',
+        'status': 'active',
+    }
+    data.update(kwargs)
+    return Publication.objects.create(**data)
+
+
+class PublicationFeedQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        for i in range(12):
+            publication = make_publication(self.author, title=f"Публикация {i}")
+            Donation.objects.create(publication=publication, donor=self.donor, donor_amount=1000 + i)
+            Donation.objects.create(publication=publication, donor=None, donor_amount=500)
+            View.objects.create(publication=publication, viewer=self.donor)
+            Comment.objects.create(publication=publication, author=self.donor, content="Удачи!")
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_page_query_count_does_not_depend_on_page_size(self):
+        small, _ = self.count_queries('/publications/?page_size=2')
+        large, response = self.count_queries('/publications/?page_size=12')
+
+        self.assertEqual(small, large)
+        # основной запрос + prefetch images (обложка карточки)
+        self.assertLessEqual(large, 2)
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_cursor_walks_all_publications_once(self):
+        seen = []
+        url = '/publications/?page_size=5&ordering=-total_donated'
+        while url:
+            response = self.client.get(url)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(len(set(seen)), 12)
+
+    def test_totals_are_not_multiplied_by_joins(self):
+        response = self.client.get('/publications/?page_size=1&ordering=created_at&expand=donations')
+        item = response.data['results'][0]
+
+        self.assertEqual(item['total_donated'], 1500)
+        self.assertEqual(item['total_views'], 1)
+        self.assertEqual(item['total_comments'], 1)
+        self.assertEqual(len(item['donations']), 2)
+
+
+class PublicationSparseFieldsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        self.publication = make_publication(self.author)
+        Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=1000)
+        View.objects.create(publication=self.publication, viewer=self.donor)
+
+    def test_list_returns_cards_without_nested_collections(self):
+        item = self.client.get('/publications/').data[0]
+
+        self.assertEqual(item['total_donated'], 1000)
+        self.assertIsNone(item['cover_image'])
+        for heavy in ('images', 'videos', 'documents', 'donations', 'views', 'bank_details', 'contact_phone'):
+            self.assertNotIn(heavy, item)
+
+    def test_expand_adds_requested_collections(self):
+        item = self.client.get('/publications/?expand=donations,views').data[0]
+
+        self.assertEqual(len(item['donations']), 1)
+        self.assertEqual(len(item['views']), 1)
+        self.assertNotIn('documents', item)
+
+    def test_fields_trims_representation(self):
+        item = self.client.get('/publications/?fields=id,title').data[0]
+        self.assertEqual(set(item), {'id', 'title'})
+
+        detail = self.client.get(f'/publications/{self.publication.id}/?fields=id,total_views').data
+        self.assertEqual(set(detail), {'id', 'total_views'})
+
+    def test_detail_lists_views_only_when_expanded(self):
+        detail = self.client.get(f'/publications/{self.publication.id}/').data
+        self.assertIn('documents', detail)
+        self.assertNotIn('views', detail)
+
+        detail = self.client.get(f'/publications/{self.publication.id}/?expand=views').data
+        self.assertEqual(len(detail['views']), 1)
+
+
+class PublicationSubResourceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = make_user("author@example.com")
+        self.publication = make_publication(self.author)
+        self.donors = User.objects.bulk_create([
+            User(email=f"donor{number}@example.com", first_name="Donor", last_name=str(number), password="!")
+            for number in range(25)
+        ])
+        for donor in self.donors:
+            Donation.objects.create(publication=self.publication, donor=donor, donor_amount=100)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_detail_carries_count_and_first_page(self):
+        detail = self.client.get(f'/publications/{self.publication.id}/').data
+
+        self.assertEqual(detail['donation_count'], 25)
+        self.assertEqual(len(detail['donations']), 20)
+        self.assertEqual(detail['donations'][0]['donor_name'], "Donor 24")
+
+    def test_donations_are_paginated_newest_first(self):
+        donations = self.walk(f'/publications/{self.publication.id}/donations/?page_size=10')
+
+        self.assertEqual(len(donations), 25)
+        self.assertEqual([d['donor_name'] for d in donations][:2], ["Donor 24", "Donor 23"])
+
+    def test_viewers_and_documents_endpoints(self):
+        View.objects.bulk_create([View(publication=self.publication, viewer=donor) for donor in self.donors[:3]])
+
+        self.assertEqual(len(self.walk(f'/publications/{self.publication.id}/viewers/')), 3)
+        self.assertEqual(self.walk(f'/publications/{self.publication.id}/documents/'), [])
+        self.assertEqual(self.client.get('/publications/999999/donations/').status_code, 404)
+
+    def test_inactive_publication_is_visible_to_author_and_donors_only(self):
+        self.publication.status = 'pending'
+        self.publication.save()
+        url = f'/publications/{self.publication.id}/donations/'
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(self.donors[0])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(f'/publications/{self.publication.id}/').status_code, 200)
+
+
+class PublicationStatsTests(TestCase):
+    def setUp(self):
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        self.publication = make_publication(self.author)
+
+    def stats(self):
+        self.publication.refresh_from_db()
+        return self.publication.stats
+
+    def test_counters_follow_writes(self):
+        first = Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=1000)
+        Donation.objects.create(publication=self.publication, donor=None, donor_amount=250)
+        View.objects.create(publication=self.publication, viewer=self.donor)
+        Comment.objects.create(publication=self.publication, author=self.donor, content="1")
+        second_comment = Comment.objects.create(publication=self.publication, author=self.donor, content="2")
+        Comment.objects.create(publication=self.publication, author=self.author, content="3")
+
+        stats = self.stats()
+        self.assertEqual(stats.donated_total, 1250)
+        self.assertEqual(stats.donation_count, 2)
+        self.assertEqual(stats.view_count, 1)
+        self.assertEqual(stats.comment_count, 3)
+        self.assertEqual(stats.commenter_count, 2)
+
+        first.delete()
+        second_comment.delete()
+        stats = self.stats()
+        self.assertEqual(stats.donated_total, 250)
+        self.assertEqual(stats.donation_count, 1)
+        self.assertEqual(stats.comment_count, 2)
+        self.assertEqual(stats.commenter_count, 2)
+
+    def test_rebuild_matches_incremental_counters(self):
+        from .stats import rebuild_stats
+
+        Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=700)
+        View.objects.create(publication=self.publication, viewer=self.donor)
+        Comment.objects.create(publication=self.publication, author=self.donor, content="1")
+        incremental = self.stats()
+
+        PublicationStats.objects.all().delete()
+        rebuild_stats()
+        rebuilt = self.stats()
+
+        for field in ['donated_total', 'donation_count', 'view_count', 'comment_count', 'commenter_count']:
+            self.assertEqual(getattr(rebuilt, field), getattr(incremental, field))
+
+    def test_publication_delete_cascades_without_recreating_stats(self):
+        Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=700)
+        View.objects.create(publication=self.publication, viewer=self.donor)
+        self.publication.delete()
+        self.assertFalse(PublicationStats.objects.exists())
+
+
+def legacy_top_publications(now):
+    """
+    Прежняя реализация top_publications: цикл по публикациям с запросом на каждую.
+    """
+    from django.db.models import Avg, Count, Sum
+
+    publications = Publication.objects.filter(created_at__gte=now - timedelta(days=60), status='active')
+    category_averages = Publication.objects.values('category').annotate(avg_donation=Avg('donations__donor_amount'))
+    category_averages_dict = {item['category']: float(item['avg_donation'] or 50000) for item in category_averages}
+
+    scored = []
+    for publication in publications:
+        total_donated = float(publication.donations.aggregate(total=Sum('donor_amount'))['total'] or 0)
+        total_views = float(publication.views.count())
+        total_comments = float(publication.comments.count())
+        days_old = (now - publication.created_at).days + 1
+        freshness_factor = max(0.5, 1 - 0.01 * days_old)
+        donation_rate = total_donated / days_old
+        category_factor = 1 + (category_averages_dict.get(publication.category, 50000) / 50000) * 0.2
+        active_users = publication.comments.values('author').distinct().count()
+        engagement_boost = 1 + (active_users / 50)
+        score = ((total_donated * 0.5 + total_views * 0.3 + total_comments * 0.2 + donation_rate * 0.5)
+                 * freshness_factor * category_factor * engagement_boost)
+        if total_donated > 0 or total_views > 0 or total_comments > 0:
+            scored.append((publication.id, score))
+
+    return sorted(scored, key=lambda item: item[1], reverse=True)[:10]
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        author = make_user("author@example.com")
+        users = [make_user(f"user{i}@example.com") for i in range(4)]
+        categories = ['medicine', 'animals', 'sports', 'education']
+
+        for i in range(14):
+            publication = make_publication(author, title=f"Публикация {i}", category=categories[i % 4])
+            Publication.objects.filter(id=publication.id).update(created_at=self.now - timedelta(days=i * 5))
+            for j in range(i % 5):
+                Donation.objects.create(publication=publication, donor=users[j % 4], donor_amount=1000 * (i + j))
+            for user in users[:i % 3]:
+                View.objects.create(publication=publication, viewer=user)
+            for j in range(i % 4):
+                Comment.objects.create(publication=publication, author=users[j % 2], content="+")
+
+    def test_ranking_matches_legacy_formula(self):
+        from .trending import score_publications
+
+        expected = legacy_top_publications(self.now)
+        actual = score_publications(self.now)
+
+        self.assertEqual([pid for pid, _ in actual], [pid for pid, _ in expected])
+        for (_, score), (_, legacy_score) in zip(actual, expected):
+            self.assertAlmostEqual(score, legacy_score)
+
+    def test_endpoint_reads_persisted_table(self):
+        from .trending import refresh_trending
+
+        ranking = refresh_trending(self.now)
+        self.assertEqual(TrendingPublication.objects.count(), len(ranking))
+
+        response = APIClient().get('/publications/top-publications/')
+        self.assertEqual([item['id'] for item in response.data], [pid for pid, _ in ranking])
+
+    def test_empty_ranking_is_scheduled_not_computed_on_request(self):
+        cache.clear()
+        with mock.patch('publications.tasks.refresh_trending_publications.delay') as delay:
+            for _ in range(3):
+                with CaptureQueriesContext(connection) as queries:
+                    response = APIClient().get('/publications/top-publications/')
+                self.assertEqual(response.data, [])
+                self.assertEqual(len(queries), 1)
+
+        delay.assert_called_once()
+        self.assertFalse(TrendingPublication.objects.exists())
+
+
+class PublicationSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        author = make_user("fund@example.com")
+        self.surgery = make_publication(author, title="Операция для Айгерим", description="Срочно нужна операция на сердце!")
+        self.dog = make_publication(author, title="Приют для собак", description="Корм и лечение, для бездомных собак.")
+        self.school = make_publication(author, title="Школьная форма", description="Помогите собрать детей в школу")
+
+    def search(self, query):
+        response = self.client.get('/publications/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return {item['id'] for item in response.data}
+
+    def test_one_or_two_words_use_or_logic(self):
+        self.assertEqual(self.search("собак"), {self.dog.id})
+        self.assertEqual(self.search("сердце школу"), {self.surgery.id, self.school.id})
+
+    def test_three_words_require_phrase(self):
+        self.assertEqual(self.search("нужна операция на"), {self.surgery.id})
+        self.assertEqual(self.search("операция нужна на"), set())
+
+    def test_punctuation_is_normalized(self):
+        self.assertEqual(self.search("сердце!"), {self.surgery.id})
+        self.assertEqual(self.search("лечение для бездомных"), {self.dog.id})
+
+    def test_author_email_is_searchable(self):
+        self.assertEqual(self.search("fund@example.com"), {self.surgery.id, self.dog.id, self.school.id})
+
+    def test_title_matches_rank_first(self):
+        response = self.client.get('/publications/', {'search': "операция"})
+        self.assertEqual(response.data[0]['id'], self.surgery.id)
+
+
+class PublicationLifecycleTests(TestCase):
+    def setUp(self):
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        self.now = timezone.now()
+
+    def test_marks_successful_and_expired_in_set_based_updates(self):
+        funded = make_publication(self.author, amount=1000, expires_at=self.now - timedelta(days=1))
+        Donation.objects.create(publication=funded, donor=self.donor, donor_amount=1000)
+        expired = make_publication(self.author, amount=1000, expires_at=self.now - timedelta(days=1))
+        running = make_publication(self.author, amount=1000, expires_at=self.now + timedelta(days=5))
+        Donation.objects.create(publication=running, donor=self.donor, donor_amount=999)
+        free = make_publication(self.author, amount=0)
+        PublicationStats.objects.filter(publication=free).delete()  # нет строки статистики — собрано 0
+
+        with CaptureQueriesContext(connection) as queries:
+            phases = close_finished_publications(self.now)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(phases['successful']['rows'], 2)
+        self.assertEqual(phases['expired']['rows'], 1)
+
+        statuses = dict(Publication.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[funded.id], 'successful')
+        self.assertEqual(statuses[free.id], 'successful')
+        self.assertEqual(statuses[expired.id], 'expired')
+        self.assertEqual(statuses[running.id], 'active')
+        self.assertTrue(Publication.objects.get(id=expired.id).is_archived)
+
+    def test_purges_old_archives_in_batches(self):
+        old = [make_publication(self.author, is_archived=True, status='expired') for _ in range(5)]
+        for publication in old:
+            Donation.objects.create(publication=publication, donor=self.donor, donor_amount=10)
+            View.objects.create(publication=publication, viewer=self.donor)
+        Publication.objects.filter(id__in=[p.id for p in old]).update(updated_at=self.now - timedelta(days=91))
+        recent = make_publication(self.author, is_archived=True, status='expired')
+
+        deleted = purge_archived(self.now - timedelta(days=90), batch_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(list(Publication.objects.values_list('id', flat=True)), [recent.id])
+        self.assertFalse(Donation.objects.exists())
+        self.assertEqual(PublicationStats.objects.count(), 1)
+
+    def test_run_lifecycle_reports_every_phase(self):
+        phases = run_lifecycle(self.now)
+        self.assertEqual(list(phases), ['successful', 'expired', 'purged'])
+        self.assertTrue(all(set(phase) == {'rows', 'seconds'} for phase in phases.values()))
+
+
+@override_settings(VIEW_BUFFER_ENABLED=True)
+class PublicationViewBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = make_user("author@example.com")
+        self.viewers = [make_user(f"viewer{number}@example.com") for number in range(3)]
+        self.publication = make_publication(self.author)
+        self.client = APIClient()
+
+    def view(self, user):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(f'/publications/{self.publication.id}/').status_code, 200)
+        return [q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+
+    def test_detail_reads_are_write_free_until_flush(self):
+        for viewer in self.viewers + self.viewers:
+            self.assertEqual(self.view(viewer), [])
+        self.assertFalse(View.objects.exists())
+
+        # Текущая корзина ещё открыта; через BUCKET_SECONDS * 2 она закрыта
+        self.assertEqual(publication_views.flush(), 0)
+        self.assertEqual(publication_views.flush(now=time.time() + 30), 3)
+
+        self.assertEqual(View.objects.filter(publication=self.publication).count(), 3)
+        self.assertEqual(self.publication.stats.view_count, 3)
+        self.assertEqual(publication_views.flush(now=time.time() + 60), 0)
+
+    def test_flush_ignores_existing_rows_and_deleted_publications(self):
+        View.objects.create(publication=self.publication, viewer=self.viewers[0])
+        gone = make_publication(self.author)
+        publication_views.record(self.publication.id, self.viewers[0].id)
+        publication_views.record(self.publication.id, self.viewers[1].id)
+        publication_views.record(gone.id, self.viewers[1].id)
+        gone.delete()
+
+        publication_views.flush(now=time.time() + 30)
+
+        self.assertEqual(View.objects.count(), 2)
+        self.publication.stats.refresh_from_db()
+        self.assertEqual(self.publication.stats.view_count, 2)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True, TRENDING_AUTOSCHEDULE=False)
+class PublicationResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = make_user("author@example.com")
+        self.donor = make_user("donor@example.com")
+        self.publication = make_publication(self.author)
+        self.detail = f'/publications/{self.publication.id}/'
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+        return response, len(queries)
+
+    def test_repeated_anonymous_requests_are_served_from_cache(self):
+        for url in ('/publications/', self.detail, '/publications/urgent/', '/publications/top-publications/'):
+            first, _ = self.get(url)
+            second, queries = self.get(url)
+
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(queries, 0)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second['ETag'], first['ETag'])
+            self.assertIn('Last-Modified', second)
+
+    def test_if_none_match_answers_not_modified(self):
+        etag = self.get(self.detail)[0]['ETag']
+
+        response, queries = self.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(queries, 0)
+
+        Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=700)
+        response, _ = self.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_donated'], 700)
+
+    def test_related_writes_invalidate_detail_and_lists(self):
+        writes = [
+            lambda: Donation.objects.create(publication=self.publication, donor=self.donor, donor_amount=100),
+            lambda: Comment.objects.create(publication=self.publication, author=self.donor, content="Удачи!"),
+            lambda: PublicationImage.objects.create(publication=self.publication, image='publications/images/a.png'),
+            lambda: Publication.objects.filter(id=self.publication.id).first().save(),
+            lambda: Comment.objects.filter(publication=self.publication).delete(),
+        ]
+        for write in writes:
+            detail, listing = self.get(self.detail)[0]['ETag'], self.get('/publications/')[0]['ETag']
+            write()
+            self.assertNotEqual(self.get(self.detail)[0]['ETag'], detail)
+            self.assertNotEqual(self.get('/publications/')[0]['ETag'], listing)
+
+    def test_bulk_paths_invalidate(self):
+        self.get(self.detail)
+        publication_views.save({(self.publication.id, self.donor.id)})
+        self.assertEqual(self.get(self.detail)[0].data['total_views'], 1)
+
+        Publication.objects.filter(id=self.publication.id).update(expires_at=timezone.now() - timedelta(days=1))
+        close_finished_publications()
+        # Истёкшая публикация анонимам недоступна — закэшированный ответ не должен отдаваться
+        self.assertEqual(self.get(self.detail)[0].status_code, 403)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(self.donor)
+        response, _ = self.get(self.detail, HTTP_AUTHORIZATION='Bearer token')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+def image_file(size, name="photo.png", image_format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format=image_format)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+@override_settings(IMAGE_VARIANTS_AUTOSCHEDULE=False)
+class ImageVariantsTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = self.settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.publication = make_publication(make_user("author@example.com"))
+
+    def add_image(self, content):
+        return PublicationImage.objects.create(publication=self.publication, image=content)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media, name))
+
+    def test_variants_are_stored_next_to_original_and_exposed_as_srcset(self):
+        image = self.add_image(image_file((2400, 1200)))
+        variants = build_variants(image)
+
+        self.assertEqual({name: (v['width'], v['height']) for name, v in variants.items()},
+                         {'large': (1920, 960), 'medium': (960, 480), 'thumbnail': (320, 160)})
+        directory = os.path.dirname(image.image.name)
+        for variant in variants.values():
+            self.assertEqual(os.path.dirname(variant['name']), directory)
+            self.assertTrue(self.exists(variant['name']))
+
+        card = self.client.get('/publications/').data[0]
+        self.assertTrue(card['cover_image'].endswith('_medium.webp'))
+        self.assertEqual(set(card['cover_srcset']), {'320w', '960w', '1920w'})
+        detail = self.client.get(f'/publications/{self.publication.id}/').data
+        self.assertEqual(set(detail['images'][0]['srcset']), {'320w', '960w', '1920w'})
+
+    def test_originals_with_shared_stem_keep_separate_variants(self):
+        jpeg = self.add_image(image_file((1200, 800), name="photo.jpg", image_format='JPEG'))
+        png = self.add_image(image_file((800, 1200), name="photo.png"))
+        self.assertEqual(os.path.dirname(jpeg.image.name), os.path.dirname(png.image.name))
+
+        jpeg_variants, png_variants = build_variants(jpeg), build_variants(png)
+        self.assertFalse({v['name'] for v in jpeg_variants.values()} & {v['name'] for v in png_variants.values()})
+        self.assertEqual(jpeg_variants['medium']['width'], 960)
+        self.assertEqual(png_variants['medium']['height'], 960)
+
+        png.delete()
+        self.assertTrue(all(self.exists(variant['name']) for variant in jpeg_variants.values()))
+        self.assertFalse(any(self.exists(variant['name']) for variant in png_variants.values()))
+
+    def test_small_images_are_not_upscaled(self):
+        variants = build_variants(self.add_image(image_file((200, 100))))
+
+        self.assertEqual(len({variant['name'] for variant in variants.values()}), 1)
+        self.assertEqual(variants['large']['width'], 200)
+
+    def test_unreadable_image_falls_back_to_original(self):
+        image = self.add_image(ContentFile(b"not an image", name="broken.png"))
+
+        self.assertIn('error', build_variants(image))
+        card = self.client.get('/publications/').data[0]
+        self.assertTrue(card['cover_image'].endswith('broken.png'))
+        self.assertEqual(card['cover_srcset'], {})
+
+    def test_upload_schedules_build_and_delete_removes_variants(self):
+        with override_settings(IMAGE_VARIANTS_AUTOSCHEDULE=True), \
+                mock.patch('publications.tasks.build_publication_image_variants.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            image = self.add_image(image_file((1000, 1000)))
+        delay.assert_called_once_with(image.pk)
+
+        names = [variant['name'] for variant in build_variants(image).values()]
+        image.delete()
+        self.assertFalse(any(self.exists(name) for name in names))
+
+    def test_backfill_chunk_processes_pending_images(self):
+        images = [self.add_image(image_file((640, 480), name=f"p{number}.jpg", image_format='JPEG'))
+                  for number in range(3)]
+
+        self.assertEqual(process_chunk('publications.PublicationImage', [image.pk for image in images]), (3, 0))
+        self.assertFalse(PublicationImage.objects.filter(variants={}).exists())
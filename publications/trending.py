@@ -0,0 +1,102 @@
+import heapq
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg
+from django.utils import timezone
+
+from .models import Publication, TrendingPublication
+from .response_cache import bump_lists
+
+TOP_SIZE = 10
+WINDOW_DAYS = 60
+DEFAULT_CATEGORY_AVERAGE = 50000
+# Пустой рейтинг на запросе ставит пересчёт в очередь не чаще раза в столько секунд
+REFRESH_SCHEDULE_THROTTLE = 60
+
+
+def category_averages():
+    from donations.models import Donation
+
+    rows = Donation.objects.values('publication__category').annotate(avg_donation=Avg('donor_amount'))
+    return {row['publication__category']: float(row['avg_donation'] or DEFAULT_CATEGORY_AVERAGE) for row in rows}
+
+
+def publication_score(total_donated, total_views, total_comments, active_users, days_old, category_average):
+    # Коэффициент свежести (старые публикации затухают)
+    freshness_factor = max(0.5, 1 - 0.01 * days_old)
+
+    # Скорость пожертвований (важно, как быстро собираются деньги)
+    donation_rate = total_donated / days_old
+
+    # Коэффициент категории (балансируем популярные и непопулярные категории)
+    category_factor = 1 + (category_average / DEFAULT_CATEGORY_AVERAGE) * 0.2
+
+    # Коэффициент вовлеченности пользователей (уникальные пользователи в комментариях)
+    engagement_boost = 1 + (active_users / 50)
+
+    return (
+            (total_donated * 0.5 + total_views * 0.3 + total_comments * 0.2 + donation_rate * 0.5)
+            * freshness_factor * category_factor * engagement_boost
+    )
+
+
+def score_publications(now=None, limit=TOP_SIZE):
+    """
+    Считает рейтинг всех кандидатов за два запроса (счётчики + средние по категориям)
+    и возвращает [(publication_id, score), ...] лучших limit публикаций.
+    """
+    now = now or timezone.now()
+    averages = category_averages()
+
+    candidates = (
+        Publication.objects
+        .filter(created_at__gte=now - timezone.timedelta(days=WINDOW_DAYS), status='active')
+        .values_list('id', 'category', 'created_at', 'stats__donated_total', 'stats__view_count',
+                     'stats__comment_count', 'stats__commenter_count')
+    )
+
+    scored = []
+    for publication_id, category, created_at, donated, views, comments, commenters in candidates.iterator():
+        donated, views, comments = float(donated or 0), float(views or 0), float(comments or 0)
+        if not (donated > 0 or views > 0 or comments > 0):
+            continue
+        days_old = (now - created_at).days + 1  # +1 чтобы не делить на 0
+        score = publication_score(donated, views, comments, commenters or 0, days_old,
+                                  averages.get(category, DEFAULT_CATEGORY_AVERAGE))
+        scored.append((score, publication_id))
+
+    # nlargest стабилен по порядку появления при равных значениях, как и sorted(reverse=True)
+    top = heapq.nlargest(limit, scored, key=lambda item: item[0])
+    return [(publication_id, score) for score, publication_id in top]
+
+
+def refresh_trending(now=None, limit=TOP_SIZE):
+    now = now or timezone.now()
+    ranking = score_publications(now, limit)
+    with transaction.atomic():
+        previous = list(TrendingPublication.objects.order_by('rank').values_list('publication_id', flat=True))
+        TrendingPublication.objects.all().delete()
+        TrendingPublication.objects.bulk_create([
+            TrendingPublication(rank=rank, publication_id=publication_id, score=score, computed_at=now)
+            for rank, (publication_id, score) in enumerate(ranking, start=1)
+        ])
+    if previous != [publication_id for publication_id, _ in ranking]:
+        bump_lists()
+    return ranking
+
+
+def schedule_trending_refresh():
+    """
+    Ставит refresh_trending_publications в очередь, если рейтинг пуст (первый запуск или
+    подходящих публикаций нет). Запрос пересчёт не ждёт; периодический запуск подстраховывает.
+    """
+    if not getattr(settings, 'TRENDING_AUTOSCHEDULE', True):
+        return
+    if cache.add('trending:scheduled', 1, timeout=REFRESH_SCHEDULE_THROTTLE):
+        from .tasks import refresh_trending_publications
+        try:
+            refresh_trending_publications.delay()
+        except Exception as e:
+            print("⚠️ Не удалось поставить пересчёт топа публикаций в очередь:", e)
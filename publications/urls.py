@@ -1,10 +1,14 @@
 from django.urls import path
 from .views import (publication_list, publication_detail, recommended_publications, top_publications,
-                    archived_publications, urgent_publications, active_publications, pending_publications)
+                    archived_publications, urgent_publications, active_publications, pending_publications,
+                    publication_donations, publication_viewers, publication_documents)
 
 urlpatterns = [
     path('', publication_list, name='publication-list'),
     path('<int:pk>/', publication_detail, name='publication-detail'),
+    path('<int:pk>/donations/', publication_donations, name='publication-donations'),
+    path('<int:pk>/viewers/', publication_viewers, name='publication-viewers'),
+    path('<int:pk>/documents/', publication_documents, name='publication-documents'),
     path('top-publications/', top_publications, name='top-publications'),
     path('recommended/', recommended_publications, name='recommended-publications'),
     path('archive/', archived_publications, name='publication-archive'),
@@ -1,56 +1,32 @@
-import os
-import re
-
 from django.utils import timezone
-from decimal import Decimal
-from django.db.models import Sum, Count, Q, F, FloatField, Avg
+from django.db.models import Count, Q, F
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Publication, View
+from .models import Publication, PublicationDocument, View, TrendingPublication
 from donations.models import Donation
-from .serializers import PublicationSerializer
-
-
+from .serializers import (PublicationSerializer, PublicationCardSerializer, PublicationDocumentSerializer,
+                          DonationSerializer, ViewSerializer, requested_expand)
+from .pagination import PublicationCursorPagination, SubResourceCursorPagination, resolve_ordering
+from .trending import schedule_trending_refresh
+from .search import search_publications
+from .stats import publication_views
+from .response_cache import cached_response, list_scope, publication_scope
 
-def normalize_text(text):
-    return re.sub(r'[^\w\s]', '', text.lower())
 
 
+@cached_response(list_scope)
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def publication_list(request):
     if request.method == 'GET':
-        publications = Publication.objects.annotate(
-            total_donated=Sum('donations__donor_amount'),
-            total_views=Count('views'),
-            total_comments=Count('comments'),
-        )
+        # Лента отдаёт карточки; вложенные списки — только по ?expand=
+        publications = Publication.objects.with_totals().for_card(requested_expand(request))
         search = request.GET.get('search', '').strip().lower()
         if search:
-            search_words = search.split()  # Разбиваем строку на слова
-            # print(f"Поисковый запрос: {search_words}")  # Логируем введенные слова
-
-            if len(search_words) <= 2:
-                #Если 1-2 слова → ищем любое из слов (логика OR)
-                query = Q()
-                for word in search_words:
-                    word_normalized = normalize_text(word)  # Удаляем знаки
-                    query |= (
-                            Q(description__icontains=word_normalized) |
-                            Q(title__icontains=word_normalized) |
-                            Q(author__email__icontains=word_normalized)
-                    )
-                publications = publications.filter(query)
-            else:
-                #Если 3+ слова → ищем полное совпадение текста (логика AND)
-                normalized_search = normalize_text(search)
-                publications = publications.filter(
-                    Q(description__icontains=normalized_search) |
-                    Q(title__icontains=normalized_search) |
-                    Q(author__email__icontains=normalized_search)
-                )
+            # Полнотекстовый поиск (publications/search.py): 1-2 слова — OR, 3+ слова — фраза
+            publications = search_publications(publications, search)
 
         #Фильтрация по статусу(по умолчанию показываем только активные)
         status_param = request.GET.get('status', 'active')
@@ -81,17 +57,27 @@ def publication_list(request):
         total_donated_gte = request.GET.get('total_donated__gte')
         total_donated_lte = request.GET.get('total_donated__lte')
         if total_donated_gte and total_donated_lte:
-            publications = publications.filter(total_donated__gte=total_donated_gte,
-                                               total_donated__lte=total_donated_lte)
+            publications = publications.filter(donated_sum__gte=total_donated_gte,
+                                               donated_sum__lte=total_donated_lte)
+
+        #Сортировка: по умолчанию по дате, при поиске — по релевантности
+        searching = 'search_rank' in publications.query.annotations
+        default_ordering = '-search_rank' if searching else '-created_at'
+        ordering = resolve_ordering(request.GET.get('ordering', ''), default_ordering, searching)
+
+        # Постраничный режим (keyset): включается параметром cursor или page_size
+        if 'cursor' in request.GET or 'page_size' in request.GET:
+            paginator = PublicationCursorPagination()
+            paginator.ordering = ordering
+            page = paginator.paginate_queryset(publications, request)
+            serializer = PublicationCardSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
 
-        #Сортировка
-        ordering = request.GET.get('ordering', '-created_at')  # По умолчанию сортируем по дате
-        if ordering in ['created_at', '-created_at', 'total_views', '-total_views', 'total_donated', '-total_donated']:
-            publications = publications.order_by(ordering)
+        publications = publications.order_by(ordering, '-id')
 
         # print(f" SQL-запрос: {str(publications.query)}")  # Логируем SQL-запрос
 
-        serializer = PublicationSerializer(publications, many=True)
+        serializer = PublicationCardSerializer(publications, many=True, context={'request': request})
         return Response(serializer.data)
 
     elif request.method == 'POST':
@@ -103,35 +89,39 @@ def publication_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def can_view_publication(user, publication):
+    # Неактивную публикацию видят только автор и её доноры
+    if publication.status == 'active':
+        return True
+    if not user.is_authenticated:
+        return False
+    return user.id == publication.author_id or publication.donations.filter(donor=user).exists()
+
+
+@cached_response(publication_scope)
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def publication_detail(request, pk):
     try:
-        publication = Publication.objects.annotate(
-            total_donated=Sum('donations__donor_amount'),
-            total_views=Count('views'),
-            total_comments=Count('comments')
-        ).get(pk=pk)
+        publication = Publication.objects.with_totals().for_serializer(requested_expand(request)).get(pk=pk)
     except Publication.DoesNotExist:
         return Response({"error": "Publication not found."}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        donors = [donation.donor.email for donation in publication.donations.all()]
-        if publication.status != 'active' and (request.user != publication.author and request.user.email not in donors):
+        if not can_view_publication(request.user, publication):
             return Response({"error": "This publication is not available."}, status=status.HTTP_403_FORBIDDEN)
 
         if request.user.is_authenticated:
-            if not View.objects.filter(publication=publication, viewer=request.user).exists():
-                View.objects.create(publication=publication, viewer=request.user)
+            publication_views.record(publication.id, request.user.id)
 
         serializer = PublicationSerializer(publication, context={'request': request})
         return Response(serializer.data)
 
-    publication.donation_percentage = (publication.total_donated or 0) / (publication.amount or 1) * 100
+    publication.donation_percentage = (publication.donated_sum or 0) / (publication.amount or 1) * 100
 
     if request.method == 'GET':
-        if request.user.is_authenticated and not View.objects.filter(publication=publication, viewer=request.user).exists():
-            View.objects.create(publication=publication, viewer=request.user)
+        if request.user.is_authenticated:
+            publication_views.record(publication.id, request.user.id)
 
         # serializer = PublicationSerializer(publication)
         serializer = PublicationSerializer(publication, context={'request': request})
@@ -158,61 +148,20 @@ def publication_detail(request, pk):
         return Response({"message": "Publication deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
 
+@cached_response(list_scope)
 @api_view(['GET'])
 def top_publications(request):
-    two_months_ago = timezone.now() - timezone.timedelta(days=60)
-
-    publications = Publication.objects.filter(created_at__gte=two_months_ago, status='active')
-
-    publications = publications.annotate(
-        total_donated=Sum('donations__donor_amount', default=0),
-        total_views=Count('views', distinct=True),
-        total_comments=Count('comments', distinct=True),
-    )
-
-    # Динамически рассчитываем средние суммы пожертвований по категориям
-    category_averages = Publication.objects.values('category').annotate(
-        avg_donation=Avg('donations__donor_amount')
-    )
-
-    category_averages_dict = {item['category']: float(item['avg_donation'] or 50000) for item in category_averages}
-
-    for publication in publications:
-        total_donated = float(getattr(publication, 'total_donated', Decimal(0)))
-        total_views = float(getattr(publication, 'total_views', 0))
-        total_comments = float(getattr(publication, 'total_comments', 0))
-
-        # Количество дней с момента создания публикации
-        days_old = (timezone.now() - publication.created_at).days + 1  # +1 чтобы не делить на 0
-
-        # Коэффициент свежести (старые публикации затухают)
-        freshness_factor = max(0.5, 1 - 0.01 * days_old)
-
-        # Скорость пожертвований (важно, как быстро собираются деньги)
-        donation_rate = total_donated / days_old
-
-        # Коэффициент категории (балансируем популярные и непопулярные категории)
-        category_factor = 1 + (category_averages_dict.get(publication.category, 50000) / 50000) * 0.2
+    # Рейтинг предрассчитывается задачей refresh_trending_publications (publications/trending.py)
+    top_ids = list(TrendingPublication.objects.values_list('publication_id', flat=True))
+    if not top_ids:
+        # Пустой рейтинг не пересчитывается на запросе — только ставится в очередь
+        schedule_trending_refresh()
+        return Response([])
 
-        # Коэффициент вовлеченности пользователей (уникальные пользователи в комментариях)
-        active_users = (
-            publication.comments.values('author').distinct().count()
-            if hasattr(Publication, 'comments')
-            else 0
-        )
-        engagement_boost = 1 + (active_users / 50)
+    publications = Publication.objects.filter(id__in=top_ids, status='active').for_card(requested_expand(request))
+    top_publications = sorted(publications, key=lambda p: top_ids.index(p.id))
 
-        # Финальный расчет рейтинга
-        publication.score = (
-                (total_donated * 0.5 + total_views * 0.3 + total_comments * 0.2 + donation_rate * 0.5)
-                * freshness_factor * category_factor * engagement_boost
-        )
-
-    publications = [p for p in publications if p.total_donated > 0 or p.total_views > 0 or p.total_comments > 0]
-
-    top_publications = sorted(publications, key=lambda p: p.score, reverse=True)[:10]
-
-    serializer = PublicationSerializer(top_publications, many=True)
+    serializer = PublicationCardSerializer(top_publications, many=True, context={'request': request})
     return Response(serializer.data)
 
 
@@ -242,17 +191,16 @@ def recommended_publications(request):
     preferred_categories = list(set(viewed_categories + donated_categories))
 
     # Получаем публикации из предпочтительных категорий
-    recommended_posts = Publication.objects.filter(category__in=preferred_categories, status='active').exclude(author=user)
+    recommended_posts = (Publication.objects.filter(category__in=preferred_categories, status='active')
+                         .exclude(author=user).for_card(requested_expand(request)))
 
     # Если у пользователя нет истории, просто берем самые популярные посты
     if not recommended_posts.exists():
         recommended_posts = (
-            Publication.objects.annotate(
-                total_donations=Sum('donations__donor_amount'),
-                total_views=Count('views'))
-            .filter(status='active').order_by('-total_donations', '-total_views')[:5])
+            Publication.objects.with_totals().for_card(requested_expand(request))
+            .filter(status='active').order_by('-donated_sum', '-views_count')[:5])
 
-    serializer = PublicationSerializer(recommended_posts, many=True)
+    serializer = PublicationCardSerializer(recommended_posts, many=True, context={'request': request})
     return Response(serializer.data)
 
 
@@ -260,10 +208,12 @@ def recommended_publications(request):
 @permission_classes([IsAuthenticated])
 def archived_publications(request):
     user = request.user
-    queryset = Publication.objects.filter(author=user, is_archived=True).order_by('-created_at')
-    serializer = PublicationSerializer(queryset, many=True, context={'request': request})
+    queryset = (Publication.objects.filter(author=user, is_archived=True)
+                .for_card(requested_expand(request)).order_by('-created_at'))
+    serializer = PublicationCardSerializer(queryset, many=True, context={'request': request})
     return Response(serializer.data)
 
+@cached_response(list_scope)
 @api_view(['GET'])
 def urgent_publications(request):
     today = timezone.now()
@@ -273,9 +223,9 @@ def urgent_publications(request):
         status='active',
         expires_at__lte=soon,
         is_archived=False
-    ).order_by('expires_at')
+    ).for_card(requested_expand(request)).order_by('expires_at')
 
-    serializer = PublicationSerializer(queryset, many=True, context={'request': request})
+    serializer = PublicationCardSerializer(queryset, many=True, context={'request': request})
     return Response(serializer.data)
 
 
@@ -290,13 +240,11 @@ def active_publications(request):
         status='active',
         is_archived=False,
         expires_at__gt=today  # ещё не истёк срок
-    ).annotate(
-        total_donated=Sum('donations__donor_amount')
     ).filter(
-        Q(total_donated__lt=F('amount')) | Q(total_donated__isnull=True)
-    ).order_by('-created_at')
+        Q(stats__donated_total__lt=F('amount')) | Q(stats__isnull=True)
+    ).for_card(requested_expand(request)).order_by('-created_at')
 
-    serializer = PublicationSerializer(queryset, many=True, context={'request': request})
+    serializer = PublicationCardSerializer(queryset, many=True, context={'request': request})
     return Response(serializer.data)
 
 @api_view(['GET'])
@@ -307,7 +255,37 @@ def pending_publications(request):
         author=user,
         status='pending',
         verification_status__in=['pending', 'rejected']
-    ).order_by('-created_at')
+    ).for_card(requested_expand(request)).order_by('-created_at')
+
+    serializer = PublicationCardSerializer(queryset, many=True, context={'request': request})
+    return Response(serializer.data)
+
+def paginated_sub_resource(request, pk, queryset, serializer_class, ordering):
+    try:
+        publication = Publication.objects.get(pk=pk)
+    except Publication.DoesNotExist:
+        return Response({"error": "Publication not found."}, status=status.HTTP_404_NOT_FOUND)
+    if not can_view_publication(request.user, publication):
+        return Response({"error": "This publication is not available."}, status=status.HTTP_403_FORBIDDEN)
 
-    serializer = PublicationSerializer(queryset, many=True, context={'request': request})
-    return Response(serializer.data)
\ No newline at end of file
+    paginator = SubResourceCursorPagination(ordering)
+    page = paginator.paginate_queryset(queryset.filter(publication=publication), request)
+    serializer = serializer_class(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+def publication_donations(request, pk):
+    return paginated_sub_resource(request, pk, Donation.objects.select_related('donor__profile'),
+                                  DonationSerializer, ('-created_at', '-id'))
+
+
+@api_view(['GET'])
+def publication_viewers(request, pk):
+    return paginated_sub_resource(request, pk, View.objects.all(), ViewSerializer, ('-viewed_at', '-id'))
+
+
+@api_view(['GET'])
+def publication_documents(request, pk):
+    return paginated_sub_resource(request, pk, PublicationDocument.objects.all(),
+                                  PublicationDocumentSerializer, ('-uploaded_at', '-id'))
@@ -0,0 +1,66 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from verification.services.classifier import CATEGORY_REQUIREMENTS, DOCUMENT_TYPE_KEYWORDS
+from verification.services.keywords import find_keywords, get_document_matcher
+from verification.services.validation import DOCUMENT_REQUIREMENTS, CATEGORY_DOCUMENT_HINTS
+
+FILLER = (
+    "Республика Казахстан выдана гражданину в том что он действительно проходил "
+    "в городской больнице номер сумма 2023 года подпись печать главный врач"
+).split()
+
+
+def naive_scan(text, document_type, category):
+    # Прежняя схема: отдельный lower() и `keyword in text` на каждое слово каждой таблицы
+    lowered = text.lower()
+    predicted = next((t for t, words in DOCUMENT_TYPE_KEYWORDS if any(w in lowered for w in words)), 'supporting')
+    lowered = text.lower()
+    type_found = [w for w in DOCUMENT_REQUIREMENTS.get(document_type, []) if w in lowered]
+    category_found = [w for w in CATEGORY_DOCUMENT_HINTS.get(category, []) if w in lowered]
+    supporting = [w for w in CATEGORY_REQUIREMENTS.get(category, []) if w.lower() in text.lower()]
+    return predicted, type_found, category_found, supporting
+
+
+def matcher_scan(text, document_type, category):
+    found = find_keywords(text)
+    predicted = next((t for t, words in DOCUMENT_TYPE_KEYWORDS if any(w in found for w in words)), 'supporting')
+    type_found = [w for w in DOCUMENT_REQUIREMENTS.get(document_type, []) if w in found]
+    category_found = [w for w in CATEGORY_DOCUMENT_HINTS.get(category, []) if w in found]
+    supporting = [w for w in CATEGORY_REQUIREMENTS.get(category, []) if w.lower() in found]
+    return predicted, type_found, category_found, supporting
+
+
+class Command(BaseCommand):
+    help = "Compare per-keyword substring scans with the compiled keyword matcher on long OCR texts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 50])
+        parser.add_argument('--words-per-page', type=int, default=400)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        get_document_matcher()  # компиляция не входит в замер
+        vocabulary = FILLER * 20 + get_document_matcher().keywords
+
+        for page_count in options['pages']:
+            text = "\n\n".join(
+                " ".join(random.choice(vocabulary) for _ in range(options['words_per_page']))
+                for _ in range(page_count)
+            )
+            timings = {}
+            for label, scan in (('naive', naive_scan), ('matcher', matcher_scan)):
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    result = scan(text, 'supporting', 'medicine')
+                timings[label] = (time.perf_counter() - start) / options['repeat'] * 1000
+                timings[f'{label}_result'] = result
+
+            assert timings['naive_result'] == timings['matcher_result'], "результаты различаются"
+            self.stdout.write(
+                f"{page_count:3} pages ({len(text):>8} chars): naive {timings['naive']:.2f} ms  "
+                f"matcher {timings['matcher']:.2f} ms  x{timings['naive'] / timings['matcher']:.1f}"
+            )
@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Дочерний процесс: импорт модулей, которые загружает веб-процесс, плюс (опционально) загрузка моделей
+PROBE = """
+import json, os, resource, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+start = time.perf_counter()
+import django
+django.setup()
+import verification.tasks
+from verification.services import ner
+if {preload}:
+    ner.preload()
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'natasha_imported': 'natasha' in sys.modules,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure process startup time and RSS with lazy vs eager NER model loading"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3)
+
+    def probe(self, preload):
+        code = PROBE.format(settings_module=settings.SETTINGS_MODULE, preload=preload)
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=settings.BASE_DIR, text=True)
+        return json.loads(output.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        for label, preload in (('lazy (web)', False), ('eager (worker)', True)):
+            runs = [self.probe(preload) for _ in range(options['runs'])]
+            seconds = min(run['seconds'] for run in runs)
+            rss = min(run['max_rss_mb'] for run in runs)
+            self.stdout.write(
+                f"{label:16} startup {seconds:.2f}s  max RSS {rss:.0f} MB  "
+                f"natasha imported: {runs[0]['natasha_imported']}"
+            )
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from verification.services.ocr import PREPROCESS_PARAMS
+
+
+def ocr_cache_key(data: bytes, params: dict = None) -> str:
+    """
+    Ключ по содержимому: SHA-256 исходных байтов файла + SHA-256 параметров предобработки.
+    """
+    params_hash = hashlib.sha256(json.dumps(params or PREPROCESS_PARAMS, sort_keys=True).encode()).hexdigest()
+    return f"{hashlib.sha256(data).hexdigest()}-{params_hash[:16]}"
+
+
+class DiskOCRCache:
+    """
+    Кэш на локальном диске: один JSON-файл на ключ, вытеснение LRU по времени доступа
+    при превышении max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # отмечаем использование для LRU
+        return value
+
+    def set(self, key, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+class DjangoOCRCache:
+    """
+    Кэш через Django cache framework (Redis/Memcached/locmem); размер ограничивается самим бэкендом.
+    """
+
+    def __init__(self, alias='default', timeout=30 * 24 * 3600, prefix='ocr'):
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.cache.get(f"{self.prefix}:{key}")
+
+    def set(self, key, value):
+        self.cache.set(f"{self.prefix}:{key}", value, self.timeout)
+
+
+@lru_cache(maxsize=None)
+def get_ocr_cache():
+    backend = import_string(settings.OCR_CACHE_BACKEND)
+    return backend(**getattr(settings, 'OCR_CACHE_OPTIONS', {}))
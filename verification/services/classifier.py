@@ -1,5 +1,7 @@
 import re
 
+from verification.services.keywords import find_keywords
+
 CATEGORY_REQUIREMENTS = {
     'medicine': [
         'диагноз', 'счет', 'инвалидность', 'финансирование', 'история болезни'
@@ -27,6 +29,18 @@ CATEGORY_REQUIREMENTS = {
     ],
 }
 
+INCOME_KEYWORDS = ['доход', 'зарплата', 'справка', 'тенге', '₸']
+
+# Порядок важен: побеждает первый тип, для которого нашлось хотя бы одно слово
+DOCUMENT_TYPE_KEYWORDS = [
+    ('identity', ['паспорт', 'удостоверение', 'фамилия', 'имя', 'иин']),
+    ('income', ['справка о доходах', 'доход', 'зарплата', 'налоговая декларация']),
+    ('supporting', [
+        'медицина', 'диагноз', 'обучение', 'экология', 'спорт', 'чрезвычайная',
+        'приют', 'помощь', 'документ', 'финансирование', 'участие',
+        'сертификат', 'мотивационное письмо', 'проект', 'пожар', 'болезнь']),
+]
+
 
 def validate_identity_document(text: str) -> bool:
     """
@@ -38,39 +52,33 @@ def validate_identity_document(text: str) -> bool:
     return all([name_match, birth_match, iin_match])
 
 
-def validate_income_document(text: str) -> bool:
+def validate_income_document(text: str, found: set = None) -> bool:
     """
     Проверка справки о доходах: наличие слова доход, зарплата, тенге и суммы
     """
-    keywords = ['доход', 'зарплата', 'справка', 'тенге', '₸']
-    has_keyword = any(k in text.lower() for k in keywords)
+    found = find_keywords(text) if found is None else found
+    has_keyword = any(k in found for k in INCOME_KEYWORDS)
     amount_match = re.search(r'\b\d{4,}\b', text)
     return has_keyword and bool(amount_match)
 
 
-def validate_supporting_document(text: str, category: str) -> dict:
+def validate_supporting_document(text: str, category: str, found: set = None) -> dict:
     """
     Проверка документов по категории: ищем ключевые слова
     """
+    found = find_keywords(text) if found is None else found
     required = CATEGORY_REQUIREMENTS.get(category, [])
-    found = [k for k in required if k.lower() in text.lower()]
+    matched = [k for k in required if k.lower() in found]
     return {
-        'valid': bool(found),
-        'found_keywords': found,
+        'valid': bool(matched),
+        'found_keywords': matched,
         'expected_keywords': required
     }
 
-def guess_document_type(text: str) -> str:
-    text = text.lower()
+def guess_document_type(text: str, found: set = None) -> str:
+    found = find_keywords(text) if found is None else found
 
-    if any(keyword in text for keyword in ['паспорт', 'удостоверение', 'фамилия', 'имя', 'иин']):
-        return 'identity'
-    elif any(keyword in text for keyword in ['справка о доходах', 'доход', 'зарплата', 'налоговая декларация']):
-        return 'income'
-    elif any(keyword in text for keyword in [
-        'медицина', 'диагноз', 'обучение', 'экология', 'спорт', 'чрезвычайная',
-        'приют', 'помощь', 'документ', 'финансирование', 'участие',
-        'сертификат', 'мотивационное письмо', 'проект', 'пожар', 'болезнь']):
-        return 'supporting'
-    else:
-        return 'supporting'  # По умолчанию
+    for document_type, keywords in DOCUMENT_TYPE_KEYWORDS:
+        if any(keyword in found for keyword in keywords):
+            return document_type
+    return 'supporting'  # По умолчанию
@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """
+    Поиск набора ключевых слов в тексте: текст приводится к нижнему регистру один раз,
+    каждое уникальное слово всех таблиц ищется один раз.
+    find() возвращает то же множество, что и {k for k in keywords if k in text.lower()}.
+    """
+
+    def __init__(self, keywords):
+        # Короткие слова первыми: если слова нет в тексте, то и содержащих его длинных быть не может
+        self.keywords = sorted({keyword.lower() for keyword in keywords if keyword}, key=lambda k: (len(k), k))
+        self.requires = {
+            keyword: [other for other in self.keywords if len(other) < len(keyword) and other in keyword]
+            for keyword in self.keywords
+        }
+
+    def find(self, text: str) -> set:
+        text = text.lower()
+        found = set()
+        for keyword in self.keywords:
+            # `in` у str — поиск подстроки на C; отдельный проход регулярным выражением
+            # или автоматом на Python по каждому символу в CPython медленнее
+            if all(other in found for other in self.requires[keyword]) and keyword in text:
+                found.add(keyword)
+        return found
+
+
+@lru_cache(maxsize=None)
+def get_document_matcher() -> KeywordMatcher:
+    # Таблицы импортируются здесь: classifier и validation сами используют этот модуль
+    from verification.services.classifier import CATEGORY_REQUIREMENTS, DOCUMENT_TYPE_KEYWORDS, INCOME_KEYWORDS
+    from verification.services.validation import DOCUMENT_REQUIREMENTS, CATEGORY_DOCUMENT_HINTS
+
+    keywords = set(INCOME_KEYWORDS)
+    for _, words in DOCUMENT_TYPE_KEYWORDS:
+        keywords.update(words)
+    for table in (CATEGORY_REQUIREMENTS, DOCUMENT_REQUIREMENTS, CATEGORY_DOCUMENT_HINTS):
+        for words in table.values():
+            keywords.update(words)
+    return KeywordMatcher(keywords)
+
+
+def find_keywords(text: str) -> set:
+    """
+    Все ключевые слова из таблиц классификатора и валидации, встречающиеся в тексте (в нижнем регистре).
+    Результат можно передать в guess_document_type/validate_* через found=, чтобы не сканировать текст повторно.
+    """
+    return get_document_matcher().find(text)
@@ -1,22 +1,65 @@
-from natasha import Segmenter, MorphVocab, NewsEmbedding, NewsNERTagger, Doc
+import threading
 
-segmenter = Segmenter()
-morph_vocab = MorphVocab()
-embedding = NewsEmbedding()
-ner_tagger = NewsNERTagger(embedding)
+# Модели Natasha загружаются лениво при первом вызове (или в worker_process_init Celery),
+# поэтому веб-процессы, импортирующие verification.tasks, не тратят на них время и память
+_models = None
+_lock = threading.Lock()
+
+
+def get_models():
+    global _models
+    if _models is None:
+        with _lock:
+            if _models is None:
+                from natasha import Segmenter, MorphVocab, NewsEmbedding, NewsNERTagger
+
+                embedding = NewsEmbedding()
+                _models = {
+                    'segmenter': Segmenter(),
+                    'morph_vocab': MorphVocab(),
+                    'ner_tagger': NewsNERTagger(embedding),
+                }
+    return _models
+
+
+def preload():
+    get_models()
+
+
+def is_loaded():
+    return _models is not None
+
+
+def extract_entities_many(texts):
+    """
+    Размечает несколько документов за один батч NER-модели; результат — список сущностей на каждый текст.
+    """
+    from natasha import Doc
+    from natasha.doc import adapt_spans
+
+    models = get_models()
+    docs = [Doc(text) for text in texts]
+    tagged = [doc for doc in docs if doc.text.strip()]
+
+    markups = models['ner_tagger'].map([doc.text for doc in tagged])
+    for doc, markup in zip(tagged, markups):
+        doc.segment(models['segmenter'])
+        doc.spans = list(adapt_spans(doc, markup.spans))
+        doc.envelop_span_tokens()
+
+    results = []
+    for doc in docs:
+        entities = []
+        for span in doc.spans or []:
+            span.normalize(models['morph_vocab'])
+            entities.append({
+                'text': span.text,
+                'type': span.type,
+                'normal': span.normal
+            })
+        results.append(entities)
+    return results
 
 
 def extract_entities(text):
-    doc = Doc(text)
-    doc.segment(segmenter)
-    doc.tag_ner(ner_tagger)
-
-    entities = []
-    for span in doc.spans:
-        span.normalize(morph_vocab)
-        entities.append({
-            'text': span.text,
-            'type': span.type,
-            'normal': span.normal
-        })
-    return entities
+    return extract_entities_many([text])[0]
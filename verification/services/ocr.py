@@ -1,31 +1,113 @@
 import os
-from PIL import Image
-from pdf2image import convert_from_path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
+import fitz  # PyMuPDF
 import numpy as np
 import pytesseract
+from django.conf import settings
+
+
+# Параметры предобработки; входят в ключ кэша OCR, поэтому меняются только здесь
+PREPROCESS_PARAMS = {
+    'dpi': 300,
+    'median_blur': 3,
+    'block_size': 31,
+    'threshold_c': 10,
+    'lang': 'kaz+rus+eng',
+}
+
+SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
+
+
+def load_pages(data: bytes, is_pdf: bool, max_pages: int = None):
+    """
+    Декодирует файл из памяти в полутоновые массивы NumPy, по одному на страницу PDF.
+    Генератор: страница растеризуется, только когда её берёт OCR, поэтому в памяти воркера
+    не лежит весь документ. Из PDF берутся первые max_pages (settings.OCR_MAX_PAGES) страниц.
+    """
+    if is_pdf:
+        max_pages = max_pages or getattr(settings, 'OCR_MAX_PAGES', 20)
+        with fitz.open(stream=data, filetype='pdf') as pdf:
+            for number in range(min(pdf.page_count, max_pages)):
+                pix = pdf[number].get_pixmap(dpi=PREPROCESS_PARAMS['dpi'], colorspace=fitz.csGRAY, alpha=False)
+                yield np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+        return
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("Не удалось прочитать изображение.")
+    yield image
+
+
+def preprocess(gray: np.ndarray) -> np.ndarray:
+    gray = cv2.medianBlur(gray, PREPROCESS_PARAMS['median_blur'])
+    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                   PREPROCESS_PARAMS['block_size'], PREPROCESS_PARAMS['threshold_c'])
+    return cv2.filter2D(thresh, -1, SHARPEN_KERNEL)
+
+
+def ocr_page(number: int, gray: np.ndarray) -> dict:
+    """
+    Один запуск Tesseract на страницу: текст собирается из image_to_data по строкам,
+    уверенность — среднее по распознанным словам.
+    """
+    data = pytesseract.image_to_data(preprocess(gray), lang=PREPROCESS_PARAMS['lang'],
+                                     output_type=pytesseract.Output.DICT)
+
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        word = word.strip()
+        if not word:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(key, []).append(word)
+        confidence = float(data['conf'][i])
+        if confidence >= 0:
+            confidences.append(confidence)
+
+    return {
+        'page': number,
+        'text': "\n".join(" ".join(words) for words in lines.values()),
+        'confidence': round(sum(confidences) / len(confidences), 2) if confidences else 0.0,
+    }
+
+
+def ocr_pages(pages, max_workers: int = None) -> list:
+    """
+    Распознаёт страницы параллельно, сохраняя порядок. Tesseract запускается pytesseract
+    отдельным процессом на каждую страницу, а OpenCV отпускает GIL, поэтому ограниченного
+    пула потоков достаточно для параллелизма на уровне процессов; пул процессов внутри
+    демонических prefork-воркеров Celery создать нельзя. Страницы берутся из итератора
+    по мере освобождения потоков: в работе не больше max_workers растеризованных страниц.
+    """
+    max_workers = max_workers or getattr(settings, 'OCR_MAX_WORKERS', os.cpu_count() or 1)
+    numbered = enumerate(pages, start=1)
+    if max_workers == 1:
+        return [ocr_page(number, page) for number, page in numbered]
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for number, page in numbered:
+            in_flight.append(executor.submit(ocr_page, number, page))
+            if len(in_flight) >= max_workers:
+                results.append(in_flight.popleft().result())
+        results.extend(future.result() for future in in_flight)
+    return results
+
+
+def extract_pages(file_path: str, max_workers: int = None) -> list:
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return ocr_pages(load_pages(data, file_path.lower().endswith('.pdf')), max_workers)
+
+
+def join_pages(pages: list) -> str:
+    return "\n\n".join(page['text'] for page in pages).strip()
 
 
 def extract_text_from_file(file_path: str) -> str:
-    if file_path.lower().endswith('.pdf'):
-        pages = convert_from_path(file_path, dpi=300)
-        image = pages[0]
-    else:
-        image = Image.open(file_path)
-
-    # Preprocessing
-    image_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-    gray = cv2.cvtColor(image_cv, cv2.COLOR_BGR2GRAY)
-    gray = cv2.medianBlur(gray, 3)
-    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                   cv2.THRESH_BINARY, 31, 10)
-    kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-    sharpened = cv2.filter2D(thresh, -1, kernel)
-
-    temp_path = file_path + "_processed.png"
-    cv2.imwrite(temp_path, sharpened)
-
-    text = pytesseract.image_to_string(Image.open(temp_path), lang='kaz+rus+eng')
-
-    os.remove(temp_path)
-    return text.strip()
+    return join_pages(extract_pages(file_path))
@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from notifications.utils import notify_user
+from publications.models import Publication
+from publications.response_cache import bump_publications
+
+# Статус проверки публикации -> статус публикации
+PUBLICATION_STATUS = {
+    'approved': 'active',
+    'rejected': 'pending',
+    'pending': 'pending',
+}
+
+NOTIFICATION_VERBS = {
+    'approved': "✅ Ваша публикация была одобрена",
+    'rejected': "❌ Ваша публикация была отклонена",
+}
+
+
+def resolve_verification_status(total, approved, rejected):
+    if rejected:
+        return 'rejected'
+    if approved == total:
+        return 'approved'
+    return 'pending'
+
+
+def rollup_publication_verification(publication_id, document=None):
+    """
+    Пересчитывает статус проверки публикации по её документам одним агрегатным запросом.
+    Строка публикации блокируется на время пересчёта, поэтому параллельно завершившиеся
+    документы не перезаписывают результат друг друга. Публикация сохраняется и автор
+    уведомляется только при смене статуса. Возвращает новый статус проверки или None,
+    если ни он, ни статус публикации не изменились.
+    """
+    with transaction.atomic():
+        publication = Publication.objects.select_for_update().get(id=publication_id)
+        counts = publication.documents.aggregate(
+            total=Count('id'),
+            approved=Count('id', filter=Q(verification_status='approved')),
+            rejected=Count('id', filter=Q(verification_status='rejected')),
+        )
+        verification_status = resolve_verification_status(**counts)
+        status = PUBLICATION_STATUS[verification_status]
+        # Сравнивается пара: новая публикация создаётся active/pending, и частично проверенные
+        # документы (pending -> pending) всё равно должны снять её с публикации
+        if (verification_status, status) == (publication.verification_status, publication.status):
+            return None
+
+        # Условный UPDATE — вторая линия защиты там, где select_for_update не блокирует (SQLite)
+        changed = Publication.objects.filter(id=publication_id).exclude(
+            verification_status=verification_status, status=status
+        ).update(
+            verification_status=verification_status,
+            status=status,
+            updated_at=timezone.now(),
+        )
+        if not changed:
+            return None
+        # UPDATE идёт мимо сигналов — кэш ответов публикации и списков сбрасывается явно
+        bump_publications([publication_id])
+
+        verb = NOTIFICATION_VERBS.get(verification_status)
+        if verb and verification_status != publication.verification_status:
+            target = f"Публикация: {publication.title}"
+            if document is not None:
+                target += f" — документ «{document.get_document_type_display()}»"
+            transaction.on_commit(lambda: notify_user(
+                user=publication.author,
+                verb=verb,
+                target=target,
+                url=f"/publications/{publication.id}/"
+            ))
+    return verification_status
@@ -1,3 +1,6 @@
+from verification.services.keywords import find_keywords
+
+
 DOCUMENT_REQUIREMENTS = {
     'identity': ['фамилия', 'имя', 'дата рождения', 'иин', 'удостоверение', 'паспорт'],
     'income': ['доход', 'зарплата', 'справка о доходах', 'налоговая декларация'],
@@ -35,7 +38,7 @@ CATEGORY_DOCUMENT_HINTS = {
 }
 
 
-def validate_document_content(document_type, category, text):
+def validate_document_content(document_type, category, text, found=None):
     """
     Проверка текста OCR-документа на наличие обязательных слов по типу и категории
     """
@@ -43,11 +46,12 @@ def validate_document_content(document_type, category, text):
     warnings = []
     matches = []
 
-    text = text.lower()
+    # Один проход по тексту вместо отдельного `word in text` на каждое слово таблиц
+    found = find_keywords(text) if found is None else found
 
     # Проверка по document_type
     type_keywords = DOCUMENT_REQUIREMENTS.get(document_type, [])
-    type_found = [word for word in type_keywords if word in text]
+    type_found = [word for word in type_keywords if word in found]
 
     if not type_found:
         errors.append(f"Текст не соответствует ключевым словам для типа документа '{document_type}'")
@@ -56,7 +60,7 @@ def validate_document_content(document_type, category, text):
 
     # Проверка по категории публикации
     category_keywords = CATEGORY_DOCUMENT_HINTS.get(category, [])
-    category_found = [word for word in category_keywords if word in text]
+    category_found = [word for word in category_keywords if word in found]
 
     if not category_found:
         warnings.append(f"Нет подтверждения, что документ относится к категории '{category}'")
@@ -1,45 +1,14 @@
 from celery import shared_task
-import os
 import hashlib
-import cv2
-import numpy as np
-from django.conf import settings
-from PIL import Image
-from pdf2image import convert_from_path
 from publications.models import PublicationDocument
-from verification.services.ocr import extract_text_from_file
+from verification.services.ocr import load_pages, ocr_pages, join_pages
+from verification.services.cache import get_ocr_cache, ocr_cache_key
 from verification.services.ner import extract_entities
 from verification.services.classifier import guess_document_type
+from verification.services.keywords import find_keywords
 from verification.services.validation import validate_document_content
 from publications.utils import send_email_dynamic
-from notifications.utils import notify_user
-
-def preprocess_image(file_path):
-    if file_path.lower().endswith('.pdf'):
-        pages = convert_from_path(
-            file_path, dpi=300,
-            poppler_path=r'C:\Program Files\poppler-24.08.0\Library\bin'
-        )
-        image = pages[0]
-    else:
-        image = Image.open(file_path)
-
-    image_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-    gray = cv2.cvtColor(image_cv, cv2.COLOR_BGR2GRAY)
-    gray = cv2.medianBlur(gray, 3)
-    thresh = cv2.adaptiveThreshold(
-        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY, 31, 10
-    )
-    kernel = np.array([[0, -1, 0],
-                       [-1, 5, -1],
-                       [0, -1, 0]])
-    sharpened = cv2.filter2D(thresh, -1, kernel)
-
-    temp_path = file_path + '_processed.png'
-    cv2.imwrite(temp_path, sharpened)
-    return temp_path
-
+from verification.services.rollup import rollup_publication_verification
 
 @shared_task
 def process_document_verification(document_id):
@@ -48,12 +17,25 @@ def process_document_verification(document_id):
     except PublicationDocument.DoesNotExist:
         return  # Документ уже удалён — задача безопасно завершена
 
-    file_path = os.path.join(settings.MEDIA_ROOT, document.file.name)
-
     try:
-        processed_path = preprocess_image(file_path)
-        text = extract_text_from_file(processed_path)
-        os.remove(processed_path)
+        with document.file.open('rb') as f:
+            data = f.read()
+
+        # Кэш по хэшу исходных байтов проверяется до любого декодирования изображения:
+        # повторная загрузка или ретрай задачи не запускают OCR и NER заново
+        ocr_cache = get_ocr_cache()
+        cache_key = ocr_cache_key(data)
+        cached = ocr_cache.get(cache_key) or {}
+
+        if 'pages' in cached:
+            pages = cached['pages']
+        else:
+            # Все страницы распознаются за один проход, без временных файлов
+            pages = ocr_pages(load_pages(data, document.file.name.lower().endswith('.pdf')))
+            cached = {'pages': pages}
+            ocr_cache.set(cache_key, cached)
+
+        text = join_pages(pages)
         if not text.strip():
             document.verified = False
             document.verification_status = 'rejected'
@@ -70,18 +52,29 @@ def process_document_verification(document_id):
             document.save()
             return
 
-        predicted_type = guess_document_type(text)
-        entities = extract_entities(text)
+        # Ключевые слова всех таблиц ищутся один раз и переиспользуются классификатором и валидацией
+        found_keywords = find_keywords(text)
+
+        if 'entities' in cached:
+            predicted_type = cached['predicted_type']
+            entities = cached['entities']
+        else:
+            predicted_type = guess_document_type(text, found=found_keywords)
+            entities = extract_entities(text)
+            ocr_cache.set(cache_key, dict(cached, predicted_type=predicted_type, entities=entities))
+
         publication_category = document.publication.category
 
         validation_result = validate_document_content(
             document_type=document.document_type,
             category=publication_category,
-            text=text
+            text=text,
+            found=found_keywords
         )
 
         document.extracted_data = {
             "ocr_text": text,
+            "pages": pages,
             "predicted_type": predicted_type,
             "extracted_entities": entities,
             "validation": validation_result
@@ -123,36 +116,9 @@ def process_document_verification(document_id):
         document.save()
 
 
-        publication = document.publication
-        documents = publication.documents.all()
-
-        if any(doc.verification_status == 'rejected' for doc in documents):
-            publication.verification_status = 'rejected'
-            publication.status = 'pending'
-        elif all(doc.verification_status == 'approved' for doc in documents):
-            publication.verification_status = 'approved'
-            publication.status = 'active'
-        else:
-            publication.verification_status = 'pending'
-            publication.status = 'pending'
-
-        publication.save()
-
-        # Отправка уведомления пользователю
-        if publication.verification_status == 'approved':
-            notify_user(
-                user=publication.author,
-                verb="✅ Ваша публикация была одобрена",
-                target=f"Публикация: {publication.title} — документ «{document.get_document_type_display()}»",
-                url=f"/publications/{publication.id}/"
-            )
-        elif publication.verification_status == 'rejected':
-            notify_user(
-                user=publication.author,
-                verb="❌ Ваша публикация была отклонена",
-                target=f"Публикация: {publication.title} — документ «{document.get_document_type_display()}»",
-                url=f"/publications/{publication.id}/"
-            )
+        # Статус публикации пересчитывается агрегатом под блокировкой строки;
+        # сохранение и уведомление — только при реальной смене статуса
+        rollup_publication_verification(document.publication_id, document=document)
 
     except Exception as e:
         document.verified = False
@@ -163,18 +129,6 @@ def process_document_verification(document_id):
 
 @shared_task
 def check_publication_status():
-    from publications.models import Publication
-    from django.utils import timezone
-    now = timezone.now()
-
-    publications = Publication.objects.filter(status='active')
-    for pub in publications:
-        donated = pub.total_donated()
-        if donated >= pub.amount:
-            pub.status = 'successful'
-            pub.is_archived = True
-            pub.save()
-        elif pub.expires_at and pub.expires_at <= now:
-            pub.status = 'expired'
-            pub.is_archived = True
-            pub.save()
+    # Та же логика, что и в publications.tasks, но без удаления архива
+    from publications.lifecycle import close_finished_publications
+    return close_finished_publications()
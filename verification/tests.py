@@ -1,7 +1,13 @@
 import os
+import threading
+from io import BytesIO
+
+import numpy as np
 import pytest
 from verification.services.classifier import guess_document_type
-from verification.services.ner import extract_entities
+from verification.services.keywords import KeywordMatcher, find_keywords, get_document_matcher
+from verification.services.ner import extract_entities, extract_entities_many
+from verification.services import ocr
 from verification.services.ocr import extract_text_from_file
 
 
@@ -23,6 +29,32 @@ def test_classifier_supporting():
     assert guess_document_type(text) == "supporting"
 
 
+def test_keyword_matcher_finds_overlapping_and_nested_keywords():
+    matcher = KeywordMatcher(['справка', 'справка о доходах', 'доход', 'доходах', 'мчс'])
+    text = "СПРАВКА О ДОХОДАХ выдана, справка МЧС"
+    assert matcher.find(text) == {'справка', 'справка о доходах', 'доход', 'доходах', 'мчс'}
+    assert matcher.find("нет совпадений") == set()
+
+
+def test_keyword_matcher_matches_naive_scan_on_long_ocr_text():
+    import random
+    keywords = get_document_matcher().keywords
+    random.seed(42)
+    words = keywords + ["Республика", "Казахстан", "выдана", "г.", "2023", "№", "подпись", "печать"]
+    # Длинный многостраничный текст со словами, склеенными без пробелов и в разном регистре
+    pages = [
+        "".join(random.choice(words).upper() if random.random() < 0.2 else random.choice(words) + random.choice([" ", "", "\n"])
+                for _ in range(2000))
+        for _ in range(10)
+    ]
+    text = "\n\n".join(pages)
+    assert find_keywords(text) == {k for k in keywords if k in text.lower()}
+
+    for page in pages[:3]:
+        sample = page[:300]
+        assert find_keywords(sample) == {k for k in keywords if k in sample.lower()}
+
+
 # ------------------------
 # 🔍 NER (Natasha)
 # ------------------------
@@ -34,6 +66,42 @@ def test_ner_entity_extraction():
     assert 'PER' in types or 'LOC' in types or 'ORG' in types
 
 
+def test_ner_batch_matches_single_documents():
+    texts = [
+        "Иванов Иван родился в Алматы и работает в Kaspi",
+        "",
+        "Справка выдана ТОО «Медицинский центр» в городе Астана",
+    ]
+
+    assert extract_entities_many(texts) == [tag_ner_single(text) for text in texts]
+
+
+def tag_ner_single(text):
+    # Прежний путь: каждый документ размечается отдельно через Doc.tag_ner
+    from natasha import Doc
+    from verification.services.ner import get_models
+
+    models = get_models()
+    doc = Doc(text)
+    doc.segment(models['segmenter'])
+    doc.tag_ner(models['ner_tagger'])
+    entities = []
+    for span in doc.spans:
+        span.normalize(models['morph_vocab'])
+        entities.append({'text': span.text, 'type': span.type, 'normal': span.normal})
+    return entities
+
+
+def test_ner_models_are_not_loaded_on_import():
+    import subprocess
+    import sys
+
+    code = "import sys, verification.services.ner as ner; print(ner.is_loaded(), 'natasha' in sys.modules)"
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     cwd=os.path.dirname(os.path.dirname(__file__)), text=True)
+    assert output.split() == ['False', 'False']
+
+
 # ------------------------
 # 🔍 OCR (на примере встроенного изображения)
 # ------------------------
@@ -45,3 +113,235 @@ def test_ocr_on_sample_image():
 
     text = extract_text_from_file(sample_path)
     assert len(text.strip()) > 30  # Должен вернуть осмысленный текст
+
+
+
+def make_pdf(pages):
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for i in range(pages):
+        pdf.drawString(100, 750, f"Page {i + 1}")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def test_ocr_loads_pdf_pages_lazily_up_to_the_cap():
+    pages = ocr.load_pages(make_pdf(5), is_pdf=True, max_pages=3)
+
+    first = next(pages)
+    assert isinstance(first, np.ndarray) and first.ndim == 2
+    assert len([first, *pages]) == 3
+
+
+def test_ocr_pages_bound_rasterized_pages_in_flight(monkeypatch):
+    lock = threading.Lock()
+    state = {'loaded': 0, 'done': 0, 'peak': 0}
+
+    def pages():
+        for height in range(40, 50):
+            with lock:
+                state['loaded'] += 1
+                state['peak'] = max(state['peak'], state['loaded'] - state['done'])
+            yield np.full((height, 50), 255, dtype=np.uint8)
+
+    def fake_ocr_page(number, gray):
+        with lock:
+            state['done'] += 1
+        return {'page': number, 'text': str(gray.shape[0]), 'confidence': 90.0}
+
+    monkeypatch.setattr(ocr, 'ocr_page', fake_ocr_page)
+    result = ocr.ocr_pages(pages(), max_workers=2)
+
+    assert [page['text'] for page in result] == [str(height) for height in range(40, 50)]
+    assert state['peak'] <= 2
+
+
+def test_ocr_pages_run_concurrently_and_keep_order(monkeypatch):
+    active = []
+    peak = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fake_image_to_data(image, lang, output_type):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        barrier.wait()
+        with lock:
+            active.pop()
+        return {'text': [str(int(image.shape[0]))], 'conf': ['90'], 'block_num': [1], 'par_num': [1], 'line_num': [1]}
+
+    monkeypatch.setattr(ocr.pytesseract, 'image_to_data', fake_image_to_data)
+    pages = [np.full((height, 50), 255, dtype=np.uint8) for height in (40, 41, 42, 43)]
+
+    result = ocr.ocr_pages(pages, max_workers=2)
+
+    assert [page['page'] for page in result] == [1, 2, 3, 4]
+    assert [page['text'] for page in result] == ['40', '41', '42', '43']
+    assert all(page['confidence'] == 90.0 for page in result)
+    assert max(peak) == 2
+
+
+# ------------------------
+# 🔍 Кэш OCR
+# ------------------------
+def test_ocr_cache_key_depends_on_bytes_and_params():
+    from verification.services.cache import ocr_cache_key
+
+    params = dict(ocr.PREPROCESS_PARAMS)
+    assert ocr_cache_key(b"file") == ocr_cache_key(b"file", params)
+    assert ocr_cache_key(b"file") != ocr_cache_key(b"other")
+    assert ocr_cache_key(b"file") != ocr_cache_key(b"file", dict(params, dpi=200))
+
+
+def test_disk_ocr_cache_evicts_least_recently_used(tmp_path):
+    from verification.services.cache import DiskOCRCache
+
+    cache = DiskOCRCache(str(tmp_path), max_bytes=2500)
+    payload = {'pages': [{'page': 1, 'text': "x" * 1000, 'confidence': 90.0}]}
+
+    cache.set('a', payload)
+    cache.set('b', payload)
+    os.utime(tmp_path / 'a.json', (1, 1))
+    os.utime(tmp_path / 'b.json', (2, 2))
+    assert cache.get('a') == payload  # 'a' снова самый свежий
+    cache.set('c', payload)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == payload
+    assert cache.get('c') == payload
+
+
+# ------------------------
+# 🔒 Статус проверки публикации
+# ------------------------
+@pytest.mark.django_db(transaction=True)
+def test_verification_rollup_runs_once_per_transition_under_concurrency(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from django.db import connection
+    from publications.models import PublicationDocument
+    from publications.tests import make_publication, make_user
+    from verification.services import rollup
+
+    notified = []
+    monkeypatch.setattr(rollup, 'notify_user', lambda **kwargs: notified.append(kwargs['verb']))
+
+    publication = make_publication(make_user("author@example.com"), status='pending')
+    documents = [
+        PublicationDocument.objects.create(publication=publication, document_type='supporting', file='doc.pdf')
+        for _ in range(5)
+    ]
+
+    def finish(document):
+        try:
+            PublicationDocument.objects.filter(id=document.id).update(verification_status='approved')
+            return rollup.rollup_publication_verification(publication.id, document=document)
+        finally:
+            connection.close()
+
+    # Все документы «завершаются» одновременно
+    barrier = threading.Barrier(len(documents))
+
+    def finish_together(document):
+        barrier.wait()
+        return finish(document)
+
+    with ThreadPoolExecutor(max_workers=len(documents)) as executor:
+        results = list(executor.map(finish_together, documents))
+
+    publication.refresh_from_db()
+    assert publication.verification_status == 'approved'
+    assert publication.status == 'active'
+    assert results.count('approved') == 1
+    assert notified == ["✅ Ваша публикация была одобрена"]
+
+    # Повторная обработка без изменений не сохраняет публикацию и не уведомляет
+    assert rollup.rollup_publication_verification(publication.id) is None
+    assert len(notified) == 1
+
+    PublicationDocument.objects.filter(id=documents[0].id).update(verification_status='rejected')
+    assert rollup.rollup_publication_verification(publication.id) == 'rejected'
+    publication.refresh_from_db()
+    assert publication.status == 'pending'
+    assert notified[-1] == "❌ Ваша публикация была отклонена"
+
+
+@pytest.mark.django_db
+def test_verification_rollup_unlists_partially_verified_publication(monkeypatch, django_capture_on_commit_callbacks):
+    from publications.models import PublicationDocument
+    from publications.tests import make_publication, make_user
+    from verification.services import rollup
+
+    notified = []
+    monkeypatch.setattr(rollup, 'notify_user', lambda **kwargs: notified.append(kwargs['verb']))
+
+    # Новая публикация создаётся active с verification_status='pending'
+    publication = make_publication(make_user("author@example.com"))
+    assert (publication.status, publication.verification_status) == ('active', 'pending')
+    first, second = [
+        PublicationDocument.objects.create(publication=publication, document_type='supporting', file='doc.pdf')
+        for _ in range(2)
+    ]
+
+    PublicationDocument.objects.filter(id=first.id).update(verification_status='approved')
+    with django_capture_on_commit_callbacks(execute=True):
+        assert rollup.rollup_publication_verification(publication.id, document=first) == 'pending'
+    publication.refresh_from_db()
+    assert (publication.status, publication.verification_status) == ('pending', 'pending')
+    assert notified == []
+
+    PublicationDocument.objects.filter(id=second.id).update(verification_status='approved')
+    with django_capture_on_commit_callbacks(execute=True):
+        assert rollup.rollup_publication_verification(publication.id, document=second) == 'approved'
+    publication.refresh_from_db()
+    assert publication.status == 'active'
+    assert notified == ["✅ Ваша публикация была одобрена"]
+
+
+@pytest.mark.django_db
+def test_document_approval_invalidates_cached_publication_responses(settings, monkeypatch, tmp_path):
+    import json
+    from django.core.cache import cache
+    from django.core.files.base import ContentFile
+    from rest_framework.test import APIClient
+    from publications.models import PublicationDocument
+    from publications.tests import make_publication, make_user
+    from verification import tasks
+    from verification.services.cache import DiskOCRCache
+
+    settings.RESPONSE_CACHE_ENABLED = True
+    settings.MAILER_AUTOSCHEDULE = False
+    settings.MEDIA_ROOT = str(tmp_path)
+    cache.clear()
+    monkeypatch.setattr(tasks, 'get_ocr_cache', lambda: DiskOCRCache(str(tmp_path / 'ocr')))
+    monkeypatch.setattr(tasks, 'load_pages', lambda data, is_pdf: [None])
+    monkeypatch.setattr(tasks, 'ocr_pages',
+                        lambda images: [{'page': 1, 'text': "Подтверждающий документ на лечение", 'confidence': 90.0}])
+    monkeypatch.setattr(tasks, 'validate_document_content',
+                        lambda **kwargs: {'errors': [], 'warnings': [], 'matches': ['лечение']})
+
+    client = APIClient()
+
+    def listed_ids():
+        return [item['id'] for item in json.loads(client.get('/publications/').content)]
+
+    # Анонимный запрос между сохранением документа и пересчётом статуса кэширует список без публикации
+    rollup = tasks.rollup_publication_verification
+    seen_before_rollup = []
+    monkeypatch.setattr(tasks, 'rollup_publication_verification',
+                        lambda *args, **kwargs: seen_before_rollup.append(listed_ids()) or rollup(*args, **kwargs))
+
+    publication = make_publication(make_user("author@example.com"), status='pending')
+    document = PublicationDocument.objects.create(publication=publication, document_type='supporting',
+                                                  file=ContentFile(b"scan", name='scan.png'))
+
+    tasks.process_document_verification(document.id)
+
+    document.refresh_from_db()
+    assert document.verification_status == 'approved', document.verification_details
+    assert publication.id not in seen_before_rollup[0]
+    # Одобренная публикация видна анонимам сразу, без ожидания окна RESPONSE_CACHE_TTL
+    assert publication.id in listed_ids()